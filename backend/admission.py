@@ -0,0 +1,242 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import Counter
+
+# Admission priorities, most important first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+def resolve_priority(requested, token=None, tokens=None):
+    """
+    The priority a session is admitted at. Clients choose their own only
+    downwards: a token listed in `tokens` (token -> priority, from server
+    configuration) sets it, otherwise at most "normal" is granted.
+    """
+    granted = tokens.get(token) if token and tokens else None
+    if granted is not None:
+        return granted
+    return max(requested, "normal", key=PRIORITIES.get)
+
+
+class Rejected(Exception):
+    """A session was not admitted; `code` says why (see AdmissionController)."""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class Ticket:
+    """An admitted session and the terms it was admitted on."""
+
+    def __init__(self, priority, model, degraded=False, min_pass_interval=0.0, waited=0.0):
+        self.priority = priority
+        self.model = model
+        self.degraded = degraded
+        self.min_pass_interval = min_pass_interval  # Seconds between passes, 0 = as fast as audio arrives
+        self.waited = waited
+        self.released = False
+
+
+class AdmissionController:
+    """
+    Decides which transcription sessions run, queue or are turned away.
+
+    At most `max_sessions` run at once. Further sessions wait in a queue
+    ordered by priority, then arrival, for up to `queue_timeout` seconds.
+    When the queue is full a newcomer takes the place of the newest waiter
+    of a lower priority, otherwise it is rejected. Past `degrade_at` running
+    sessions, new ones are admitted degraded: on `degraded_model` and with
+    at least `degraded_pass_interval` seconds between passes, so the load
+    each adds shrinks before anyone has to be turned away.
+
+    Used from the event loop only.
+    """
+
+    def __init__(self, max_sessions=0, queue_size=16, queue_timeout=30.0, degrade_at=0, degraded_model=None, degraded_pass_interval=0.0):
+        """
+        :param max_sessions: Sessions running at once (0 = unlimited).
+        :param queue_size: Sessions that may wait for a slot (0 rejects
+            as soon as all slots are taken).
+        :param degrade_at: Running sessions above which new ones are
+            degraded (0 = never).
+        """
+        self.max_sessions = max_sessions
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.degrade_at = degrade_at
+        self.degraded_model = degraded_model
+        self.degraded_pass_interval = degraded_pass_interval
+        self.active = 0
+        self.admitted = 0
+        self.degraded = 0
+        self.rejected = Counter()  # code -> sessions
+        self.quota_exceeded = Counter()  # quota -> sessions
+        self.throttled_passes = 0
+        self._waiting = []  # heap of [rank, seq, future]
+        self._seq = itertools.count()
+
+    def _has_room(self):
+        return not self.max_sessions or self.active < self.max_sessions
+
+    def _reject(self, code, message):
+        self.rejected[code] += 1
+        return Rejected(code, message)
+
+    async def admit(self, model, priority="normal", on_queued=None):
+        """
+        Wait for a slot.
+        :param model: The model the session asked for.
+        :param priority: One of PRIORITIES.
+        :param on_queued: Coroutine function called with the queue position
+            if the session has to wait.
+        :return: Ticket; pass it to release() when the session ends.
+        :raises Rejected: If there is no room in time.
+        """
+        rank = PRIORITIES[priority]
+        start = time.monotonic()
+        if self._has_room() and not self._waiting:
+            self.active += 1
+        else:
+            await self._wait(rank, on_queued)
+
+        ticket = Ticket(priority, model, waited=time.monotonic() - start)
+        if self.degrade_at and self.active > self.degrade_at:
+            ticket.degraded = True
+            ticket.model = self.degraded_model or model
+            ticket.min_pass_interval = self.degraded_pass_interval
+            self.degraded += 1
+        self.admitted += 1
+        return ticket
+
+    async def _wait(self, rank, on_queued):
+        if len(self._waiting) >= self.queue_size:
+            worst = max(self._waiting) if self._waiting else None
+            if worst is None or worst[0] <= rank:
+                raise self._reject("server_busy", "The server is at capacity, try again later")
+            # Make room by bumping the newest of the least important waiters
+            self._waiting.remove(worst)
+            heapq.heapify(self._waiting)
+            worst[2].set_exception(self._reject("preempted", "A higher-priority session took this place in the queue"))
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [rank, next(self._seq), future]
+        heapq.heappush(self._waiting, entry)
+        try:
+            if on_queued is not None:
+                await on_queued(sum(1 for other in self._waiting if other < entry) + 1)
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.exception():
+                return  # Admitted just as the wait ran out
+            self._forget(entry)
+            raise self._reject("queue_timeout", f"No session slot became free within {self.queue_timeout:g} s")
+        except BaseException:
+            # Cancelled (or the client went away while notified): give back a slot handed to us
+            self._forget(entry)
+            if future.done() and not future.cancelled() and not future.exception():
+                self.active -= 1
+                self._admit_waiting()
+            raise
+
+    def _forget(self, entry):
+        if entry in self._waiting:
+            self._waiting.remove(entry)
+            heapq.heapify(self._waiting)
+        if not entry[2].done():
+            entry[2].cancel()
+
+    def _admit_waiting(self):
+        while self._waiting and self._has_room():
+            _, _, future = heapq.heappop(self._waiting)
+            if future.done():
+                continue
+            self.active += 1
+            future.set_result(None)
+
+    def release(self, ticket):
+        """The session ended: hand its slot to the next waiter."""
+        if ticket.released:
+            return
+        ticket.released = True
+        self.active -= 1
+        self._admit_waiting()
+
+    def exceeded(self, quota):
+        """Count a session ended for going over `quota`."""
+        self.quota_exceeded[quota] += 1
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "queued": len(self._waiting),
+            "max_sessions": self.max_sessions,
+            "admitted": self.admitted,
+            "degraded": self.degraded,
+            "rejected": dict(self.rejected),
+            "quota_exceeded": dict(self.quota_exceeded),
+            "throttled_passes": self.throttled_passes,
+        }
+
+
+class SessionQuota:
+    """
+    Per-session limits, checked as audio arrives and before each pass.
+
+    Inference time is metered with a token bucket: a session earns
+    `inference_share` seconds of pool time per second across `pool_workers`
+    workers, up to `burst` seconds' worth. Once it has spent more, its next
+    pass waits until the bucket refills. Audio keeps arriving meanwhile and
+    is coalesced into that pass, so a greedy session gets fewer, larger
+    passes instead of starving the others.
+    """
+
+    def __init__(self, max_seconds=0, max_buffered_bytes=0, inference_share=0.0, pool_workers=1, min_pass_interval=0.0, burst=5.0):
+        """
+        :param max_seconds: Audio a session may send (0 = unlimited).
+        :param max_buffered_bytes: Audio a session may hold: chunks waiting
+            for a pass, its transcription window and its recording
+            (0 = unlimited).
+        :param inference_share: Fraction of the inference pool one session
+            may use (0 = unlimited).
+        :param min_pass_interval: Seconds between the starts of two passes.
+        """
+        self.max_seconds = max_seconds
+        self.max_buffered_bytes = max_buffered_bytes
+        self.rate = inference_share * pool_workers
+        self.capacity = self.rate * burst
+        self.min_pass_interval = min_pass_interval
+        self._tokens = self.capacity
+        self._refilled = time.monotonic()
+        self._last_pass = None
+
+    def check(self, audio_seconds, buffered_bytes):
+        """
+        :return: (quota, message) for the first limit exceeded, or None.
+        """
+        if self.max_seconds and audio_seconds > self.max_seconds:
+            return "session_seconds", f"Sessions are limited to {self.max_seconds:g} s of audio"
+        if self.max_buffered_bytes and buffered_bytes > self.max_buffered_bytes:
+            return "buffered_bytes", f"Sessions may buffer at most {self.max_buffered_bytes // (1024 * 1024)} MB of audio"
+        return None
+
+    def pass_delay(self, now=None):
+        """Seconds the next pass has to wait, 0 if it may start now."""
+        now = time.monotonic() if now is None else now
+        delay = 0.0
+        if self.rate:
+            self._tokens = min(self.capacity, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            if self._tokens < 0:
+                delay = -self._tokens / self.rate
+        if self.min_pass_interval and self._last_pass is not None:
+            delay = max(delay, self._last_pass + self.min_pass_interval - now)
+        return delay
+
+    def record_pass(self, started, seconds):
+        """Charge a pass that started at `started` (monotonic) and took `seconds`."""
+        self._last_pass = started
+        if self.rate:
+            self._tokens -= seconds
@@ -0,0 +1,368 @@
+import os
+import subprocess
+import threading
+import time
+
+import av
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Audio encodings a session can stream in. "webm" (the MediaRecorder default)
+# goes through ffmpeg, which also probes other containers; the rest are
+# decoded in-process.
+ENCODINGS = ("webm", "pcm_s16le", "pcm_f32le", "opus")
+
+# Byte size of one pcm_f32le sample
+_SAMPLE_BYTES = 4
+
+
+class PCMBuffer:
+    """
+    Append-only float32 PCM buffer addressed by absolute sample offsets.
+
+    Offsets keep counting from the start of the session even after old audio
+    has been trimmed, so callers can remember positions across passes.
+    Trimming only advances a head index; held samples are moved to the front
+    of the array when an append would run off its end, so each sample is
+    copied a bounded number of times however often the buffer is trimmed.
+    """
+
+    def __init__(self, initial_capacity=SAMPLE_RATE * 30, on_append=None):
+        """
+        :param on_append: Optional callable given every appended chunk, e.g. to
+            keep a full recording while the buffer itself is trimmed.
+        """
+        self.on_append = on_append
+        self._data = np.zeros(initial_capacity, dtype=np.float32)
+        self._head = 0  # Index of the oldest held sample in self._data
+        self._start = 0  # Absolute offset of self._data[self._head]
+        self._length = 0  # Number of valid samples from self._head
+        self._cond = threading.Condition()
+
+    @property
+    def start(self):
+        """Absolute offset of the oldest sample still held."""
+        return self._start
+
+    @property
+    def end(self):
+        """Absolute offset one past the newest sample."""
+        return self._start + self._length
+
+    def __len__(self):
+        return self._length
+
+    def append(self, samples):
+        """
+        Append samples to the end of the buffer.
+        :param samples: 1-D float32 numpy array.
+        """
+        if len(samples) == 0:
+            return
+        with self._cond:
+            needed = self._length + len(samples)
+            if self._head + needed > len(self._data):
+                held = self._data[self._head:self._head + self._length]
+                if needed <= len(self._data) // 2:
+                    # Mostly trimmed space: compact in place
+                    self._data[:self._length] = held
+                else:
+                    grown = np.zeros(max(needed * 2, len(self._data) * 2), dtype=np.float32)
+                    grown[:self._length] = held
+                    self._data = grown
+                self._head = 0
+            tail = self._head + self._length
+            self._data[tail:tail + len(samples)] = samples
+            self._length = needed
+            if self.on_append:
+                self.on_append(samples)
+            self._cond.notify_all()
+
+    def read(self, start=None, end=None):
+        """
+        Return a copy of the samples between two absolute offsets.
+        :param start: Absolute start offset (default: oldest held sample).
+        :param end: Absolute end offset (default: newest sample).
+        """
+        with self._cond:
+            lo = self._start if start is None else max(start, self._start)
+            hi = self.end if end is None else min(end, self.end)
+            if hi <= lo:
+                return np.zeros(0, dtype=np.float32)
+            offset = self._head - self._start
+            return self._data[lo + offset:hi + offset].copy()
+
+    def trim(self, upto):
+        """
+        Discard all samples before the absolute offset `upto`.
+        """
+        with self._cond:
+            drop = min(upto, self.end) - self._start
+            if drop <= 0:
+                return
+            self._head += drop
+            self._start += drop
+            self._length -= drop
+
+    def wake(self):
+        """Wake up threads blocked in wait_for()."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait_for(self, since, timeout, settle=0.02):
+        """
+        Block until samples beyond `since` arrive and the buffer then stays
+        unchanged for `settle` seconds, or until `timeout` expires.
+        :return: Absolute end offset when the wait finished.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.end <= since:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return self.end
+                self._cond.wait(remaining)
+            while True:
+                seen = self.end
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return seen
+                self._cond.wait(min(settle, remaining))
+                if self.end == seen:
+                    return seen
+
+
+class StreamingDecoder:
+    """
+    Long-lived ffmpeg process that decodes a compressed audio stream fed
+    chunk by chunk into 16 kHz mono float32 PCM.
+
+    Unlike re-running ffmpeg over the whole session file, each fed chunk only
+    costs its own decode time, so latency stays flat for long sessions.
+    """
+
+    def __init__(self, buffer=None, input_format=None, ffmpeg_cmd="ffmpeg"):
+        """
+        :param buffer: PCMBuffer to append decoded audio to (created if None).
+        :param input_format: Optional ffmpeg demuxer name (e.g. 'webm', 'mp3').
+            The container is probed from the stream when not given.
+        :param ffmpeg_cmd: ffmpeg executable.
+        """
+        self.buffer = buffer if buffer is not None else PCMBuffer()
+        self.bytes_fed = 0
+
+        cmd = [
+            ffmpeg_cmd, "-hide_banner", "-loglevel", "error",
+            "-fflags", "nobuffer", "-probesize", "32", "-analyzeduration", "0",
+        ]
+        if input_format:
+            cmd += ["-f", input_format]
+        cmd += [
+            "-i", "pipe:0",
+            "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "1", "-ar", str(SAMPLE_RATE),
+            "-flush_packets", "1",
+            "pipe:1",
+        ]
+
+        self._process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        self._stderr = b""
+        self._reader = threading.Thread(target=self._read_stdout, daemon=True)
+        self._reader.start()
+        self._stderr_reader = threading.Thread(target=self._read_stderr, daemon=True)
+        self._stderr_reader.start()
+
+    def _read_stdout(self):
+        fd = self._process.stdout.fileno()
+        pending = b""
+        while True:
+            data = os.read(fd, 65536)
+            if not data:
+                break
+            if pending:
+                data = pending + data
+            usable = len(data) - len(data) % _SAMPLE_BYTES
+            pending = data[usable:]
+            if usable:
+                self.buffer.append(np.frombuffer(data[:usable], np.float32))
+        # Wake up anyone waiting for output from a process that has exited
+        self.buffer.wake()
+
+    def _read_stderr(self):
+        # Keep only the tail so a chatty decoder cannot grow memory
+        for line in self._process.stderr:
+            self._stderr = (self._stderr + line)[-4096:]
+
+    @property
+    def error(self):
+        """Last stderr output from ffmpeg, if any."""
+        return self._stderr.decode(errors="replace").strip()
+
+    @property
+    def running(self):
+        return self._process.poll() is None
+
+    def feed(self, data):
+        """
+        Send a chunk of the compressed stream to the decoder.
+        """
+        if not data:
+            return
+        try:
+            self._process.stdin.write(data)
+            self._process.stdin.flush()
+        except (BrokenPipeError, ValueError):
+            raise RuntimeError(f"Decoder is not running: {self.error}")
+        self.bytes_fed += len(data)
+
+    def wait_for_output(self, since, timeout=0.5, settle=0.02):
+        """
+        Wait for the audio decoded from recently fed data.
+        :param since: Absolute sample offset seen before feeding.
+        :return: Absolute end offset of the buffer.
+        """
+        if not self.running:
+            return self.buffer.end
+        return self.buffer.wait_for(since, timeout, settle)
+
+    def close(self, timeout=5):
+        """
+        Flush the remaining input through the decoder and stop the process.
+        """
+        if self._process.stdin and not self._process.stdin.closed:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+        try:
+            self._process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        self._reader.join(timeout=timeout)
+        self._stderr_reader.join(timeout=timeout)
+
+
+class RawPCMDecoder:
+    """
+    In-process "decoder" for raw 16 kHz mono PCM sent as little-endian
+    int16 or float32 samples.
+
+    Samples are viewed in place with np.frombuffer; only int16 input needs a
+    conversion. A sample split across two chunks is carried over to the next.
+    Offers the same interface as StreamingDecoder.
+    """
+
+    def __init__(self, buffer=None, sample_format="pcm_s16le"):
+        """
+        :param buffer: PCMBuffer to append decoded audio to (created if None).
+        :param sample_format: 'pcm_s16le' or 'pcm_f32le'.
+        """
+        if sample_format not in ("pcm_s16le", "pcm_f32le"):
+            raise ValueError(f"Unsupported PCM format: {sample_format}")
+        self.buffer = buffer if buffer is not None else PCMBuffer()
+        self.bytes_fed = 0
+        self._dtype = np.dtype("<i2") if sample_format == "pcm_s16le" else np.dtype("<f4")
+        self._pending = b""
+        self.error = ""
+        self.running = True
+
+    def feed(self, data):
+        """
+        Append a chunk of raw samples to the buffer.
+        """
+        if not data:
+            return
+        self.bytes_fed += len(data)
+        if self._pending:
+            data = self._pending + data
+        usable = len(data) - len(data) % self._dtype.itemsize
+        self._pending = bytes(data[usable:])
+        if not usable:
+            return
+        samples = np.frombuffer(data, self._dtype, count=usable // self._dtype.itemsize)
+        if self._dtype.kind == "i":
+            samples = samples.astype(np.float32) / 32768.0
+        self.buffer.append(samples)
+
+    def wait_for_output(self, since, timeout=0.5, settle=0.02):
+        """Decoding happens in feed(), so the output is already there."""
+        return self.buffer.end
+
+    def close(self, timeout=5):
+        self._pending = b""
+
+
+class OpusPacketDecoder:
+    """
+    In-process decoder for bare Opus packets (no Ogg/WebM container), one
+    packet per fed chunk, as produced by WebCodecs' AudioEncoder or libopus.
+
+    Uses libopus through PyAV, which faster-whisper already depends on, and
+    resamples to 16 kHz mono float32. Offers the same interface as
+    StreamingDecoder.
+    """
+
+    def __init__(self, buffer=None, sample_rate=48000, channels=1):
+        """
+        :param buffer: PCMBuffer to append decoded audio to (created if None).
+        :param sample_rate: Rate the packets were encoded at.
+        :param channels: Channels the packets were encoded with.
+        """
+        self.buffer = buffer if buffer is not None else PCMBuffer()
+        self.bytes_fed = 0
+        self.error = ""
+        self.running = True
+        self._codec = av.CodecContext.create("opus", "r")
+        self._codec.sample_rate = sample_rate
+        self._codec.layout = "mono" if channels == 1 else "stereo"
+        self._resampler = av.AudioResampler(format="flt", layout="mono", rate=SAMPLE_RATE)
+
+    def feed(self, data):
+        """
+        Decode one Opus packet into the buffer.
+        """
+        if not data:
+            return
+        self.bytes_fed += len(data)
+        try:
+            frames = self._codec.decode(av.Packet(data))
+        except av.error.FFmpegError as e:
+            # A corrupt packet only loses its own 20 ms or so
+            self.error = str(e)
+            return
+        for frame in frames:
+            for resampled in self._resampler.resample(frame):
+                self.buffer.append(resampled.to_ndarray().reshape(-1))
+
+    def wait_for_output(self, since, timeout=0.5, settle=0.02):
+        """Decoding happens in feed(), so the output is already there."""
+        return self.buffer.end
+
+    def close(self, timeout=5):
+        for resampled in self._resampler.resample(None):
+            self.buffer.append(resampled.to_ndarray().reshape(-1))
+
+
+def create_decoder(encoding="webm", buffer=None, sample_rate=None, channels=1):
+    """
+    Return the decoder for one of ENCODINGS.
+    :param sample_rate: Rate of the incoming audio, if the client declared it.
+        Raw PCM must already be 16 kHz mono; Opus defaults to 48 kHz.
+    :param channels: Channels of the incoming Opus stream.
+    :raises ValueError: For unknown encodings or unsupported PCM layouts.
+    """
+    if encoding == "webm":
+        return StreamingDecoder(buffer)
+    if encoding in ("pcm_s16le", "pcm_f32le"):
+        if (sample_rate or SAMPLE_RATE) != SAMPLE_RATE or channels != 1:
+            raise ValueError(f"Raw PCM must be {SAMPLE_RATE} Hz mono")
+        return RawPCMDecoder(buffer, encoding)
+    if encoding == "opus":
+        return OpusPacketDecoder(buffer, sample_rate=sample_rate or 48000, channels=channels)
+    raise ValueError(f"Unknown encoding '{encoding}'. Supported: {', '.join(ENCODINGS)}")
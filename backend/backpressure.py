@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+
+class CoalescedAudio:
+    """One or more received chunks, handed to a single transcription pass."""
+
+    def __init__(self, parts, first_arrival):
+        self.parts = parts
+        self.first_arrival = first_arrival
+
+    @property
+    def data(self):
+        """The chunks joined into one byte string."""
+        return b"".join(self.parts)
+
+    @property
+    def chunks(self):
+        return len(self.parts)
+
+    @property
+    def lag(self):
+        """Seconds since the oldest chunk in this pass arrived."""
+        return time.monotonic() - self.first_arrival
+
+
+class ChunkCoalescer:
+    """
+    Per-session buffer between the socket reader and the transcription loop.
+
+    Chunks that arrive while a pass is in flight are merged into the next
+    pass instead of each getting their own, so a client that outpaces
+    inference costs one pass per inference cycle rather than an ever-growing
+    queue. Once `max_chunks` are pending the reader waits, which stops
+    reading the socket and pushes back on the client.
+    """
+
+    def __init__(self, max_chunks=8):
+        self.max_chunks = max_chunks
+        self._chunks = []
+        self._first_arrival = None
+        self._closed = False
+        self._has_audio = asyncio.Event()
+        self._has_room = asyncio.Event()
+        self._has_room.set()
+
+    def __len__(self):
+        return len(self._chunks)
+
+    @property
+    def nbytes(self):
+        """Bytes of audio pending."""
+        return sum(len(chunk) for chunk in self._chunks)
+
+    async def put(self, data):
+        """Add a received chunk, waiting while the buffer is full."""
+        await self._has_room.wait()
+        if self._first_arrival is None:
+            self._first_arrival = time.monotonic()
+        self._chunks.append(data)
+        self._has_audio.set()
+        if len(self._chunks) >= self.max_chunks:
+            self._has_room.clear()
+
+    async def take(self):
+        """
+        Wait for pending audio and take all of it.
+        :return: CoalescedAudio, or None once the coalescer is closed.
+        """
+        await self._has_audio.wait()
+        if self._closed:
+            return None
+        audio = CoalescedAudio(self._chunks, self._first_arrival)
+        self._chunks = []
+        self._first_arrival = None
+        self._has_audio.clear()
+        self._has_room.set()
+        return audio
+
+    def close(self):
+        """
+        Stop handing out audio and wake the transcription loop so it can exit.
+        :return: The chunks that were still pending, e.g. to finish a recording.
+        """
+        self._closed = True
+        remaining, self._chunks = self._chunks, []
+        self._has_audio.set()
+        self._has_room.set()
+        return remaining
@@ -0,0 +1,151 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from faster_whisper import decode_audio
+
+from audio_stream import SAMPLE_RATE
+from transcript_cache import TranscriptCache
+from whisper_service import WhisperService
+
+AUDIO_EXTENSIONS = {".webm", ".opus", ".ogg", ".mp3", ".wav", ".flac", ".m4a", ".mp4", ".mkv", ".aac"}
+
+# Model held by each worker process, loaded once by _init_worker
+_service = None
+_language = "en"
+
+
+def find_audio_files(source):
+    """
+    List the audio files to transcribe.
+    :param source: A directory (searched recursively for audio files) or a
+        manifest file with one path per line. Relative manifest paths are
+        resolved against the manifest's directory; blank lines and lines
+        starting with '#' are ignored.
+    :return: Sorted list of paths.
+    """
+    if os.path.isdir(source):
+        files = []
+        for root, _, names in os.walk(source):
+            files += [os.path.join(root, name) for name in names
+                      if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS]
+        return sorted(files)
+
+    base = os.path.dirname(os.path.abspath(source))
+    files = []
+    with open(source) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                files.append(line if os.path.isabs(line) else os.path.join(base, line))
+    return files
+
+
+def completed_files(output_path):
+    """
+    Files that already have a successful result in a JSONL output file.
+    Failed files are not included, so they are retried on the next run.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partial line from an interrupted run
+            if "error" not in record:
+                done.add(record["file"])
+    return done
+
+
+def _init_worker(model_size, device, compute_type, cpu_threads, language, cache_path, cache_max_bytes):
+    global _service, _language
+    cache = TranscriptCache(cache_path, cache_max_bytes) if cache_path else None
+    _service = WhisperService(model_size=model_size, device=device, compute_type=compute_type,
+                              cpu_threads=cpu_threads, cache=cache)
+    _language = language
+
+
+def _transcribe_file(path):
+    start = time.perf_counter()
+    try:
+        audio = decode_audio(path, sampling_rate=SAMPLE_RATE)
+        decoded = time.perf_counter()
+        segments = _service.transcribe_segments(audio, language=_language)
+    except Exception as e:
+        return {"file": path, "error": str(e)}
+    end = time.perf_counter()
+
+    duration = len(audio) / SAMPLE_RATE
+    return {
+        "file": path,
+        "text": "".join(segment.text for segment in segments).strip(),
+        "segments": [
+            {"start": round(segment.start, 3), "end": round(segment.end, 3), "text": segment.text.strip()}
+            for segment in segments
+        ],
+        "duration": round(duration, 3),
+        "timings": {
+            "decode_s": round(decoded - start, 3),
+            "transcribe_s": round(end - decoded, 3),
+            "total_s": round(end - start, 3),
+        },
+        "rtf": round((end - start) / duration, 4) if duration else None,
+        "pid": os.getpid(),
+    }
+
+
+def run_batch(files, output_path, workers=1, model_size="base", device="cpu", compute_type="int8",
+              cpu_threads=0, language="en", cache_path=None, cache_max_bytes=512 * 1024 * 1024):
+    """
+    Transcribe files on a pool of worker processes, each holding one model,
+    appending one JSON line per file to `output_path` as soon as it finishes.
+    Files already transcribed in `output_path` are skipped, so an interrupted
+    run picks up where it stopped.
+
+    :param workers: Number of worker processes (and model copies).
+    :param cpu_threads: CTranslate2 threads per worker (0 shares the cores evenly).
+    :param cache_path: TranscriptCache file shared by the workers (None disables caching).
+    :return: Summary dict with counts, audio seconds, wall time and overall RTF.
+    """
+    done = completed_files(output_path)
+    todo = [path for path in files if path not in done]
+    summary = {"total": len(files), "skipped": len(files) - len(todo), "transcribed": 0, "failed": 0, "audio_s": 0.0}
+    start = time.perf_counter()
+
+    if todo:
+        workers = max(1, min(workers, len(todo)))
+        if not cpu_threads:
+            cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+        print(f"Transcribing {len(todo)} files ({summary['skipped']} already done) "
+              f"on {workers} workers x {cpu_threads} threads with model '{model_size}'")
+
+        # Spawned rather than forked: each worker starts clean and loads its own model
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_size, device, compute_type, cpu_threads, language, cache_path, cache_max_bytes),
+        ) as pool, open(output_path, "a") as output:
+            futures = [pool.submit(_transcribe_file, path) for path in todo]
+            for future in as_completed(futures):
+                record = future.result()
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+                if "error" in record:
+                    summary["failed"] += 1
+                    print(f"Failed: {record['file']}: {record['error']}")
+                else:
+                    summary["transcribed"] += 1
+                    summary["audio_s"] += record["duration"]
+                    print(f"[{summary['transcribed'] + summary['failed']}/{len(todo)}] "
+                          f"{record['file']} ({record['duration']:.1f}s audio, RTF {record['rtf']})")
+
+    summary["wall_s"] = round(time.perf_counter() - start, 3)
+    summary["audio_s"] = round(summary["audio_s"], 3)
+    summary["rtf"] = round(summary["wall_s"] / summary["audio_s"], 4) if summary["audio_s"] else None
+    return summary
@@ -0,0 +1,188 @@
+import bisect
+import dataclasses
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from faster_whisper import BatchedInferencePipeline
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+from audio_stream import SAMPLE_RATE
+
+
+class _Request:
+    def __init__(self, audio, language, word_timestamps):
+        self.audio = audio
+        self.language = language
+        self.word_timestamps = word_timestamps
+        self.future = Future()
+        self.submitted = time.monotonic()
+
+
+class MicroBatcher:
+    """
+    Cross-session micro-batching in front of a shared Whisper model.
+
+    Requests from concurrent sessions are collected for up to `max_wait`
+    seconds (or until `max_batch` are pending) and transcribed in one
+    batched encoder/decoder pass. The windows are concatenated and their
+    speech regions passed to faster-whisper's BatchedInferencePipeline as
+    clip timestamps; the resulting segments are shifted back and fanned out
+    to the session that submitted them.
+
+    Exposes the same transcribe_segments() as WhisperService, so it can back
+    a StreamingSession directly. Calls block the calling thread until the
+    batch containing them has run.
+    """
+
+    def __init__(self, service, max_batch=8, max_wait=0.03, beam_size=5, max_batch_size=16):
+        """
+        :param service: WhisperService whose model is shared by all batches.
+        :param max_batch: Maximum requests per batched pass.
+        :param max_wait: Seconds to wait for more requests after the first one.
+        :param beam_size: Beam size for the batched decoder.
+        :param max_batch_size: Maximum speech clips decoded together; a pass
+            with more runs them in several decoder batches of this size.
+        """
+        self.service = service
+        self.max_batch = max_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.beam_size = beam_size
+        self.pipeline = BatchedInferencePipeline(service.model)
+        self.vad_options = VadOptions(min_silence_duration_ms=500, max_speech_duration_s=30)
+
+        self.batches = 0
+        self.requests = 0
+
+        self._closed = False
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def transcribe_segments(self, audio, language="en", initial_prompt=None, word_timestamps=False):
+        """
+        Queue audio for the next batch and wait for its segments.
+        A batched pass has no per-window prompt, so requests with an
+        `initial_prompt` go straight to the underlying service, as do all
+        requests after close().
+        """
+        request = _Request(audio, language, word_timestamps)
+        with self._lock:
+            batched = not self._closed and not initial_prompt
+            if batched:
+                self._queue.put(request)
+        if batched:
+            return request.future.result()
+        return self.service.transcribe_segments(
+            audio,
+            language=language,
+            initial_prompt=initial_prompt,
+            word_timestamps=word_timestamps,
+        )
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+        }
+
+    def close(self):
+        """Finish the requests already queued and stop the batching thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = first.submitted + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+
+            # One tokenizer per pass, so split by language (and word alignment)
+            groups = {}
+            for request in batch:
+                groups.setdefault((request.language, request.word_timestamps), []).append(request)
+            for (language, word_timestamps), requests in groups.items():
+                try:
+                    results = self._transcribe_batch([r.audio for r in requests], language, word_timestamps)
+                except Exception as e:
+                    for request in requests:
+                        request.future.set_exception(e)
+                    continue
+                for request, segments in zip(requests, results):
+                    request.future.set_result(segments)
+
+            self.batches += 1
+            self.requests += len(batch)
+
+    def _transcribe_batch(self, audios, language, word_timestamps=False):
+        """
+        Transcribe several audio windows in one batched pass.
+        :return: One list of segments per window, with window-relative times.
+        """
+        clips = []
+        offsets = []
+        offset = 0
+        for audio in audios:
+            offsets.append(offset)
+            for speech in get_speech_timestamps(audio, self.vad_options):
+                clips.append({
+                    "start": (offset + speech["start"]) / SAMPLE_RATE,
+                    "end": (offset + speech["end"]) / SAMPLE_RATE,
+                })
+            offset += len(audio)
+
+        results = [[] for _ in audios]
+        if not clips:
+            return results
+
+        segments, _ = self.pipeline.transcribe(
+            np.concatenate(audios),
+            language=language,
+            beam_size=self.beam_size,
+            clip_timestamps=clips,
+            batch_size=min(len(clips), self.max_batch_size),
+            without_timestamps=False,
+            word_timestamps=word_timestamps,
+        )
+        for segment in segments:
+            # Timestamps are rounded, so locate the window by the segment midpoint
+            midpoint = (segment.start + segment.end) / 2
+            index = bisect.bisect_right(offsets, int(midpoint * SAMPLE_RATE)) - 1
+            shift = offsets[index] / SAMPLE_RATE
+            words = segment.words
+            if words:
+                words = [dataclasses.replace(w, start=w.start - shift, end=w.end - shift) for w in words]
+            results[index].append(dataclasses.replace(
+                segment,
+                start=segment.start - shift,
+                end=segment.end - shift,
+                words=words,
+            ))
+        return results
@@ -0,0 +1,107 @@
+"""
+Throughput vs latency of cross-session micro-batching.
+
+Simulates N concurrent streaming sessions that each repeatedly submit a
+window of speech (taken from the bundled JFK sample) for transcription.
+Every configuration runs the same workload:
+
+- unbatched: each session calls WhisperService.transcribe_segments from its
+  own thread (the shared model is created with num_workers=N)
+- batched:   sessions submit through MicroBatcher with the given max batch
+  size and max wait
+
+and reports aggregate throughput (audio seconds transcribed per wall second)
+and per-request latency percentiles.
+
+Usage:
+    python benchmarks/bench_batching.py --sessions 8 --batch-sizes 2,4,8 --max-wait-ms 20,50
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from faster_whisper import decode_audio  # noqa: E402
+
+from audio_stream import SAMPLE_RATE  # noqa: E402
+from batcher import MicroBatcher  # noqa: E402
+from whisper_service import WhisperService  # noqa: E402
+
+DEFAULT_AUDIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_stt_sample.wav")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_workload(transcriber, window, sessions, requests_per_session):
+    latencies = []
+    lock = threading.Lock()
+
+    def session():
+        for _ in range(requests_per_session):
+            start = time.perf_counter()
+            transcriber.transcribe_segments(window)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    audio_seconds = len(window) / SAMPLE_RATE * sessions * requests_per_session
+    return audio_seconds / wall, percentile(latencies, 50), percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching throughput benchmark")
+    parser.add_argument("--model", "-m", default="base", help="Whisper model size (default: base)")
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent sessions (default: 8)")
+    parser.add_argument("--requests", type=int, default=5, help="Requests per session (default: 5)")
+    parser.add_argument("--window", type=float, default=5.0, help="Seconds of audio per request (default: 5)")
+    parser.add_argument("--batch-sizes", default="2,4,8", help="Comma-separated max batch sizes")
+    parser.add_argument("--max-wait-ms", default="20,50", help="Comma-separated max wait values")
+    parser.add_argument("--cpu-threads", type=int, default=0, help="CTranslate2 threads (0 = library default)")
+    parser.add_argument("--audio", default=DEFAULT_AUDIO, help="Speech sample to cut windows from")
+    args = parser.parse_args()
+
+    audio = decode_audio(args.audio, sampling_rate=SAMPLE_RATE)
+    window = audio[:int(args.window * SAMPLE_RATE)]
+
+    service = WhisperService(
+        model_size=args.model,
+        device="cpu",
+        compute_type="int8",
+        cpu_threads=args.cpu_threads,
+        num_workers=args.sessions,
+    )
+    # Warm up so model initialization does not count against the first run
+    service.transcribe_segments(window)
+
+    print(f"\n{'mode':<24} {'audio s / s':>12} {'p50 ms':>8} {'p99 ms':>8}")
+    throughput, p50, p99 = run_workload(service, window, args.sessions, args.requests)
+    print(f"{'unbatched':<24} {throughput:>12.1f} {p50 * 1000:>8.0f} {p99 * 1000:>8.0f}")
+
+    for max_batch in [int(v) for v in args.batch_sizes.split(",")]:
+        for max_wait_ms in [int(v) for v in args.max_wait_ms.split(",")]:
+            batcher = MicroBatcher(service, max_batch=max_batch, max_wait=max_wait_ms / 1000)
+            try:
+                throughput, p50, p99 = run_workload(batcher, window, args.sessions, args.requests)
+            finally:
+                batcher.close()
+            mode = f"batch={max_batch} wait={max_wait_ms}ms"
+            print(f"{mode:<24} {throughput:>12.1f} {p50 * 1000:>8.0f} {p99 * 1000:>8.0f}"
+                  f"   (mean batch {batcher.stats()['mean_batch_size']:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Per-chunk decode latency of the streaming session decoder over a long session.
+
+Synthesizes a WebM/Opus recording (the format MediaRecorder sends), splits it
+into ~1 second byte chunks like the frontend does and feeds them through
+StreamingDecoder, reporting decode latency per minute of session time. For
+comparison, the legacy approach (re-decoding the whole session file with a
+fresh ffmpeg on every chunk) is sampled at the same points.
+
+Usage:
+    python benchmarks/bench_decode.py --minutes 30
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from audio_stream import SAMPLE_RATE, StreamingDecoder  # noqa: E402
+
+
+def synthesize_session(path, seconds):
+    """Encode a synthetic speech-like signal to WebM/Opus."""
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.2:duration={seconds}",
+            "-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds}",
+            "-filter_complex", "amix=inputs=2",
+            "-ar", "48000", "-ac", "1", "-c:a", "libopus", "-b:a", "32k",
+            path,
+        ],
+        check=True,
+    )
+
+
+def legacy_decode(path):
+    """Decode the whole file from byte zero, as the old server loop did."""
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-i", path,
+            "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-",
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming decode latency benchmark")
+    parser.add_argument("--minutes", type=float, default=30, help="Synthetic session length (default: 30)")
+    parser.add_argument("--no-legacy", action="store_true", help="Skip sampling the full re-decode approach")
+    args = parser.parse_args()
+
+    seconds = int(args.minutes * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "session.webm")
+        print(f"Synthesizing {seconds}s WebM/Opus session...")
+        synthesize_session(source, seconds)
+        with open(source, "rb") as f:
+            data = f.read()
+
+        chunk_size = max(1, len(data) // seconds)
+        partial = os.path.join(tmp, "partial.webm")
+        decoder = StreamingDecoder()
+        latencies = []
+        rows = []
+        try:
+            with open(partial, "wb") as out:
+                for i in range(seconds):
+                    chunk = data[i * chunk_size:(i + 1) * chunk_size if i < seconds - 1 else None]
+                    out.write(chunk)
+
+                    start = time.perf_counter()
+                    since = decoder.buffer.end
+                    decoder.feed(chunk)
+                    decoder.wait_for_output(since, timeout=2.0, settle=0.005)
+                    latencies.append(time.perf_counter() - start)
+                    # Keep memory flat; the benchmark only measures decode cost
+                    decoder.buffer.trim(decoder.buffer.end)
+
+                    if (i + 1) % 60 == 0 or i == 0:
+                        legacy_ms = None
+                        if not args.no_legacy:
+                            out.flush()
+                            t = time.perf_counter()
+                            legacy_decode(partial)
+                            legacy_ms = (time.perf_counter() - t) * 1000
+                        window = latencies[-60:]
+                        rows.append((i + 1, statistics.median(window) * 1000, max(window) * 1000, legacy_ms))
+        finally:
+            decoder.close()
+
+    print(f"\n{'session s':>10} {'stream p50 ms':>14} {'stream max ms':>14} {'full re-decode ms':>18}")
+    for elapsed, p50, worst, legacy_ms in rows:
+        legacy = f"{legacy_ms:18.1f}" if legacy_ms is not None else f"{'-':>18}"
+        print(f"{elapsed:>10} {p50:>14.1f} {worst:>14.1f} {legacy}")
+    print(f"\nDecoded {decoder.buffer.end / SAMPLE_RATE:.1f}s of audio; "
+          f"overall per-chunk p50 {statistics.median(latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
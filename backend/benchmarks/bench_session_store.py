@@ -0,0 +1,189 @@
+"""
+Per-session memory use and syscall count of the recording store.
+
+Simulates N concurrent sessions (threads), each receiving a compressed
+upload in 250 ms chunks and producing decoded PCM in 100 ms chunks, and
+stores both streams with:
+
+- reopen:   open(path, "ab") / write / close per chunk (the old save path)
+- tempfile: one open temp file per stream, written through Python's buffer
+- memory:   SpillBuffer (in memory, mmap spill past --spill-mb), as
+            SessionRecorder does now
+
+Each strategy runs in a fresh process. Syscalls come from the read/write
+counters in /proc/self/io and an audit hook counting file opens; memory is
+the RSS growth per session, split into anonymous memory and mapped file
+pages (spilled data, which the kernel can write back and drop), plus the
+peak. Linux only.
+
+Usage:
+    python benchmarks/bench_session_store.py --sessions 1,8,32 --seconds 600
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+
+from audio_stream import SAMPLE_RATE  # noqa: E402
+from session_store import SpillBuffer  # noqa: E402
+
+STRATEGIES = ("reopen", "tempfile", "memory")
+
+# WebM/Opus at 32 kbit/s in MediaRecorder-sized chunks
+COMPRESSED_CHUNK = os.urandom(32000 // 8 // 4)
+CHUNKS_PER_SECOND = 4
+# Decoded 16 kHz int16 PCM as the decoder thread hands it over
+PCM_CHUNK = (np.sin(np.arange(SAMPLE_RATE // 10)) * 8000).astype("<i2")
+
+
+class ReopenStore:
+    def __init__(self, directory):
+        fd, self.path = tempfile.mkstemp(dir=directory)
+        os.close(fd)
+
+    def write(self, data):
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+    def close(self):
+        os.remove(self.path)
+
+
+class TempFileStore:
+    def __init__(self, directory):
+        fd, self.path = tempfile.mkstemp(dir=directory)
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, data):
+        self._file.write(data)
+
+    def close(self):
+        self._file.close()
+        os.remove(self.path)
+
+
+def proc_io():
+    with open("/proc/self/io") as f:
+        return {key: int(value) for key, value in (line.split(": ") for line in f)}
+
+
+def proc_status(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def run_sessions(strategy, sessions, seconds, spill_bytes):
+    """Worker process body: returns the measurements as a dict."""
+    opens = [0]
+    sys.addaudithook(lambda event, _: event == "open" and opens.__setitem__(0, opens[0] + 1))
+    directory = tempfile.mkdtemp(prefix="bench-session-")
+
+    def make_store():
+        if strategy == "reopen":
+            return ReopenStore(directory)
+        if strategy == "tempfile":
+            return TempFileStore(directory)
+        return SpillBuffer(spill_bytes)
+
+    stores = []
+    start_barrier = threading.Barrier(sessions)
+
+    def session():
+        compressed, pcm = make_store(), make_store()
+        stores.append((compressed, pcm))
+        start_barrier.wait()
+        for _ in range(seconds):
+            for _ in range(CHUNKS_PER_SECOND):
+                compressed.write(COMPRESSED_CHUNK)
+            for _ in range(10):
+                pcm.write(PCM_CHUNK)
+
+    # Reset the peak RSS counter so it covers the sessions only
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+    rss_before = proc_status("VmRSS")
+    anon_before = proc_status("RssAnon")
+    io_before = proc_io()
+    opens_before = opens[0]
+    started = time.perf_counter()
+
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - started
+    io_after = proc_io()
+    result = {
+        "strategy": strategy,
+        "sessions": sessions,
+        "elapsed_s": elapsed,
+        "read_syscalls": io_after["syscr"] - io_before["syscr"],
+        "write_syscalls": io_after["syscw"] - io_before["syscw"],
+        "opens": opens[0] - opens_before,
+        "written_bytes": io_after["wchar"] - io_before["wchar"],
+        "anon_bytes": proc_status("RssAnon") - anon_before,
+        "mapped_bytes": proc_status("VmRSS") - rss_before - (proc_status("RssAnon") - anon_before),
+        "peak_rss_bytes": proc_status("VmHWM") - rss_before,
+        "spilled": sum(isinstance(s, SpillBuffer) and s.spilled for pair in stores for s in pair),
+    }
+    for pair in stores:
+        for store in pair:
+            store.close()
+    os.rmdir(directory)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session store memory/syscall benchmark")
+    parser.add_argument("--sessions", default="1,8,32", help="Comma-separated concurrent session counts")
+    parser.add_argument("--seconds", type=int, default=600, help="Audio per session in seconds (default: 600)")
+    parser.add_argument("--spill-mb", type=int, default=32, help="SpillBuffer spill threshold (default: 32)")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES), help="Comma-separated strategies to run")
+    parser.add_argument("--worker", choices=STRATEGIES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_sessions(args.worker, int(args.sessions), args.seconds, args.spill_mb * 1024 * 1024)))
+        return
+
+    print(f"{args.seconds}s per session; upload {len(COMPRESSED_CHUNK) * CHUNKS_PER_SECOND} B/s, "
+          f"PCM {PCM_CHUNK.nbytes * 10} B/s; spill at {args.spill_mb} MB")
+    print(f"\n{'strategy':>9} {'sessions':>8} {'syscalls/s':>11} {'opens/s':>8} {'disk MB/s':>10} "
+          f"{'anon MB':>8} {'mapped MB':>10} {'peak MB':>8} {'spilled':>8} {'time s':>7}")
+    for sessions in [int(v) for v in args.sessions.split(",")]:
+        for strategy in args.strategies.split(","):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", strategy,
+                 "--sessions", str(sessions), "--seconds", str(args.seconds), "--spill-mb", str(args.spill_mb)],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            r = json.loads(out.stdout)
+            # Per session per second of audio
+            per = sessions * args.seconds
+            syscalls = (r["read_syscalls"] + r["write_syscalls"]) / per
+            print(f"{strategy:>9} {sessions:>8} {syscalls:>11.2f} {r['opens'] / per:>8.2f} "
+                  f"{r['written_bytes'] / per / 1e6:>10.3f} {r['anon_bytes'] / sessions / 1e6:>8.1f} "
+                  f"{r['mapped_bytes'] / sessions / 1e6:>10.1f} "
+                  f"{r['peak_rss_bytes'] / sessions / 1e6:>8.1f} {r['spilled']:>8} {r['elapsed_s']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
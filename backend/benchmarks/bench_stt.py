@@ -0,0 +1,388 @@
+"""
+Reproducible speech-to-text benchmark: latency, throughput and accuracy.
+
+Replays a fixed corpus through both transcription paths:
+
+- offline: WhisperService over the whole recording, as `cli.py stt` does
+- stream:  the server running in-process (uvicorn on a loopback port) and a
+           /ws/transcribe client sending 16 kHz PCM in --chunk-ms chunks,
+           paced at each of --speeds times real time (1 = a live speaker)
+
+The corpus is the bundled JFK sample (test_stt_sample.wav), the CLI sample
+(../cli_test.mp3) and a synthesized long session: the JFK sample repeated
+with pauses for --long-minutes. Each run reports:
+
+- first_partial_s: first chunk sent (offline: start of transcription) until
+  the first transcribed text arrives
+- finalization_s:  last speech chunk sent (offline: start of transcription)
+  until the whole transcript is final
+- rtf:             inference seconds per second of audio
+- peak_rss_mb:     peak resident memory of the run, model included
+- wer:             word error rate against the reference, where one is known
+
+Every run is a fresh process, so peak memory and warm caches do not carry
+over between runs. Results are written as JSON with stable keys and
+rounding; --compare prints the change against an earlier results file.
+
+Usage:
+    python benchmarks/bench_stt.py --model base --speeds 1,4 --output stt-base.json
+    python benchmarks/bench_stt.py --model base --items jfk,long --compare stt-base.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+
+from audio_stream import SAMPLE_RATE  # noqa: E402
+from settings import settings  # noqa: E402
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+JFK_REFERENCE = ("And so my fellow Americans, ask not what your country can do for you, "
+                 "ask what you can do for your country.")
+
+# name -> (audio file, reference transcript or None)
+CORPUS = {
+    "jfk": (os.path.join(BACKEND_DIR, "test_stt_sample.wav"), JFK_REFERENCE),
+    "cli": (os.path.join(BACKEND_DIR, "..", "cli_test.mp3"), None),
+}
+LONG_PAUSE_SECONDS = 1.5
+
+MODES = ("offline", "stream")
+METRICS = ("first_partial_s", "finalization_s", "rtf", "peak_rss_mb", "wer")
+
+
+def load_item(name, long_minutes):
+    """:return: (float32 16 kHz samples, reference transcript or None)."""
+    from faster_whisper import decode_audio
+
+    if name != "long":
+        path, reference = CORPUS[name]
+        return decode_audio(path, sampling_rate=SAMPLE_RATE), reference
+
+    path, reference = CORPUS["jfk"]
+    sample = decode_audio(path, sampling_rate=SAMPLE_RATE)
+    pause = np.zeros(int(LONG_PAUSE_SECONDS * SAMPLE_RATE), dtype=np.float32)
+    repeats = max(1, int(round(long_minutes * 60 / (len(sample) / SAMPLE_RATE + LONG_PAUSE_SECONDS))))
+    # No pause after the last repeat: the stream's trailing silence is what finalizes it
+    return np.concatenate(([sample, pause] * repeats)[:-1]), " ".join([reference] * repeats)
+
+
+def normalize(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance divided by the number of reference words."""
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, 1):
+        current = [i]
+        for j, other in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other)))
+        previous = current
+    return previous[-1] / max(1, len(ref))
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_offline(audio, model, language):
+    from whisper_service import WhisperService
+
+    started = time.perf_counter()
+    service = WhisperService(model_size=model, cpu_threads=settings.inference_cpu_threads)
+    service.warm_up()
+    load_s = time.perf_counter() - started
+
+    # Iterated directly so the first segment can be timed
+    start = time.perf_counter()
+    segments, _ = service.model.transcribe(
+        audio,
+        language=language,
+        beam_size=service.beam_size,
+        vad_filter=True,
+        vad_parameters=service.vad_parameters,
+    )
+    first = None
+    texts = []
+    for segment in segments:
+        if first is None:
+            first = time.perf_counter() - start
+        texts.append(segment.text)
+    elapsed = time.perf_counter() - start
+    return {
+        "load_s": load_s,
+        "first_partial_s": first,
+        "finalization_s": elapsed,
+        "rtf": elapsed / (len(audio) / SAMPLE_RATE),
+        "hypothesis": "".join(texts).strip(),
+    }
+
+
+def apply_message(transcript, message):
+    """Apply a final/partial diff to [final segments, partial segments]."""
+    if message["type"] == "final":
+        transcript[0][message["index"]:message["index"] + len(message["segments"])] = message["segments"]
+    elif message["type"] == "partial":
+        transcript[1] = message["segments"]
+
+
+def run_stream(audio, model, speed, chunk_ms, tail_ms, timeout):
+    # The server reads its settings on import
+    os.environ["DEFAULT_MODEL"] = model
+    os.environ["METRICS_ENABLED"] = "1"
+    import uvicorn
+    from websockets.sync.client import connect
+
+    import server
+
+    started = time.perf_counter()
+    httpd = uvicorn.Server(uvicorn.Config(server.app, host="127.0.0.1", port=0, log_level="warning"))
+    serving = threading.Thread(target=httpd.run, name="bench-server", daemon=True)
+    serving.start()
+    deadline = started + timeout
+    # As a gateway (WORKER_PROCESSES / WORKER_SOCKETS), ready once a worker is
+    def ready():
+        if server.worker_pool is not None:
+            return server.worker_pool.ready
+        return server.model_manager.is_ready(model)
+
+    while not (httpd.started and ready()):
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f"Model '{model}' did not load within {timeout}s")
+        time.sleep(0.05)
+    load_s = time.perf_counter() - started
+    port = httpd.servers[0].sockets[0].getsockname()[1]
+
+    samples = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    chunk = SAMPLE_RATE * chunk_ms // 1000
+    speech = [samples[i:i + chunk].tobytes() for i in range(0, len(samples), chunk)]
+    # Trailing silence lets the VAD end the last utterance, which finalizes it
+    silence = [bytes(chunk * 2)] * max(1, tail_ms // chunk_ms)
+    inference_before = server.pipeline_metrics.stage_seconds.totals(("inference",))[1]
+    passes_before = server.pass_counters["executed"]
+
+    events = []  # (arrival time, message)
+    url = f"ws://127.0.0.1:{port}/ws/transcribe?model={model}&encoding=pcm_s16le&protocol=json"
+    with connect(url, max_size=None) as websocket:
+        def receive():
+            with contextlib.suppress(Exception):
+                for raw in websocket:
+                    events.append((time.perf_counter(), json.loads(raw)))
+
+        receiver = threading.Thread(target=receive, daemon=True)
+        receiver.start()
+
+        # Paced against the audio clock, so slow sends do not accumulate drift
+        start = time.perf_counter()
+        sent_seconds = 0.0
+        speech_end = start
+        for i, data in enumerate(speech + silence):
+            delay = start + sent_seconds / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            websocket.send(data)
+            sent_seconds += len(data) / 2 / SAMPLE_RATE
+            if i == len(speech) - 1:
+                speech_end = time.perf_counter()
+
+        # Done once nothing is tentative and the server has gone quiet
+        transcript = [[], []]
+        applied = 0
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            for _, message in events[applied:]:
+                if message["type"] == "error":
+                    raise RuntimeError(message["message"])
+                apply_message(transcript, message)
+            applied = len(events)
+            quiet = events and time.perf_counter() - events[-1][0] > 1.0
+            if transcript[0] and not transcript[1] and quiet:
+                break
+            time.sleep(0.05)
+
+    # Shut down through the lifespan, which also stops any worker processes
+    httpd.should_exit = True
+    serving.join(timeout)
+    first_text = next((t for t, m in events if m["type"] in ("final", "partial") and m["segments"]), None)
+    finals = [t for t, m in events if m["type"] == "final"]
+    finalized = bool(finals) and not transcript[1]
+    audio_seconds = len(audio) / SAMPLE_RATE
+    inference_seconds = server.pipeline_metrics.stage_seconds.totals(("inference",))[1] - inference_before
+    return {
+        "load_s": load_s,
+        "first_partial_s": first_text - start if first_text is not None else None,
+        "finalization_s": max(0.0, finals[-1] - speech_end) if finalized else None,
+        "rtf": inference_seconds / audio_seconds,
+        "passes": server.pass_counters["executed"] - passes_before,
+        "lag_messages": sum(m["type"] == "lag" for _, m in events),
+        "hypothesis": " ".join(s["text"] for s in transcript[0] + transcript[1]),
+    }
+
+
+def run_worker(spec):
+    """Body of one run's process: returns its result dict."""
+    audio, reference = load_item(spec["item"], spec["long_minutes"])
+    # Server and model logging go to stderr; stdout carries the result
+    with contextlib.redirect_stdout(sys.stderr):
+        if spec["mode"] == "offline":
+            result = run_offline(audio, spec["model"], spec["language"])
+        else:
+            # Streaming sessions are always English
+            result = run_stream(audio, spec["model"], spec["speed"],
+                                spec["chunk_ms"], spec["tail_ms"], spec["timeout"])
+    result.update(
+        item=spec["item"],
+        mode=spec["mode"],
+        speed=spec["speed"],
+        audio_s=len(audio) / SAMPLE_RATE,
+        peak_rss_mb=peak_rss_mb(),
+        wer=word_error_rate(reference, result["hypothesis"]) if reference else None,
+    )
+    return {key: round(value, 3) if isinstance(value, float) else value for key, value in result.items()}
+
+
+def run_key(run):
+    return f"{run['item']}/{run['mode']}" + (f"@{run['speed']:g}x" if run["speed"] else "")
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_value(value, digits=3):
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def print_compare(runs, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {run_key(run): run for run in json.load(f)["runs"]}
+    print(f"\nChange against {baseline_path}:")
+    print(f"{'run':>22} " + " ".join(f"{metric:>16}" for metric in METRICS))
+    for run in runs:
+        before = baseline.get(run_key(run))
+        if before is None:
+            continue
+        deltas = []
+        for metric in METRICS:
+            old, new = before.get(metric), run.get(metric)
+            deltas.append("-" if old is None or new is None else f"{new - old:+.3f}")
+        print(f"{run_key(run):>22} " + " ".join(f"{delta:>16}" for delta in deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speech-to-text latency/throughput/accuracy benchmark")
+    parser.add_argument("--model", default=settings.default_model, help="Whisper model (default: DEFAULT_MODEL)")
+    parser.add_argument("--language", default="en", help="Language code (default: en)")
+    parser.add_argument("--items", default="jfk,cli,long", help="Comma-separated corpus items (jfk, cli, long)")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated modes (offline, stream)")
+    parser.add_argument("--speeds", default="1,4", help="Comma-separated stream pacing, times real time (default: 1,4)")
+    parser.add_argument("--long-minutes", type=float, default=3.0, help="Length of the long session (default: 3)")
+    parser.add_argument("--chunk-ms", type=int, default=250, help="Audio per WebSocket message (default: 250)")
+    parser.add_argument("--tail-ms", type=int, default=1500,
+                        help="Silence sent after the speech; should exceed VAD_END_OF_UTTERANCE_MS (default: 1500)")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for model load and finalization")
+    parser.add_argument("--output", "-o", help="Write the results JSON here")
+    parser.add_argument("--compare", help="Earlier results JSON to print the change against")
+    parser.add_argument("--verbose", action="store_true", help="Show server and model logs")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(json.loads(args.worker))))
+        return
+
+    specs = []
+    for item in args.items.split(","):
+        if item != "long" and item not in CORPUS:
+            parser.error(f"Unknown item '{item}'")
+        for mode in args.modes.split(","):
+            speeds = [float(s) for s in args.speeds.split(",")] if mode == "stream" else [None]
+            for speed in speeds:
+                specs.append({
+                    "item": item,
+                    "mode": mode,
+                    "speed": speed,
+                    "model": args.model,
+                    "language": args.language,
+                    "long_minutes": args.long_minutes,
+                    "chunk_ms": args.chunk_ms,
+                    "tail_ms": args.tail_ms,
+                    "timeout": args.timeout,
+                })
+
+    print(f"model={args.model} threads={settings.inference_cpu_threads} vad={int(settings.vad_enabled)} "
+          f"batch={settings.batch_max_size}")
+    print(f"\n{'run':>22} {'audio s':>8} {'load s':>7} {'first s':>8} {'final s':>8} {'rtf':>6} "
+          f"{'peak MB':>8} {'wer':>6}")
+    runs = []
+    for spec in specs:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", json.dumps(spec)],
+            cwd=BACKEND_DIR,
+            stdout=subprocess.PIPE,
+            stderr=None if args.verbose else subprocess.PIPE,
+            text=True,
+        )
+        if out.returncode != 0:
+            error = (out.stderr or "").strip().splitlines()[-1:] or [f"exit code {out.returncode}"]
+            run = {"item": spec["item"], "mode": spec["mode"], "speed": spec["speed"], "error": error[0]}
+            print(f"{run_key(run):>22} failed: {run['error']}")
+        else:
+            run = json.loads(out.stdout.splitlines()[-1])
+            print(f"{run_key(run):>22} {run['audio_s']:>8.1f} {run['load_s']:>7.2f} "
+                  f"{format_value(run['first_partial_s']):>8} {format_value(run['finalization_s']):>8} "
+                  f"{run['rtf']:>6.3f} {run['peak_rss_mb']:>8.0f} {format_value(run['wer']):>6}")
+        runs.append(run)
+
+    results = {
+        "meta": {
+            "commit": git_revision(),
+            "model": args.model,
+            "language": args.language,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "inference_cpu_threads": settings.inference_cpu_threads,
+            "inference_workers": settings.inference_workers,
+            "batch_max_size": settings.batch_max_size,
+            "vad_enabled": settings.vad_enabled,
+            "vad_end_of_utterance_ms": settings.vad_end_of_utterance_ms,
+            "long_minutes": args.long_minutes,
+            "chunk_ms": args.chunk_ms,
+            "tail_ms": args.tail_ms,
+        },
+        "runs": runs,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        print_compare(runs, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Time-to-first-audio and total synthesis time of streamed TTS versus text length.
+
+For texts of increasing length (N sentences) compares:
+
+- whole:    one synthesis request for the full text, as TTSService did before
+- streamed: the text split into sentences, synthesized concurrently on a pool
+            and yielded in order (what /speak and /ws/speak do)
+
+Time-to-first-byte for "whole" is its total time; for "streamed" it is the
+time until the first sentence comes out. The phrase cache is disabled so
+every run really synthesizes.
+
+Usage:
+    python benchmarks/bench_tts.py --backend gtts --sentences 1,2,4,8,16 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from inference_pool import InferencePool  # noqa: E402
+from speech_stream import split_sentences, synthesize_in_order  # noqa: E402
+from tts_service import BACKENDS, TTSService  # noqa: E402
+
+SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Streaming speech lets the listener hear the first words right away.",
+    "Each sentence is synthesized on its own worker.",
+    "Audio is still delivered in the original order.",
+    "Longer paragraphs benefit the most from this approach.",
+    "The total time shrinks as sentences overlap.",
+    "Network backends spend most of their time waiting.",
+    "Offline engines keep every core busy instead.",
+]
+
+
+def make_text(count):
+    return " ".join(SENTENCES[i % len(SENTENCES)] for i in range(count))
+
+
+async def streamed(tts, text, pool):
+    start = time.perf_counter()
+    first = None
+    async for _ in synthesize_in_order(tts, split_sentences(text), pool):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def whole(tts, text):
+    start = time.perf_counter()
+    tts.synthesize(text)
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming TTS benchmark")
+    parser.add_argument("--backend", "-b", choices=list(BACKENDS), default="gtts", help="TTS backend (default: gtts)")
+    parser.add_argument("--voice", default=None, help="Backend voice")
+    parser.add_argument("--sentences", default="1,2,4,8,16", help="Comma-separated text lengths in sentences")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent sentence syntheses (default: 4)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration; the median is reported")
+    args = parser.parse_args()
+
+    tts = TTSService(backend=args.backend, voice=args.voice)
+    pool = InferencePool(workers=args.workers)
+    # Warm up connections / engine start-up so it does not count against the first run
+    tts.synthesize("Warm up.")
+
+    print(f"\n{'sentences':>9} {'chars':>6} {'whole ttfb':>11} {'whole total':>12} {'stream ttfb':>12} {'stream total':>13}")
+    for count in [int(v) for v in args.sentences.split(",")]:
+        text = make_text(count)
+        whole_runs = sorted(whole(tts, text) for _ in range(args.repeat))
+        stream_runs = sorted(asyncio.run(streamed(tts, text, pool)) for _ in range(args.repeat))
+        (whole_ttfb, whole_total), (stream_ttfb, stream_total) = whole_runs[len(whole_runs) // 2], stream_runs[len(stream_runs) // 2]
+        print(f"{count:>9} {len(text):>6} {whole_ttfb * 1000:>9.0f}ms {whole_total * 1000:>10.0f}ms "
+              f"{stream_ttfb * 1000:>10.0f}ms {stream_total * 1000:>11.0f}ms")
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Load test for /ws/transcribe with N concurrent simulated clients.
+
+Each client streams a WebM/Opus encoding of a speech sample in 1 second
+chunks at real-time pace (like the frontend's MediaRecorder) and records the
+time from sending each chunk until the next transcript message (`partial` or
+`final` of the JSON protocol) arrives; `lag`, status and error messages are
+not responses.
+While the clients run, the `/` health route is polled to show whether the
+event loop stays responsive.
+
+Requires a running server:
+    uvicorn server:app --host 0.0.0.0 --port 8000
+    python benchmarks/load_test.py --clients 8 --url ws://localhost:8000/ws/transcribe
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import time
+from urllib.parse import urlparse
+
+import httpx
+import websockets
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_AUDIO = os.path.join(BACKEND_DIR, "test_stt_sample.wav")
+
+
+def encode_webm(path):
+    """Encode an audio file to WebM/Opus, the format MediaRecorder sends."""
+    out = subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-i", path,
+            "-ac", "1", "-ar", "48000", "-c:a", "libopus", "-b:a", "32k", "-f", "webm", "-",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return out.stdout
+
+
+def audio_seconds(path):
+    out = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-i", path, "-f", "null", "-"],
+        capture_output=True,
+        text=True,
+    )
+    for line in reversed(out.stderr.splitlines()):
+        if "time=" in line:
+            h, m, s = line.split("time=")[1].split()[0].split(":")
+            return int(h) * 3600 + int(m) * 60 + float(s)
+    return 1.0
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def is_transcript(message):
+    """A partial or final transcript message, as opposed to control messages."""
+    if not isinstance(message, str) or not message.startswith("{"):
+        return False
+    try:
+        return json.loads(message).get("type") in ("partial", "final")
+    except ValueError:
+        return False
+
+
+async def run_client(url, data, chunk_count, interval, latencies, drain_timeout):
+    chunk_size = max(1, len(data) // chunk_count)
+    pending = []  # Send times not yet followed by a message
+
+    async with websockets.connect(url, max_size=None) as websocket:
+        async def receive():
+            async for message in websocket:
+                if not is_transcript(message):
+                    continue
+                now = time.perf_counter()
+                latencies.extend(now - sent for sent in pending)
+                pending.clear()
+
+        receiver = asyncio.create_task(receive())
+        for i in range(chunk_count):
+            chunk = data[i * chunk_size:(i + 1) * chunk_size if i < chunk_count - 1 else None]
+            pending.append(time.perf_counter())
+            await websocket.send(chunk)
+            await asyncio.sleep(interval)
+
+        # Give the server time to answer the last chunks
+        deadline = time.perf_counter() + drain_timeout
+        while pending and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        receiver.cancel()
+
+
+async def poll_health(url, stop, latencies):
+    async with httpx.AsyncClient() as client:
+        while not stop.is_set():
+            start = time.perf_counter()
+            await client.get(url)
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.2)
+
+
+async def main_async(args):
+    seconds = audio_seconds(args.audio)
+    data = encode_webm(args.audio)
+    chunk_count = max(1, int(round(seconds)))
+    interval = 1.0 / args.speed
+
+    parsed = urlparse(args.url)
+    health_url = f"{'https' if parsed.scheme == 'wss' else 'http'}://{parsed.netloc}/"
+
+    latencies = []
+    health_latencies = []
+    stop = asyncio.Event()
+    health = asyncio.create_task(poll_health(health_url, stop, health_latencies))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        run_client(args.url, data, chunk_count, interval, latencies, args.drain_timeout)
+        for _ in range(args.clients)
+    ])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await health
+
+    print(f"clients={args.clients} audio={seconds:.1f}s chunks/client={chunk_count} speed={args.speed}x wall={elapsed:.1f}s")
+    print(f"response latency  p50={percentile(latencies, 50) * 1000:.0f} ms  "
+          f"p99={percentile(latencies, 99) * 1000:.0f} ms  samples={len(latencies)}")
+    print(f"health route      p50={percentile(health_latencies, 50) * 1000:.0f} ms  "
+          f"p99={percentile(health_latencies, 99) * 1000:.0f} ms  max={max(health_latencies, default=0) * 1000:.0f} ms")
+    if latencies:
+        print(f"mean response latency {statistics.mean(latencies) * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent /ws/transcribe load test")
+    parser.add_argument("--url", default="ws://localhost:8000/ws/transcribe", help="WebSocket URL")
+    parser.add_argument("--clients", "-n", type=int, default=4, help="Concurrent clients (default: 4)")
+    parser.add_argument("--audio", default=DEFAULT_AUDIO, help="Audio file each client streams")
+    parser.add_argument("--speed", type=float, default=1.0, help="Pacing relative to real time (default: 1.0)")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="Seconds to wait for final responses")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
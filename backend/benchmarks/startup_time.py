@@ -0,0 +1,95 @@
+"""
+Server startup timing: time-to-listen, time-to-ready and time-to-first-transcript.
+
+Starts `uvicorn server:app` as a subprocess and measures, from process start:
+
+- time-to-listen: the port accepts TCP connections and `/` answers
+- time-to-ready: `/health/ready` returns 200 (default model loaded and warmed up)
+- time-to-first-transcript: a WebSocket session opened as soon as the server
+  listens receives its first transcript for the bundled speech sample
+
+Usage:
+    python benchmarks/startup_time.py --port 8010
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+from websockets.sync.client import connect
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_AUDIO = os.path.join(BACKEND_DIR, "test_stt_sample.wav")
+
+
+def wait_for(predicate, timeout, interval=0.02):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if predicate():
+                return True
+        except (httpx.HTTPError, OSError):
+            pass
+        time.sleep(interval)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server startup timing")
+    parser.add_argument("--port", type=int, default=8010, help="Port to start the server on (default: 8010)")
+    parser.add_argument("--audio", default=DEFAULT_AUDIO, help="Audio file sent for the first transcript")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for each milestone")
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    with open(args.audio, "rb") as f:
+        audio = f.read()
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(args.port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    results = {}
+    try:
+        if not wait_for(lambda: httpx.get(f"{base_url}/").status_code == 200, args.timeout):
+            sys.exit("Server did not start listening")
+        results["time_to_listen_s"] = time.perf_counter() - start
+
+        # Poll readiness alongside the first session
+        def poll_ready():
+            if wait_for(lambda: httpx.get(f"{base_url}/health/ready").status_code == 200, args.timeout):
+                results["time_to_ready_s"] = time.perf_counter() - start
+
+        ready_poller = threading.Thread(target=poll_ready)
+        ready_poller.start()
+
+        # Connect immediately; the session waits for the model if it is still loading
+        with connect(f"ws://127.0.0.1:{args.port}/ws/transcribe", open_timeout=args.timeout) as websocket:
+            websocket.send(audio)
+            while True:
+                message = json.loads(websocket.recv(timeout=args.timeout))
+                if message["type"] in ("final", "partial") and message["segments"]:
+                    break
+        results["time_to_first_transcript_s"] = time.perf_counter() - start
+        results["first_transcript"] = " ".join(s["text"] for s in message["segments"])
+
+        ready_poller.join()
+        if "time_to_ready_s" not in results:
+            sys.exit("Server never became ready")
+        results["models"] = httpx.get(f"{base_url}/health/ready").json()["models"]
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
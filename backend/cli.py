@@ -1,8 +1,25 @@
 import argparse
+import json
 import os
 import sys
-from tts_service import TTSService
-from whisper_service import WhisperService
+from tts_service import TTSService, BACKENDS
+from phrase_cache import PhraseCache, default_cache_dir
+from model_manager import ModelManager
+from batch import find_audio_files, run_batch
+from longform import transcribe_long
+from transcript_cache import TranscriptCache, default_cache_path
+from transcript_index import TranscriptIndex, default_index_path
+
+
+def add_cache_arguments(parser):
+    parser.add_argument("--cache", type=str, default=default_cache_path(), help="Transcript cache file (default: $TRANSCRIPT_CACHE or ~/.cache/audio-assistant/transcripts.sqlite)")
+    parser.add_argument("--cache-mb", type=int, default=512, help="Cache size before least recently used entries are evicted (default: 512)")
+    parser.add_argument("--no-cache", action="store_true", help="Always run inference, bypassing the cache")
+
+def format_timestamp(seconds):
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
 
 def main():
     parser = argparse.ArgumentParser(description="Audio Assistant Backend CLI")
@@ -11,21 +28,62 @@ def main():
     # TTS Command
     tts_parser = subparsers.add_parser("tts", help="Text to Speech")
     tts_parser.add_argument("text", type=str, help="Text to convert to speech")
-    tts_parser.add_argument("--output", "-o", type=str, default="output.mp3", help="Output audio file path")
+    tts_parser.add_argument("--output", "-o", type=str, default=None, help="Output audio file path (default: output.mp3, or output.wav for offline backends)")
     tts_parser.add_argument("--lang", "-l", type=str, default="en", help="Language code (default: en)")
+    tts_parser.add_argument("--backend", "-b", type=str, choices=list(BACKENDS), default=os.environ.get("TTS_BACKEND", "gtts"), help="Synthesis engine; espeak and piper run offline (default: $TTS_BACKEND or gtts)")
+    tts_parser.add_argument("--voice", type=str, default=None, help="Backend voice: gTTS accent domain (e.g. co.uk), espeak voice, or Piper model path")
+    tts_parser.add_argument("--cache-dir", type=str, default=default_cache_dir(), help="Phrase cache directory (default: $TTS_CACHE or ~/.cache/audio-assistant/tts)")
+    tts_parser.add_argument("--no-cache", action="store_true", help="Always synthesize, bypassing the phrase cache")
 
     # STT Command
     stt_parser = subparsers.add_parser("stt", help="Speech to Text")
     stt_parser.add_argument("audio_file", type=str, help="Path to input audio file")
     stt_parser.add_argument("--model", "-m", type=str, default="base", help="Whisper model size (default: base)")
     stt_parser.add_argument("--device", "-d", type=str, default="cpu", help="Device to use (default: cpu)")
+    stt_parser.add_argument("--compute-type", type=str, default="int8", help="CTranslate2 compute type (default: int8)")
+    stt_parser.add_argument("--long", action="store_true", help="Long-form mode: split at pauses, transcribe chunks in parallel and print segments as they finish")
+    stt_parser.add_argument("--workers", "-w", type=int, default=max(1, (os.cpu_count() or 1) // 4), help="Worker processes for --long (default: cores / 4)")
+    stt_parser.add_argument("--chunk-seconds", type=float, default=60.0, help="Target chunk length for --long (default: 60)")
+    stt_parser.add_argument("--lang", "-l", type=str, default="en", help="Language code for --long (default: en)")
+    add_cache_arguments(stt_parser)
+
+    # Batch Command
+    batch_parser = subparsers.add_parser("batch", help="Transcribe many files in parallel")
+    batch_parser.add_argument("source", type=str, help="Directory of audio files, or a manifest with one path per line")
+    batch_parser.add_argument("--output", "-o", type=str, default="transcripts.jsonl", help="JSONL results file; files already in it are skipped (default: transcripts.jsonl)")
+    batch_parser.add_argument("--workers", "-w", type=int, default=max(1, (os.cpu_count() or 1) // 4), help="Worker processes, each holding one model (default: cores / 4)")
+    batch_parser.add_argument("--threads", type=int, default=0, help="CTranslate2 threads per worker (default: cores / workers)")
+    batch_parser.add_argument("--model", "-m", type=str, default="base", help="Whisper model size (default: base)")
+    batch_parser.add_argument("--device", "-d", type=str, default="cpu", help="Device to use (default: cpu)")
+    batch_parser.add_argument("--compute-type", type=str, default="int8", help="CTranslate2 compute type (default: int8)")
+    batch_parser.add_argument("--lang", "-l", type=str, default="en", help="Language code (default: en)")
+    add_cache_arguments(batch_parser)
+
+    # Cache Command
+    cache_parser = subparsers.add_parser("cache", help="Inspect or clear the transcript cache")
+    cache_parser.add_argument("action", choices=["stats", "clear"], help="Show hit/miss stats or delete all entries")
+    cache_parser.add_argument("--cache", type=str, default=default_cache_path(), help="Transcript cache file")
+
+    # Search Command
+    search_parser = subparsers.add_parser("search", help="Find a phrase in the transcripts of saved recordings")
+    search_parser.add_argument("query", type=str, help="Phrase to look for")
+    search_parser.add_argument("--index", type=str, default=default_index_path(), help="Transcript index file (default: $TRANSCRIPT_INDEX or ~/.cache/audio-assistant/recordings.sqlite)")
+    search_parser.add_argument("--scan", type=str, action="append", default=[], metavar="FOLDER", help="Index new or changed recordings in FOLDER first (repeatable)")
+    search_parser.add_argument("--limit", "-n", type=int, default=20, help="Maximum number of hits (default: 20)")
+    search_parser.add_argument("--fts", action="store_true", help="Treat the query as FTS5 syntax (AND, OR, NEAR, prefix*) instead of a phrase")
 
     args = parser.parse_args()
 
     if args.command == "tts":
-        print(f"Running TTS: '{args.text}' -> {args.output}")
-        tts = TTSService(lang=args.lang)
-        if tts.generate_audio(args.text, args.output):
+        cache = None if args.no_cache else PhraseCache(args.cache_dir)
+        try:
+            tts = TTSService(lang=args.lang, backend=args.backend, voice=args.voice, cache=cache)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        output = args.output or f"output.{tts.audio_format}"
+        print(f"Running TTS: '{args.text}' -> {output}")
+        if tts.generate_audio(args.text, output):
             print("TTS completed successfully.")
         else:
             print("TTS failed.")
@@ -36,10 +94,31 @@ def main():
             print(f"Error: Audio file '{args.audio_file}' not found.")
             sys.exit(1)
 
+        if args.long:
+            print(f"Running long-form STT on '{args.audio_file}' using model '{args.model}' on {args.workers} workers")
+            count = 0
+            for segment in transcribe_long(
+                args.audio_file,
+                workers=args.workers,
+                model_size=args.model,
+                device=args.device,
+                compute_type=args.compute_type,
+                language=args.lang,
+                chunk_seconds=args.chunk_seconds,
+            ):
+                print(f"[{format_timestamp(segment.start)} -> {format_timestamp(segment.end)}] {segment.text}", flush=True)
+                count += 1
+            if not count:
+                print("Transcription returned empty or failed.")
+                sys.exit(1)
+            return
+
         print(f"Running STT on '{args.audio_file}' using model '{args.model}'")
-        # Note: compute_type="int8" is default in service but good to be explicit if needed,
-        # here we stick to service defaults or simple args
-        stt = WhisperService(model_size=args.model, device=args.device)
+        # One-shot run: load through the same manager as the server, but skip warm-up
+        # since the file itself is the only request
+        cache = None if args.no_cache else TranscriptCache(args.cache, args.cache_mb * 1024 * 1024)
+        models = ModelManager(device=args.device, compute_type=args.compute_type, warmup=False, cache=cache)
+        stt = models.get(args.model)
         text = stt.transcribe(args.audio_file)
 
         if text:
@@ -50,6 +129,51 @@ def main():
             print("Transcription returned empty or failed.")
             sys.exit(1)
 
+    elif args.command == "batch":
+        if not os.path.exists(args.source):
+            print(f"Error: '{args.source}' not found.")
+            sys.exit(1)
+
+        files = find_audio_files(args.source)
+        summary = run_batch(
+            files,
+            args.output,
+            workers=args.workers,
+            model_size=args.model,
+            device=args.device,
+            compute_type=args.compute_type,
+            cpu_threads=args.threads,
+            language=args.lang,
+            cache_path=None if args.no_cache else args.cache,
+            cache_max_bytes=args.cache_mb * 1024 * 1024,
+        )
+        print(json.dumps(summary, indent=2))
+        if summary["failed"]:
+            sys.exit(1)
+
+    elif args.command == "cache":
+        cache = TranscriptCache(args.cache)
+        if args.action == "clear":
+            cache.clear()
+            print(f"Cleared {args.cache}")
+        else:
+            print(json.dumps(cache.stats(), indent=2))
+
+    elif args.command == "search":
+        index = TranscriptIndex(args.index)
+        for folder in args.scan:
+            print(f"Indexed {index.scan(folder)} new or changed recordings in {folder}")
+        try:
+            hits = index.search(args.query, limit=args.limit, phrase=not args.fts)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if not hits:
+            print("No matches.")
+            sys.exit(1)
+        for hit in hits:
+            print(f"{hit.audio}\t{hit.start_ms} ms [{format_timestamp(hit.start_ms / 1000)}]\t{hit.highlighted}")
+
     else:
         parser.print_help()
 
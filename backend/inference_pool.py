@@ -0,0 +1,62 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class InferencePool:
+    """
+    Bounded thread pool for blocking decode and inference work.
+
+    CTranslate2 releases the GIL while it runs, so threads give real
+    parallelism for Whisper while keeping the shared model in one process.
+    Jobs are served in submission order; sessions only keep one job in flight
+    at a time, so every active session gets a turn per cycle.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._active = 0
+
+    @property
+    def queued(self):
+        """Jobs waiting for a free worker."""
+        return self._pending - self._active
+
+    @property
+    def active(self):
+        """Jobs currently running."""
+        return self._active
+
+    def _call(self, fn, args):
+        with self._lock:
+            self._active += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._pending -= 1
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) on a pool worker without blocking the event loop.
+        """
+        with self._lock:
+            self._pending += 1
+        future = self._executor.submit(self._call, fn, args)
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            if future.cancelled():
+                # Cancelled before a worker picked it up, so _call never counted it out
+                with self._lock:
+                    self._pending -= 1
+
+    def stats(self):
+        return {"workers": self.workers, "active": self.active, "queued": self.queued}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
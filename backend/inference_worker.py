@@ -0,0 +1,228 @@
+"""
+Inference worker process for split deployments.
+
+Serves Whisper inference on a Unix socket: the WebSocket server (the
+gateway) decodes audio and runs each session's streaming state, and sends
+every window of PCM here to be transcribed. Run several workers and point
+the gateway at them with WORKER_SOCKETS, or let the gateway start them
+itself with WORKER_PROCESSES.
+
+Usage:
+    python inference_worker.py --socket /tmp/audio-assistant-worker-0.sock
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from settings import settings
+
+# Segments and words as they come back from a worker; StreamingSession reads
+# the same fields from faster-whisper's own objects
+RemoteSegment = namedtuple("RemoteSegment", ["start", "end", "text", "words"])
+RemoteWord = namedtuple("RemoteWord", ["start", "end", "word", "probability"])
+
+_HEADER = struct.Struct(">I")
+
+
+def _recv_exact(sock, size):
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise ConnectionError("Connection closed")
+        received += count
+    return bytes(data)
+
+
+def send_message(sock, header, payload=b""):
+    """
+    Send one message: a length-prefixed JSON header followed by a binary
+    payload (PCM for requests) whose size is given in the header.
+    """
+    data = json.dumps(dict(header, payload_bytes=len(payload))).encode()
+    sock.sendall(_HEADER.pack(len(data)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def recv_message(sock):
+    """
+    :return: (header dict, payload bytes).
+    :raises ConnectionError: If the peer closed the connection.
+    """
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    header = json.loads(_recv_exact(sock, size))
+    return header, _recv_exact(sock, header.get("payload_bytes", 0))
+
+
+def segments_json(segments):
+    return [
+        {
+            "start": s.start,
+            "end": s.end,
+            "text": s.text,
+            "words": [[w.start, w.end, w.word, w.probability] for w in s.words or ()],
+        }
+        for s in segments
+    ]
+
+
+def segments_from_json(data):
+    return [
+        RemoteSegment(s["start"], s["end"], s["text"], [RemoteWord(*w) for w in s["words"]] or None)
+        for s in data
+    ]
+
+
+class InferenceWorker:
+    """
+    Unix socket server answering transcription and health requests.
+
+    Each gateway connection is served by its own thread and handles one
+    request at a time; the gateway opens more connections for concurrent
+    requests, so the worker runs as many passes at once as it is sent.
+    """
+
+    def __init__(self, path, transcriber_for, models=None):
+        """
+        :param path: Unix socket path (replaced if it exists).
+        :param transcriber_for: Callable returning the object with
+            transcribe_segments() for a model name, e.g.
+            ModelManager.transcriber.
+        :param models: Callable returning per-model status for health replies.
+        """
+        self.path = path
+        self.transcriber_for = transcriber_for
+        self.models = models
+        self.served = 0
+        self.failed = 0
+        self.active = 0
+        self._lock = threading.Lock()
+        self._connections = set()
+
+        if os.path.exists(path):
+            os.remove(path)
+        worker = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                with worker._lock:
+                    worker._connections.add(self.request)
+                try:
+                    while True:
+                        header, payload = recv_message(self.request)
+                        send_message(self.request, worker.handle(header, payload))
+                except (ConnectionError, OSError):
+                    pass
+                finally:
+                    with worker._lock:
+                        worker._connections.discard(self.request)
+
+        self._server = socketserver.ThreadingUnixStreamServer(path, Handler)
+        self._server.daemon_threads = True
+
+    def handle(self, header, payload):
+        """Answer one request; transcription errors are returned, not raised."""
+        reply = {"id": header.get("id")}
+        if header["op"] == "health":
+            with self._lock:
+                reply.update(ok=True, pid=os.getpid(), active=self.active, served=self.served, failed=self.failed)
+            reply["models"] = self.models() if self.models else {}
+            return reply
+
+        with self._lock:
+            self.active += 1
+        try:
+            audio = np.frombuffer(payload, dtype=np.float32)
+            segments = self.transcriber_for(header["model"]).transcribe_segments(
+                audio,
+                language=header.get("language", "en"),
+                initial_prompt=header.get("initial_prompt"),
+                word_timestamps=header.get("word_timestamps", False),
+            )
+            reply["segments"] = segments_json(segments)
+            with self._lock:
+                self.served += 1
+        except Exception as e:
+            print(f"Error during transcription: {e}")
+            reply["error"] = str(e)
+            with self._lock:
+                self.failed += 1
+        finally:
+            with self._lock:
+                self.active -= 1
+        return reply
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        """Serve on a background thread (for tests and embedding)."""
+        threading.Thread(target=self.serve_forever, name="inference-worker", daemon=True).start()
+        return self
+
+    def close(self):
+        """Stop serving and drop open connections, as if the process exited."""
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def main():
+    from model_manager import ModelManager
+
+    parser = argparse.ArgumentParser(description="Whisper inference worker")
+    parser.add_argument("--socket", required=True, help="Unix socket path to listen on")
+    parser.add_argument("--model", default=settings.default_model, help="Model loaded at startup (default: DEFAULT_MODEL)")
+    parser.add_argument("--cpu-threads", type=int, default=0,
+                        help="CPU cores this worker may use (default: all, sized by INFERENCE_CPU_THREADS and INFERENCE_WORKERS)")
+    args = parser.parse_args()
+
+    cpu_threads, num_workers = settings.inference_cpu_threads, settings.inference_workers
+    if args.cpu_threads:
+        # A share of the machine: threads per call up to INFERENCE_CPU_THREADS, and as many calls as fit
+        cpu_threads = min(cpu_threads, args.cpu_threads)
+        num_workers = max(1, args.cpu_threads // cpu_threads)
+
+    # Same model settings as the in-process server, batching included
+    models = ModelManager(
+        memory_budget_mb=settings.model_memory_budget_mb,
+        device="cpu",
+        compute_type="int8",
+        cpu_threads=cpu_threads,
+        num_workers=num_workers,
+        warmup=settings.model_warmup,
+        batch_max_size=settings.batch_max_size,
+        batch_max_wait=settings.batch_max_wait_ms / 1000,
+        pinned=(args.model,),
+    )
+    models.get(args.model)
+    worker = InferenceWorker(args.socket, models.transcriber, models=models.status)
+    print(f"Inference worker {os.getpid()} serving on {args.socket}")
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.close()
+
+
+if __name__ == "__main__":
+    main()
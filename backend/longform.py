@@ -0,0 +1,244 @@
+import collections
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import av
+import numpy as np
+
+from audio_stream import SAMPLE_RATE
+from vad import FRAME_SAMPLES
+from whisper_service import WhisperService, _normalize
+
+# A piece of the recording sent to one worker:
+#   offset: absolute sample of audio[0]
+#   overlap_before / overlap_after: samples shared with the previous / next
+#       chunk (0 when the cut fell in a silence)
+Chunk = namedtuple("Chunk", ["index", "offset", "audio", "overlap_before", "overlap_after"])
+
+# One transcribed segment, in seconds from the start of the recording
+Segment = namedtuple("Segment", ["start", "end", "text"])
+
+# Words compared across an overlap when dropping repeats
+MAX_REPEATED_WORDS = 4
+
+# Model held by each worker process, loaded once by _init_worker
+_service = None
+
+
+def iter_audio(audio, block_seconds=10.0):
+    """
+    Decode a recording as 16 kHz mono float32 blocks without holding the
+    whole file in memory.
+    :param audio: Path to an audio file, or an array of 16 kHz samples.
+    :param block_seconds: Approximate length of each block.
+    """
+    block = int(block_seconds * SAMPLE_RATE)
+    if isinstance(audio, np.ndarray):
+        for start in range(0, len(audio), block):
+            yield audio[start:start + block]
+        return
+
+    resampler = av.AudioResampler(format="flt", layout="mono", rate=SAMPLE_RATE)
+    parts, size = [], 0
+    with av.open(audio) as container:
+        frames = container.decode(audio=0)
+        for frame in frames:
+            for out in resampler.resample(frame):
+                parts.append(out.to_ndarray().reshape(-1))
+                size += len(parts[-1])
+            if size >= block:
+                yield np.concatenate(parts)
+                parts, size = [], 0
+        for out in resampler.resample(None):
+            parts.append(out.to_ndarray().reshape(-1))
+    if parts:
+        yield np.concatenate(parts)
+
+
+def find_silences(audio, min_silence_ms=300, use_silero=True, energy_threshold=0.003):
+    """
+    Pauses in a stretch of audio.
+    :param min_silence_ms: Shortest pause returned.
+    :param use_silero: Detect speech with Silero VAD (energy only if False).
+    :return: List of (start, end) sample ranges.
+    """
+    min_samples = int(min_silence_ms * SAMPLE_RATE / 1000)
+    if use_silero:
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+        speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=min_silence_ms, speech_pad_ms=100))
+        bounds = [0] + [edge for span in speech for edge in (span["start"], span["end"])] + [len(audio)]
+        gaps = zip(bounds[::2], bounds[1::2])
+    else:
+        count = len(audio) // FRAME_SAMPLES
+        frames = audio[:count * FRAME_SAMPLES].reshape(count, FRAME_SAMPLES)
+        quiet = np.sqrt(np.mean(frames ** 2, axis=1)) < energy_threshold
+        # Runs of quiet frames, from the edges of the quiet mask
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], quiet.astype(np.int8), [0]))))
+        gaps = ((start * FRAME_SAMPLES, end * FRAME_SAMPLES) for start, end in zip(edges[::2], edges[1::2]))
+    return [(start, end) for start, end in gaps if end - start >= min_samples]
+
+
+def split_chunks(blocks, chunk_seconds=60.0, search_seconds=10.0, overlap_seconds=2.0,
+                 min_silence_ms=300, use_silero=True):
+    """
+    Cut a stream of audio blocks into chunks of about `chunk_seconds`.
+
+    Each cut is placed in the longest pause within `search_seconds` of the
+    target length. Without a pause there (continuous speech), the chunk is
+    cut at the target and the next one starts `overlap_seconds` earlier, so
+    words on the cut are heard whole by one of the two chunks.
+    At most one chunk plus the search window is buffered.
+    """
+    target = int(chunk_seconds * SAMPLE_RATE)
+    search = min(int(search_seconds * SAMPLE_RATE), target // 2)
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    buffer = np.zeros(0, dtype=np.float32)
+    offset = 0
+    overlap_before = 0
+    index = 0
+
+    for block in blocks:
+        buffer = np.concatenate([buffer, np.asarray(block, dtype=np.float32)])
+        while len(buffer) >= target + search:
+            silences = find_silences(buffer[target - search:target + search], min_silence_ms, use_silero)
+            if silences:
+                # Longest pause, nearest to the target on ties
+                start, end = max(silences, key=lambda s: (s[1] - s[0], -abs(s[0] + s[1] - 2 * search)))
+                cut = next_start = target - search + (start + end) // 2
+            else:
+                cut, next_start = target, target - overlap
+            yield Chunk(index, offset, buffer[:cut], overlap_before, cut - next_start)
+            index += 1
+            offset += next_start
+            overlap_before = cut - next_start
+            buffer = buffer[next_start:]
+
+    if len(buffer):
+        yield Chunk(index, offset, buffer, overlap_before, 0)
+
+
+def transcribe_chunk(service, chunk, language="en"):
+    """
+    Transcribe one chunk and keep its share of any overlap: words in the
+    first half of an overlap belong to the previous chunk, the rest to the
+    next one.
+    :return: List of (start, end, text, words) in seconds from the start of
+        the recording; words are (start, end, word) when the chunk overlaps.
+    """
+    base = chunk.offset / SAMPLE_RATE
+    overlapping = bool(chunk.overlap_before or chunk.overlap_after)
+    lower = base + chunk.overlap_before / 2 / SAMPLE_RATE
+    upper = base + (len(chunk.audio) - chunk.overlap_after / 2) / SAMPLE_RATE
+
+    results = []
+    for segment in service.transcribe_segments(chunk.audio, language=language, word_timestamps=overlapping):
+        if not overlapping or not segment.words:
+            if overlapping and not lower <= base + (segment.start + segment.end) / 2 < upper:
+                continue
+            results.append((base + segment.start, base + segment.end, segment.text.strip(), ()))
+            continue
+        words = [
+            (base + word.start, base + word.end, word.word)
+            for word in segment.words
+            if lower <= base + (word.start + word.end) / 2 < upper
+        ]
+        if words:
+            results.append((words[0][0], words[-1][1], "".join(w[2] for w in words).strip(), tuple(words)))
+    return results
+
+
+def _init_worker(model_size, device, compute_type, cpu_threads):
+    global _service
+    _service = WhisperService(model_size=model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _transcribe_chunk(chunk, language):
+    return transcribe_chunk(_service, chunk, language)
+
+
+class _Stitcher:
+    """Joins chunk results in order, dropping words repeated across an overlap."""
+
+    def __init__(self):
+        self.tail = []  # Normalized last words emitted
+
+    def add(self, overlap_before, results):
+        """
+        :param overlap_before: Samples the chunk shares with the previous one.
+        :param results: transcribe_chunk output for the chunk.
+        :return: New Segments.
+        """
+        segments = []
+        for start, end, text, words in results:
+            if overlap_before and not segments:
+                start, text = self._drop_repeats(start, text, words)
+            if not text:
+                continue
+            segments.append(Segment(round(start, 3), round(end, 3), text))
+            self.tail = (self.tail + _normalize(text))[-MAX_REPEATED_WORDS:]
+        return segments
+
+    def _drop_repeats(self, start, text, words):
+        """Drop the leading words of a chunk that end the previous chunk too."""
+        head = _normalize(text)
+        for count in range(min(len(self.tail), len(head), MAX_REPEATED_WORDS), 0, -1):
+            if self.tail[-count:] == head[:count]:
+                if words:
+                    kept = words[count:]
+                    return (kept[0][0] if kept else start), "".join(w[2] for w in kept).strip()
+                return start, " ".join(text.split()[count:])
+        return start, text
+
+
+def transcribe_long(audio, workers=1, model_size="base", device="cpu", compute_type="int8", cpu_threads=0,
+                    language="en", chunk_seconds=60.0, overlap_seconds=2.0, use_silero=True, service=None):
+    """
+    Transcribe a recording of any length in chunks cut at pauses, on a pool
+    of worker processes, yielding Segments in order as soon as each chunk
+    is done. Memory stays bounded by the chunks in flight (two per worker),
+    not by the length of the recording.
+
+    :param audio: Path to an audio file, or an array of 16 kHz samples.
+    :param workers: Worker processes, each holding one model; 0 transcribes
+        in this process with `service` (or a new WhisperService).
+    :param cpu_threads: CTranslate2 threads per worker (0 shares the cores evenly).
+    :param chunk_seconds: Target chunk length.
+    :param overlap_seconds: Audio shared by chunks cut in continuous speech.
+    :param use_silero: Find pauses with Silero VAD (energy only if False).
+    """
+    chunks = split_chunks(iter_audio(audio), chunk_seconds=chunk_seconds,
+                          overlap_seconds=overlap_seconds, use_silero=use_silero)
+    stitcher = _Stitcher()
+
+    if workers == 0:
+        service = service or WhisperService(model_size=model_size, device=device, compute_type=compute_type,
+                                            cpu_threads=cpu_threads)
+        for chunk in chunks:
+            yield from stitcher.add(chunk.overlap_before, transcribe_chunk(service, chunk, language))
+        return
+
+    if not cpu_threads:
+        cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+    # Spawned rather than forked, as in batch.run_batch
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_size, device, compute_type, cpu_threads),
+    )
+    pending = collections.deque()  # (overlap_before, future) in chunk order
+    try:
+        for chunk in chunks:
+            pending.append((chunk.overlap_before, pool.submit(_transcribe_chunk, chunk, language)))
+            # Stop decoding ahead while every worker has a chunk queued
+            while len(pending) >= 2 * workers:
+                overlap_before, future = pending.popleft()
+                yield from stitcher.add(overlap_before, future.result())
+        while pending:
+            overlap_before, future = pending.popleft()
+            yield from stitcher.add(overlap_before, future.result())
+    finally:
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,272 @@
+import bisect
+import contextlib
+import threading
+import time
+
+# Stage latencies, from sub-millisecond socket handling to slow inference passes
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Inference seconds per second of audio; above 1 a session cannot keep up
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+# Chunks merged into one pass
+DEPTH_BUCKETS = (1, 2, 4, 8, 16, 32)
+
+# Pipeline stages of a /ws/transcribe session, in order
+STAGES = ("receive", "backpressure", "queue", "decode", "vad", "inference", "send")
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    """
+    Base of all metrics. Counters and gauges can be given a `function`
+    instead of being updated: it is called when rendering and returns a
+    value, or {label values: value}, e.g. to expose existing stats.
+    """
+
+    type = None
+
+    def __init__(self, name, help, labelnames=(), function=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self._lock = threading.Lock()
+        self._values = {}  # label values -> value or histogram state
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        if self.function is not None:
+            value = self.function()
+            with self._lock:
+                self._values = value if isinstance(value, dict) else {(): value}
+        with self._lock:
+            items = sorted(self._values.items())
+            lines += self._samples(items)
+        return lines
+
+    def _samples(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in items]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, labels=()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value, labels=()):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, amount=1, labels=()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount=1, labels=()):
+        self.inc(-amount, labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket counts (last one is +Inf), sum
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def totals(self, labels=()):
+        """:return: (count, sum) of the values observed with `labels`."""
+        with self._lock:
+            state = self._values.get(labels)
+            return (sum(state[0]), state[1]) if state else (0, 0.0)
+
+    def _samples(self, items):
+        lines = []
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames + ("le",), labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            base = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{base} {_format_value(total)}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+        return lines
+
+
+class Registry:
+    """A set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=(), function=None):
+        return self.register(Counter(name, help, labelnames, function))
+
+    def gauge(self, name, help, labelnames=(), function=None):
+        return self.register(Gauge(name, help, labelnames, function))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+class PipelineMetrics:
+    """
+    Metrics of the streaming transcription pipeline, shared by all sessions.
+    With `enabled` False nothing is timed or recorded.
+    """
+
+    def __init__(self, enabled=True, registry=None):
+        self.enabled = enabled
+        self.registry = registry or Registry()
+        r = self.registry
+        self.stage_seconds = r.histogram(
+            "audio_assistant_stage_seconds", "Time spent in each stage of a transcription pass", ("stage",))
+        self.rtf = r.histogram(
+            "audio_assistant_inference_rtf", "Inference time divided by the seconds of audio it covered", buckets=RTF_BUCKETS)
+        self.audio_seconds = r.counter(
+            "audio_assistant_audio_seconds_total", "Seconds of audio received (decoded) and run through inference", ("kind",))
+        self.coalesced_chunks = r.histogram(
+            "audio_assistant_coalesced_chunks", "Received chunks handled by one pass", buckets=DEPTH_BUCKETS)
+        self.active_sessions = r.gauge("audio_assistant_active_sessions", "Open transcription sessions")
+        self.sessions = r.counter("audio_assistant_sessions_total", "Transcription sessions started")
+
+    def session(self):
+        """Start recording a new session."""
+        return SessionMetrics(self)
+
+
+class _StageTimer:
+    __slots__ = ("session", "stage", "start")
+
+    def __init__(self, session, stage):
+        self.session = session
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.session.observe(self.stage, time.perf_counter() - self.start)
+
+
+_NOT_TIMED = contextlib.nullcontext()
+
+
+class SessionMetrics:
+    """
+    One session's measurements: recorded into the shared PipelineMetrics
+    and totalled per stage for a summary when the session ends.
+
+    Each stage is only observed from one thread at a time (the event loop
+    or the session's current pass), so the totals need no lock.
+    """
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.enabled = pipeline.enabled
+        self.started = time.monotonic()
+        self.passes = 0
+        self.audio_seconds = 0.0
+        self.inferred_seconds = 0.0
+        self.inference_seconds = 0.0
+        # stage -> [count, total seconds, max seconds]
+        self.stages = {}
+        if self.enabled:
+            pipeline.sessions.inc()
+            pipeline.active_sessions.inc()
+
+    def stage(self, stage):
+        """Context manager timing one stage (a no-op when disabled)."""
+        return _StageTimer(self, stage) if self.enabled else _NOT_TIMED
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        self.pipeline.stage_seconds.observe(seconds, (stage,))
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+    def received(self, audio_seconds, chunks):
+        """A pass took `chunks` received chunks holding `audio_seconds` of new audio."""
+        if not self.enabled:
+            return
+        self.passes += 1
+        self.audio_seconds += audio_seconds
+        self.pipeline.audio_seconds.inc(audio_seconds, ("received",))
+        self.pipeline.coalesced_chunks.observe(chunks)
+
+    def inference(self, seconds, audio_seconds):
+        """One inference call over `audio_seconds` of audio took `seconds`."""
+        if not self.enabled:
+            return
+        self.observe("inference", seconds)
+        self.inferred_seconds += audio_seconds
+        self.inference_seconds += seconds
+        self.pipeline.audio_seconds.inc(audio_seconds, ("inferred",))
+        if audio_seconds > 0:
+            self.pipeline.rtf.observe(seconds / audio_seconds)
+
+    def close(self):
+        """
+        End the session.
+        :return: Summary dict (None when disabled).
+        """
+        if not self.enabled:
+            return None
+        self.pipeline.active_sessions.dec()
+        return {
+            "duration_s": round(time.monotonic() - self.started, 3),
+            "audio_s": round(self.audio_seconds, 3),
+            "inferred_audio_s": round(self.inferred_seconds, 3),
+            "rtf": round(self.inference_seconds / self.inferred_seconds, 3) if self.inferred_seconds else None,
+            "passes": self.passes,
+            "stages": {
+                stage: {
+                    "count": count,
+                    "total_ms": round(total * 1000, 1),
+                    "mean_ms": round(total / count * 1000, 2),
+                    "max_ms": round(worst * 1000, 1),
+                }
+                for stage, (count, total, worst) in sorted(self.stages.items(), key=lambda item: STAGES.index(item[0]))
+            },
+        }
@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import OrderedDict
+
+from whisper_service import WhisperService
+from batcher import MicroBatcher
+
+# Approximate resident memory (MB) of each model with int8 weights on CPU.
+# float16/float32 weights take roughly 2x/4x as much.
+MODEL_MEMORY_MB = {
+    "tiny": 75,
+    "tiny.en": 75,
+    "base": 145,
+    "base.en": 145,
+    "small": 480,
+    "small.en": 480,
+    "distil-small.en": 330,
+    "medium": 1500,
+    "medium.en": 1500,
+    "distil-medium.en": 800,
+    "large-v1": 3000,
+    "large-v2": 3000,
+    "large-v3": 3000,
+    "distil-large-v3": 1500,
+    "large-v3-turbo": 1600,
+    "turbo": 1600,
+}
+
+_COMPUTE_TYPE_SCALE = {"int8": 1, "int8_float16": 1, "int8_float32": 1, "float16": 2, "bfloat16": 2, "float32": 4}
+
+
+def estimate_memory_mb(model_size, compute_type="int8"):
+    """Rough resident size of a model, used for the memory budget."""
+    return MODEL_MEMORY_MB.get(model_size, 1600) * _COMPUTE_TYPE_SCALE.get(compute_type, 1)
+
+
+class ModelManager:
+    """
+    Registry of resident Whisper models.
+
+    Models are loaded on first request and warmed up before being handed
+    out. Models are kept until the estimated memory of the resident set
+    would exceed `memory_budget_mb`; room is then made by evicting the least
+    recently used ones before the new model loads, so memory never holds
+    both. Models in `pinned` are never evicted. Sessions that still hold an
+    evicted model keep using it until they finish; it is freed once the
+    last reference goes away.
+    """
+
+    def __init__(self, memory_budget_mb=4096, device="cpu", compute_type="int8",
+                 cpu_threads=0, num_workers=1, warmup=True, batch_max_size=1, batch_max_wait=0.03, cache=None,
+                 pinned=()):
+        """
+        :param memory_budget_mb: Estimated memory the resident models may use.
+        :param pinned: Models that stay resident once loaded, e.g. the
+            default model readiness is reported for.
+        :param warmup: Run a short inference after loading each model.
+        :param batch_max_size: Enable cross-session micro-batching per model when > 1.
+        :param batch_max_wait: Seconds a batched pass waits for more sessions.
+        :param cache: Optional TranscriptCache shared by the loaded models.
+        """
+        self.memory_budget_mb = memory_budget_mb
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.warmup = warmup
+        self.batch_max_size = batch_max_size
+        self.batch_max_wait = batch_max_wait
+        self.cache = cache
+        self.pinned = set(pinned)
+
+        self.loads = 0
+        self.evictions = 0
+
+        self._models = OrderedDict()  # model_size -> WhisperService, least recently used first
+        self._batchers = {}
+        self._load_times = {}
+        # model_size -> {"state": "loading" | "ready" | "failed", ...} for readiness reporting
+        self._status = {}
+        self._loading_mb = {}  # model_size -> estimated memory reserved while it loads
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def get(self, model_size):
+        """
+        Return the WhisperService for a model, loading it if needed.
+        Blocks while the model loads; call from a worker thread.
+        """
+        with self._lock:
+            if model_size in self._models:
+                self._models.move_to_end(model_size)
+                return self._models[model_size]
+            load_lock = self._load_locks.setdefault(model_size, threading.Lock())
+
+        # Only one thread loads a given model; others wait for it
+        with load_lock:
+            with self._lock:
+                if model_size in self._models:
+                    self._models.move_to_end(model_size)
+                    return self._models[model_size]
+                self._status[model_size] = {"state": "loading"}
+                # Make room first: loading next to a model that is about to be evicted could run out of memory
+                needed_mb = estimate_memory_mb(model_size, self.compute_type)
+                self._evict_for(needed_mb)
+                self._loading_mb[model_size] = needed_mb
+            start = time.perf_counter()
+            try:
+                service = WhisperService(
+                    model_size=model_size,
+                    device=self.device,
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.num_workers,
+                    cache=self.cache,
+                )
+                if self.warmup:
+                    print(f"Warm-up of {model_size} took {service.warm_up():.2f}s")
+            except Exception as e:
+                with self._lock:
+                    self._loading_mb.pop(model_size, None)
+                    self._status[model_size] = {"state": "failed", "error": str(e)}
+                raise
+            load_seconds = time.perf_counter() - start
+
+            with self._lock:
+                self._loading_mb.pop(model_size, None)
+                self._models[model_size] = service
+                self._load_times[model_size] = load_seconds
+                self._status[model_size] = {
+                    "state": "ready",
+                    "load_seconds": round(load_seconds, 3),
+                    "warmup_seconds": round(service.warmup_seconds, 3) if service.warmup_seconds is not None else None,
+                }
+                if self.batch_max_size > 1:
+                    self._batchers[model_size] = MicroBatcher(
+                        service, max_batch=self.batch_max_size, max_wait=self.batch_max_wait
+                    )
+                self.loads += 1
+            return service
+
+    def transcriber(self, model_size):
+        """
+        Return what a StreamingSession should call for this model: the
+        model's micro-batcher when batching is enabled, else the service.
+        """
+        service = self.get(model_size)
+        with self._lock:
+            return self._batchers.get(model_size, service)
+
+    def _evict_for(self, needed_mb):
+        # Caller holds self._lock. Models loading elsewhere count as resident.
+        while self.resident_mb() + sum(self._loading_mb.values()) + needed_mb > self.memory_budget_mb:
+            model_size = next((m for m in self._models if m not in self.pinned), None)
+            if model_size is None:
+                break  # Only pinned models left: load over budget rather than fail
+            del self._models[model_size]
+            self._load_times.pop(model_size, None)
+            self._status.pop(model_size, None)
+            batcher = self._batchers.pop(model_size, None)
+            if batcher:
+                # Queued requests finish; later ones bypass batching
+                threading.Thread(target=batcher.close, daemon=True).start()
+            self.evictions += 1
+            print(f"Evicted Whisper model {model_size} to stay within {self.memory_budget_mb} MB")
+
+    def resident_mb(self):
+        return sum(estimate_memory_mb(m, self.compute_type) for m in self._models)
+
+    def is_ready(self, model_size):
+        with self._lock:
+            return model_size in self._models
+
+    def status(self):
+        """Load state of every model that is resident, loading or failed."""
+        with self._lock:
+            return {name: dict(state) for name, state in self._status.items()}
+
+    def loaded(self):
+        """Resident model names, least recently used first."""
+        with self._lock:
+            return list(self._models)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": list(self._models),
+                "resident_mb": self.resident_mb(),
+                "memory_budget_mb": self.memory_budget_mb,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "load_seconds": dict(self._load_times),
+            }
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+
+def default_cache_dir():
+    """TTS_CACHE if set, else ~/.cache/audio-assistant/tts."""
+    return os.environ.get("TTS_CACHE") or os.path.join(os.path.expanduser("~"), ".cache", "audio-assistant", "tts")
+
+
+def phrase_key(backend, text, lang, voice):
+    """Content address of a synthesized phrase."""
+    return hashlib.sha256(json.dumps([backend, text, lang, voice]).encode()).hexdigest()
+
+
+class PhraseCache:
+    """
+    On-disk cache of synthesized audio, one file per phrase.
+
+    Files are sharded by the first two hex digits of their key
+    (`ab/abcdef....mp3`) and written atomically, so several processes can
+    share a directory. A file's modification time is its last use; once the
+    directory holds more than `max_bytes` the least recently used files are
+    deleted.
+    """
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024):
+        """
+        :param directory: Cache directory (default_cache_dir() if None).
+        :param max_bytes: Total size above which old phrases are evicted.
+        """
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        # Running total, rescanned from disk whenever it crosses the budget
+        self._bytes = sum(size for _, size, _ in self._files())
+
+    def _path(self, key, audio_format):
+        return os.path.join(self.directory, key[:2], f"{key}.{audio_format}")
+
+    def get(self, key, audio_format):
+        """
+        :return: Cached audio bytes, or None on a miss.
+        """
+        path = self._path(key, audio_format)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, audio_format, data):
+        """Store audio for key, evicting old phrases past max_bytes."""
+        path = self._path(key, audio_format)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # Overwriting a phrase replaces its bytes rather than adding to them
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._bytes += len(data) - replaced
+            over_budget = self._bytes > self.max_bytes
+        if over_budget:
+            self._evict()
+
+    def _files(self):
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # Evicted by another process
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _evict(self):
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._bytes = total
+            self.evictions += evicted
+
+    def stats(self):
+        files = self._files()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": self.directory,
+                "entries": len(files),
+                "bytes": sum(size for _, size, _ in files),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,239 @@
+import io
+import json
+import os
+import queue
+import threading
+import time
+
+import av
+import numpy as np
+
+from audio_stream import SAMPLE_RATE
+from session_store import SpillBuffer
+
+# format -> (container, encoder, encoder sample rate, file extension)
+RECORDING_FORMATS = {
+    "webm": ("webm", "libopus", 48000, "webm"),
+    "opus": ("ogg", "libopus", 48000, "opus"),
+    "mp3": ("mp3", "libmp3lame", SAMPLE_RATE, "mp3"),
+    "flac": ("flac", "flac", SAMPLE_RATE, "flac"),
+}
+
+# Formats a WebM/Opus upload is saved in without re-encoding: kept as is, or remuxed to Ogg
+PASSTHROUGH_FORMATS = ("webm", "opus")
+
+# Samples encoded per frame handed to PyAV
+_ENCODE_CHUNK = SAMPLE_RATE
+
+
+class SessionRecorder:
+    """
+    Collects what a session needs to be saved later: the decoded PCM as
+    int16 and/or the compressed upload for passthrough.
+
+    Both are held in SpillBuffers, so the per-chunk cost on the decoder and
+    socket reader is a memory copy; the expensive part (transcoding)
+    happens later on the RecordingWriter.
+    """
+
+    def __init__(self, keep_pcm=True, keep_compressed=False, spill_bytes=32 * 1024 * 1024):
+        """
+        :param spill_bytes: Per-stream size above which it moves to a
+            memory-mapped temp file.
+        """
+        self.pcm = SpillBuffer(spill_bytes) if keep_pcm else None
+        self.compressed = SpillBuffer(spill_bytes) if keep_compressed else None
+
+    def write_pcm(self, samples):
+        """Append decoded float32 samples (PCMBuffer on_append hook)."""
+        self.pcm.write((np.clip(samples, -1.0, 1.0) * 32767).astype("<i2"))
+
+    def write_compressed(self, data):
+        """Append a received chunk of the compressed stream, if kept."""
+        if self.compressed is not None:
+            self.compressed.write(data)
+
+    def discard(self):
+        for store in (self.pcm, self.compressed):
+            if store is not None:
+                store.close()
+
+
+class RecordingJob:
+    """A finished session waiting to be written to `save_folder`."""
+
+    def __init__(self, recorder, save_folder, filename_prefix, format, transcript="", segments=(), metadata=None):
+        """
+        :param recorder: SessionRecorder holding the session audio; no more
+            audio may be written to it.
+        :param format: One of RECORDING_FORMATS.
+        :param segments: Committed (start, end, text) with times in seconds.
+        :param metadata: Extra fields for the sidecar JSON (duration, model, ...).
+        """
+        self.recorder = recorder
+        self.save_folder = save_folder
+        self.filename_prefix = filename_prefix
+        self.format = format
+        self.transcript = transcript
+        self.segments = list(segments)
+        self.metadata = metadata or {}
+        # Named after the session end, as before the writer existed
+        self.timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
+
+
+def _unique_stem(folder, stem, extension):
+    candidate, n = stem, 1
+    while os.path.exists(os.path.join(folder, f"{candidate}.{extension}")):
+        candidate = f"{stem}_{n}"
+        n += 1
+    return candidate
+
+
+def transcode_pcm(pcm, output_path, format):
+    """
+    Encode 16 kHz mono int16 PCM into one of RECORDING_FORMATS, streaming it
+    through PyAV in one-second frames.
+    :param pcm: Bytes-like PCM, e.g. a SpillBuffer view (read without copying).
+    """
+    container, codec, rate, _ = RECORDING_FORMATS[format]
+    samples = np.frombuffer(pcm, dtype="<i2")
+    with av.open(output_path, "w", format=container) as output:
+        stream = output.add_stream(codec, rate=rate, layout="mono")
+        for pts in range(0, len(samples), _ENCODE_CHUNK):
+            chunk = samples[pts:pts + _ENCODE_CHUNK]
+            frame = av.AudioFrame.from_ndarray(chunk[None], format="s16", layout="mono")
+            frame.sample_rate = SAMPLE_RATE
+            frame.pts = pts
+            for packet in stream.encode(frame):
+                output.mux(packet)
+        for packet in stream.encode(None):
+            output.mux(packet)
+
+
+def remux_webm(data, output_path, format):
+    """
+    Copy the audio packets of a WebM upload into the container of one of
+    RECORDING_FORMATS, without decoding them. A truncated upload (the client
+    went away mid-cluster) keeps the packets that arrived whole.
+    :param data: Bytes-like WebM, e.g. a SpillBuffer view.
+    """
+    with av.open(io.BytesIO(data)) as source, av.open(output_path, "w", format=RECORDING_FORMATS[format][0]) as output:
+        audio = source.streams.audio[0]
+        stream = output.add_stream_from_template(audio)
+        for packet in source.demux(audio):
+            if packet.dts is None:
+                continue  # Demuxer flush packet
+            packet.stream = stream
+            output.mux(packet)
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.part"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class RecordingWriter:
+    """
+    Background queue that turns finished sessions into recording files.
+
+    Sessions hand over a RecordingJob and return immediately. A worker
+    thread copies the original WebM upload unchanged (or remuxes it into
+    Ogg for "opus") or transcodes the decoded PCM in-process, writes to a `.part` file that is renamed
+    into place, and adds a sidecar JSON with the transcript and segments.
+    """
+
+    def __init__(self, workers=1, index=None):
+        """
+        :param index: TranscriptIndex each written sidecar is added to, so
+            new recordings are searchable as soon as they are saved.
+        """
+        self.index = index
+        self.written = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"recording-writer-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job):
+        self._queue.put(job)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                path = self.write(job)
+                with self._lock:
+                    self.written += 1
+                print(f"Saved recording to {path}")
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                print(f"Failed to save recording: {e}")
+            finally:
+                job.recorder.discard()
+
+    def write(self, job):
+        """
+        Write one job synchronously.
+        :return: Path of the saved audio file.
+        """
+        os.makedirs(job.save_folder, exist_ok=True)
+        recorder = job.recorder
+        passthrough = recorder.compressed is not None
+        container, _, _, extension = RECORDING_FORMATS[job.format]
+        # Format: prefix_YYYY-MM-DD_HH-MM-SS.ext
+        stem = _unique_stem(job.save_folder, f"{job.filename_prefix}_{job.timestamp}", extension)
+        target = os.path.join(job.save_folder, f"{stem}.{extension}")
+        part = f"{target}.part"
+
+        try:
+            if passthrough and container == "webm":
+                with open(part, "wb") as f:
+                    f.write(recorder.compressed.view())
+            elif passthrough:
+                remux_webm(recorder.compressed.view(), part, job.format)
+            else:
+                transcode_pcm(recorder.pcm.view(), part, job.format)
+            os.replace(part, target)
+        finally:
+            if os.path.exists(part):
+                os.remove(part)
+
+        sidecar = os.path.join(job.save_folder, f"{stem}.json")
+        _write_json(sidecar, {
+            "audio": os.path.basename(target),
+            "format": extension,
+            "transcript": job.transcript,
+            "segments": [
+                {"start": round(start, 3), "end": round(end, 3), "text": text}
+                for start, end, text in job.segments
+            ],
+            **job.metadata,
+        })
+        if self.index is not None:
+            # The recording is saved either way; a failed index update is caught up by a scan
+            try:
+                self.index.add(sidecar)
+            except Exception as e:
+                print(f"Failed to index {sidecar}: {e}")
+        return target
+
+    def stats(self):
+        with self._lock:
+            return {"queued": self._queue.qsize(), "written": self.written, "failed": self.failed}
+
+    def close(self, timeout=None):
+        """Finish the queued recordings and stop the workers."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
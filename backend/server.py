@@ -1,12 +1,179 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from whisper_service import WhisperService
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from whisper_service import StreamingSession, StreamUpdate
+from vad import StreamingVAD
+from model_manager import ModelManager
+from audio_stream import PCMBuffer, SAMPLE_RATE, create_decoder
+from inference_pool import InferencePool
+from backpressure import ChunkCoalescer
+from settings import settings
+from tts_service import TTSService, create_backend
+from phrase_cache import PhraseCache
+from speech_stream import split_sentences, synthesize_in_order, encoded_stream
+from transcript_protocol import PROTOCOLS, TranscriptDiff
+from metrics import PipelineMetrics
+from recording import RECORDING_FORMATS, PASSTHROUGH_FORMATS, RecordingJob, RecordingWriter, SessionRecorder
+from worker_pool import RemoteTranscriber, WorkerPool
+from admission import PRIORITIES, AdmissionController, Rejected, SessionQuota, resolve_priority
+from transcript_index import TranscriptIndex
 import os
-import tempfile
 import asyncio
+import json
+import threading
 import time
 
-app = FastAPI()
+# Whisper models are loaded on demand and kept within a memory budget
+model_manager = ModelManager(
+    memory_budget_mb=settings.model_memory_budget_mb,
+    device="cpu",
+    compute_type="int8",
+    cpu_threads=settings.inference_cpu_threads,
+    num_workers=settings.inference_workers,
+    warmup=settings.model_warmup,
+    batch_max_size=settings.batch_max_size,
+    batch_max_wait=settings.batch_max_wait_ms / 1000,
+    # Readiness is reported for it, so it is never evicted
+    pinned=(settings.default_model,),
+)
+
+def preload_default_model():
+    # Using 'base' for faster testing, set DEFAULT_MODEL=large-v3-turbo for production if hardware allows
+    try:
+        model_manager.get(settings.default_model)
+    except Exception as e:
+        print(f"Failed to load default model {settings.default_model}: {e}")
+
+# Gateway mode (WORKER_SOCKETS or WORKER_PROCESSES): set at startup, None when inference is in-process
+worker_pool = None
+
+def create_worker_pool():
+    options = dict(timeout=settings.model_load_timeout_s, health_interval=settings.worker_health_interval_ms / 1000)
+    if settings.worker_sockets:
+        return WorkerPool.connect(settings.worker_sockets, **options)
+    return WorkerPool.spawn(settings.worker_processes, **options)
+
+@asynccontextmanager
+async def lifespan(app):
+    global worker_pool, transcript_index
+    if settings.transcript_index_enabled:
+        transcript_index = await asyncio.get_running_loop().run_in_executor(None, TranscriptIndex)
+        recording_writer.index = transcript_index
+    if settings.worker_sockets or settings.worker_processes:
+        # Inference runs in the worker processes; no model is loaded here
+        worker_pool = create_worker_pool()
+        await asyncio.get_running_loop().run_in_executor(None, worker_pool.start)
+    else:
+        # Load the default model in the background so the server accepts connections right away;
+        # sessions that arrive before it is ready wait for it (see websocket_endpoint)
+        threading.Thread(target=preload_default_model, name="model-preload", daemon=True).start()
+    yield
+    if worker_pool is not None:
+        await asyncio.get_running_loop().run_in_executor(None, worker_pool.close)
+    # Let recordings of sessions that just ended finish writing
+    await asyncio.get_running_loop().run_in_executor(None, recording_writer.close)
+    if transcript_index is not None:
+        recording_writer.index = None
+        transcript_index.close()
+        transcript_index = None
+
+pool_workers = settings.inference_workers
+if settings.batch_max_size > 1:
+    # Workers block while their request waits in a batch, so a full batch needs one each
+    pool_workers = max(pool_workers, settings.batch_max_size)
+
+# Decoding and inference run here so they never block the event loop
+inference_pool = InferencePool(workers=pool_workers)
+
+# Transcripts of saved recordings, searchable on /search and with `cli.py search`;
+# opened at startup (see lifespan) if TRANSCRIPT_INDEX_ENABLED
+transcript_index = None
+
+# Saved recordings are transcoded and written here, after their session has returned
+recording_writer = RecordingWriter(workers=settings.recording_writers)
+
+# Limits how many sessions run at once and how much each one may use
+admission = AdmissionController(
+    max_sessions=settings.max_sessions,
+    queue_size=settings.admission_queue_size,
+    queue_timeout=settings.admission_timeout_s,
+    degrade_at=settings.degrade_at_sessions,
+    degraded_model=settings.degraded_model,
+    degraded_pass_interval=settings.degraded_pass_interval_ms / 1000,
+)
+
+# Sentences are synthesized on their own pool so speech never waits behind transcription
+tts_pool = InferencePool(workers=settings.tts_workers)
+phrase_cache = None
+tts_backend = None
+
+def tts_service(lang="en", voice=None):
+    """TTSService on the configured backend, created on first use."""
+    global phrase_cache, tts_backend
+    if tts_backend is None:
+        tts_backend = create_backend(settings.tts_backend)
+        phrase_cache = PhraseCache()
+    return TTSService(lang=lang, backend=tts_backend, voice=voice, cache=phrase_cache)
+
+AUDIO_MEDIA_TYPES = {"mp3": "audio/mpeg", "wav": "audio/wav"}
+
+# Inference passes run vs. skipped by the VAD gate, across all sessions
+pass_counters = {"executed": 0, "skipped": 0, "finalized": 0}
+pass_counters_lock = threading.Lock()
+
+def count_pass(result):
+    # Passes run on inference pool threads, so the increments need the lock
+    with pass_counters_lock:
+        pass_counters[result] += 1
+
+def pass_counts():
+    """A consistent copy of pass_counters, for /metrics and /stats."""
+    with pass_counters_lock:
+        return dict(pass_counters)
+
+# Per-stage timings and throughput, exposed on /metrics
+pipeline_metrics = PipelineMetrics(enabled=settings.metrics_enabled)
+pipeline_metrics.registry.counter(
+    "audio_assistant_passes_total", "Streaming passes by outcome", ("result",),
+    function=lambda: {(result,): count for result, count in pass_counts().items()},
+)
+pipeline_metrics.registry.gauge(
+    "audio_assistant_inference_queue_depth", "Inference jobs waiting for a worker",
+    function=lambda: inference_pool.stats()["queued"],
+)
+pipeline_metrics.registry.gauge(
+    "audio_assistant_inference_active", "Inference jobs running",
+    function=lambda: inference_pool.stats()["active"],
+)
+pipeline_metrics.registry.gauge(
+    "audio_assistant_recording_queue_depth", "Recordings waiting to be written",
+    function=lambda: recording_writer.stats()["queued"],
+)
+pipeline_metrics.registry.gauge(
+    "audio_assistant_workers_healthy", "Healthy inference workers (gateway mode)",
+    function=lambda: sum(w.healthy for w in worker_pool.workers) if worker_pool else 0,
+)
+
+pipeline_metrics.registry.gauge(
+    "audio_assistant_admission_queue_depth", "Sessions waiting for a slot",
+    function=lambda: admission.stats()["queued"],
+)
+pipeline_metrics.registry.counter(
+    "audio_assistant_sessions_rejected_total", "Sessions turned away by admission control", ("reason",),
+    function=lambda: {(reason,): count for reason, count in admission.rejected.items()},
+)
+pipeline_metrics.registry.counter(
+    "audio_assistant_sessions_degraded_total", "Sessions admitted on a smaller model or slower pass rate",
+    function=lambda: admission.degraded,
+)
+pipeline_metrics.registry.counter(
+    "audio_assistant_quota_exceeded_total", "Sessions ended for going over a quota", ("quota",),
+    function=lambda: {(quota,): count for quota, count in admission.quota_exceeded.items()},
+)
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,91 +183,489 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Whisper Service
-# Using 'base' for faster testing, change to 'large-v3-turbo' for production if hardware allows
-whisper_service = WhisperService(model_size="base", device="cpu", compute_type="int8")
-
 @app.get("/")
 async def root():
     return {"message": "Whisper Backend is running"}
 
-import ffmpeg
-import numpy as np
+@app.get("/stats")
+async def stats():
+    return {
+        "inference_pool": inference_pool.stats(),
+        "models": model_manager.stats(),
+        "passes": pass_counts(),
+        "recording_writer": recording_writer.stats(),
+        "tts_pool": tts_pool.stats(),
+        "phrase_cache": phrase_cache.stats() if phrase_cache else None,
+        "workers": worker_pool.stats() if worker_pool else None,
+        "admission": admission.stats(),
+    }
 
-import shutil
-from pathlib import Path
+@app.get("/metrics")
+async def metrics():
+    """Pipeline metrics in the Prometheus text format."""
+    if not pipeline_metrics.enabled:
+        return JSONResponse(status_code=404, content={"error": "Metrics are disabled (METRICS_ENABLED=0)"})
+    return PlainTextResponse(pipeline_metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/search")
+async def search(q: str, limit: int = Query(20, ge=1, le=200), phrase: bool = True):
+    """
+    Find a phrase in the transcripts of saved recordings. Each hit is a
+    segment with its audio file and start/end offsets in milliseconds.
+    """
+    if transcript_index is None:
+        return JSONResponse(status_code=404, content={"error": "The transcript index is disabled (TRANSCRIPT_INDEX_ENABLED=0)"})
+    try:
+        hits = await asyncio.get_running_loop().run_in_executor(None, transcript_index.search, q, limit, phrase)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return {"query": q, "hits": [hit._asdict() for hit in hits]}
+
+@app.get("/health/ready")
+async def ready():
+    """
+    Ready once the default model is loaded; reports per-model load state and timings.
+    As a gateway, ready once any inference worker is healthy.
+    """
+    if worker_pool is not None:
+        return JSONResponse(
+            status_code=200 if worker_pool.ready else 503,
+            content={"ready": worker_pool.ready, "default_model": settings.default_model, **worker_pool.stats()},
+        )
+    is_ready = model_manager.is_ready(settings.default_model)
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "ready": is_ready,
+            "default_model": settings.default_model,
+            "models": model_manager.status(),
+        },
+    )
+
+class SpeakRequest(BaseModel):
+    text: str
+    lang: str = "en"
+    voice: str = None
+
+@app.post("/speak")
+async def speak(request: SpeakRequest):
+    """
+    Stream synthesized speech as one chunked audio response. Sentences are
+    synthesized concurrently and sent in order as each one is ready.
+    """
+    try:
+        tts = tts_service(request.lang, request.voice)
+    except (RuntimeError, ValueError) as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
+    sentences = split_sentences(request.text)
+    if not sentences:
+        return JSONResponse(status_code=400, content={"error": "No text to speak"})
+    return StreamingResponse(
+        encoded_stream(synthesize_in_order(tts, sentences, tts_pool), tts.audio_format),
+        media_type=AUDIO_MEDIA_TYPES.get(tts.audio_format, "application/octet-stream"),
+    )
+
+@app.websocket("/ws/speak")
+async def speak_websocket(websocket: WebSocket):
+    """
+    Text in, audio out. Each request is a text frame, either plain text or
+    {"text": ..., "lang": ..., "voice": ...}. Every sentence is answered with
+    a {"type": "sentence"} message followed by a binary frame holding that
+    sentence as a complete audio file, then {"type": "done"}.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive_text()
+            request = {"text": message}
+            if message.startswith("{"):
+                try:
+                    request = json.loads(message)
+                except ValueError:
+                    pass
+
+            try:
+                tts = tts_service(request.get("lang", "en"), request.get("voice"))
+            except (RuntimeError, ValueError) as e:
+                await websocket.send_text(json.dumps({"type": "error", "message": str(e)}))
+                continue
+            text = request.get("text")
+            sentences = split_sentences(text) if isinstance(text, str) else []
+            if not sentences:
+                await websocket.send_text(json.dumps({"type": "error", "message": "No text to speak"}))
+                continue
+
+            start = time.perf_counter()
+            try:
+                async for index, sentence, audio in synthesize_in_order(tts, sentences, tts_pool):
+                    await websocket.send_text(json.dumps({
+                        "type": "sentence",
+                        "index": index,
+                        "text": sentence,
+                        "format": tts.audio_format,
+                    }))
+                    await websocket.send_bytes(audio)
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                await websocket.send_text(json.dumps({"type": "error", "message": f"Synthesis failed: {e}"}))
+                continue
+            await websocket.send_text(json.dumps({
+                "type": "done",
+                "sentences": len(sentences),
+                "elapsed_ms": int((time.perf_counter() - start) * 1000),
+            }))
+    except WebSocketDisconnect:
+        pass
+
+def run_pass(stream, telemetry):
+    """Run one streaming pass, timing it against the audio it covers."""
+    window = len(stream.buffer) / SAMPLE_RATE
+    start = time.perf_counter()
+    update = stream.process()
+    telemetry.inference(time.perf_counter() - start, window)
+    return update
+
+def transcribe_chunk(decoder, stream, vad, parts, telemetry):
+    """
+    Decode received chunks into the session buffer and run a streaming pass
+    if they brought new speech. Blocking; runs on an inference pool worker.
+    """
+    since = decoder.buffer.end
+    with telemetry.stage("decode"):
+        # Fed one by one: each bare Opus packet must reach the decoder on its own
+        for data in parts:
+            decoder.feed(data)
+        decoder.wait_for_output(since)
+    telemetry.received((decoder.buffer.end - since) / SAMPLE_RATE, len(parts))
+
+    if len(decoder.buffer) == 0:
+        # Not enough data to decode yet, which is expected at the start
+        return None
+
+    if vad is None:
+        count_pass("executed")
+        return run_pass(stream, telemetry)
+
+    with telemetry.stage("vad"):
+        activity = vad.update(decoder.buffer)
+    if not activity.speech and not activity.end_of_utterance:
+        # Nothing new was said: skip inference and let silence fall out of the window
+        count_pass("skipped")
+        if activity.silent_until is not None:
+            stream.discard_silence(activity.silent_until)
+        return None
+
+    # Transcribe the current window
+    count_pass("executed")
+    update = run_pass(stream, telemetry)
+    if activity.end_of_utterance:
+        # The speaker paused: commit the tentative tail right away
+        count_pass("finalized")
+        final = stream.flush()
+        update = StreamUpdate(f"{update.committed} {final.committed}".strip(), "", update.segments + final.segments)
+    return update
+
+def decode_remaining(decoder, parts):
+    """
+    Feed chunks that never got a pass to the decoder, so a recording built
+    from decoded PCM ends where the client stopped. Blocking.
+    """
+    for data in parts:
+        decoder.feed(data)
 
 @app.websocket("/ws/transcribe")
-async def websocket_endpoint(websocket: WebSocket, save_folder: str = None, filename_prefix: str = "recording", format: str = "opus"):
+async def websocket_endpoint(websocket: WebSocket, save_folder: str = None, filename_prefix: str = "recording", format: str = "opus", model: str = None, encoding: str = None, protocol: str = None, priority: str = "normal", token: str = None):
     await websocket.accept()
-    print(f"WebSocket connection accepted. Save Folder: {save_folder}, Prefix: {filename_prefix}, Format: {format}")
+    model = model or settings.default_model
+    print(f"WebSocket connection accepted. Save Folder: {save_folder}, Prefix: {filename_prefix}, Format: {format}, Model: {model}, Encoding: {encoding}")
+
+    if model not in settings.allowed_models:
+        await websocket.send_text(json.dumps({
+            "type": "error",
+            "message": f"Unknown model '{model}'. Available: {', '.join(settings.allowed_models)}",
+        }))
+        await websocket.close(code=1008)
+        return
 
-    # Create a unique temporary file for this session
-    # Use .webm as container for Opus (default from MediaRecorder)
-    session_file = tempfile.NamedTemporaryFile(delete=False, suffix=".webm")
-    session_file_path = session_file.name
-    session_file.close() # Close handle so we can append in loop
+    if priority not in PRIORITIES:
+        await websocket.send_text(json.dumps({
+            "type": "error",
+            "message": f"Unknown priority '{priority}'. Available: {', '.join(PRIORITIES)}",
+        }))
+        await websocket.close(code=1008)
+        return
+    # Raising priority takes a token from PRIORITY_TOKENS; anyone may lower their own
+    priority = resolve_priority(priority, token, settings.priority_tokens)
 
+    async def queued(position):
+        await websocket.send_text(json.dumps({"type": "status", "state": "queued", "position": position}))
+
+    # Wait for a session slot; when the server is full, turn the session away instead of slowing everyone down
+    try:
+        ticket = await admission.admit(model, priority, on_queued=queued)
+    except Rejected as e:
+        await websocket.send_text(json.dumps({"type": "error", "code": e.code, "message": str(e)}))
+        await websocket.close(code=1013)
+        return
     try:
+        if ticket.degraded:
+            await websocket.send_text(json.dumps({
+                "type": "degraded",
+                "model": ticket.model,
+                "requested_model": model,
+                "min_pass_interval_ms": int(ticket.min_pass_interval * 1000),
+            }))
+        await transcribe_session(websocket, ticket, save_folder, filename_prefix, format, encoding, protocol)
+    finally:
+        admission.release(ticket)
+
+async def transcribe_session(websocket, ticket, save_folder, filename_prefix, format, encoding, protocol):
+    """Run an admitted /ws/transcribe session until the client disconnects."""
+    model = ticket.model
+    if worker_pool is not None:
+        # Gateway: windows are transcribed by the session's inference worker
+        if not worker_pool.ready:
+            await websocket.send_text(json.dumps({"type": "error", "message": "No inference workers are available, try again later"}))
+            await websocket.close(code=1013)
+            return
+        transcriber = RemoteTranscriber(worker_pool, model)
+    else:
+        # Loads (and warms up) the model on first use without blocking the event loop.
+        # While it loads the session waits; audio sent meanwhile is read once it is ready.
+        if not model_manager.is_ready(model):
+            await websocket.send_text(json.dumps({"type": "status", "state": "loading_model", "model": model}))
+        try:
+            transcriber = await asyncio.wait_for(
+                asyncio.get_running_loop().run_in_executor(None, model_manager.transcriber, model),
+                timeout=settings.model_load_timeout_s,
+            )
+        except asyncio.TimeoutError:
+            await websocket.send_text(json.dumps({"type": "error", "message": f"Model '{model}' is still loading, try again later"}))
+            await websocket.close(code=1013)
+            return
+        except Exception as e:
+            await websocket.send_text(json.dumps({"type": "error", "message": f"Failed to load model '{model}': {e}"}))
+            await websocket.close(code=1011)
+            return
+
+    # Without an encoding query parameter, the first message may be a JSON config
+    # ({"type": "config", "encoding": "pcm_s16le"}); audio in it means WebM
+    first_chunk = None
+    options = {}
+    if encoding is None:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        if message.get("text") is not None:
+            try:
+                options = json.loads(message["text"])
+                encoding = options.get("encoding", "webm")
+            except (ValueError, AttributeError):
+                await websocket.send_text(json.dumps({"type": "error", "message": "Expected a JSON config message"}))
+                await websocket.close(code=1003)
+                return
+        else:
+            first_chunk = message.get("bytes")
+            encoding = "webm"
+
+    # "json" sends partial/final diffs, "text" the whole transcript after every pass
+    protocol = protocol or options.get("protocol", "json")
+    if protocol not in PROTOCOLS:
+        await websocket.send_text(json.dumps({
+            "type": "error",
+            "message": f"Unknown protocol '{protocol}'. Available: {', '.join(PROTOCOLS)}",
+        }))
+        await websocket.close(code=1003)
+        return
+
+    # Recording: WebM uploads saved as webm/opus are kept as received; anything else
+    # is transcoded later from the decoded PCM, so nothing is decoded twice
+    recorder = None
+    if save_folder:
+        if format not in RECORDING_FORMATS:
+            await websocket.send_text(json.dumps({
+                "type": "error",
+                "message": f"Unknown recording format '{format}'. Available: {', '.join(RECORDING_FORMATS)}",
+            }))
+            await websocket.close(code=1003)
+            return
+        passthrough = encoding == "webm" and format in PASSTHROUGH_FORMATS
+        recorder = SessionRecorder(
+            keep_pcm=not passthrough,
+            keep_compressed=passthrough,
+            spill_bytes=settings.recording_spill_mb * 1024 * 1024,
+        )
+
+    # One long-lived decoder per session: each chunk only costs its own decode time.
+    # Raw PCM and bare Opus packets are decoded in-process, without ffmpeg.
+    buffer = PCMBuffer(on_append=recorder.write_pcm if recorder and recorder.pcm is not None else None)
+    try:
+        decoder = create_decoder(encoding, buffer=buffer, sample_rate=options.get("sample_rate"), channels=options.get("channels", 1))
+    except ValueError as e:
+        if recorder:
+            recorder.discard()
+        await websocket.send_text(json.dumps({"type": "error", "message": str(e)}))
+        await websocket.close(code=1003)
+        return
+
+    # Sliding-window transcription: only uncommitted audio is re-transcribed
+    stream = StreamingSession(
+        transcriber,
+        decoder.buffer,
+        word_timestamps=protocol == "json" and settings.word_timestamps,
+    )
+    diff = TranscriptDiff()
+    # Gates inference on new speech and finalizes at the end of each utterance
+    vad = StreamingVAD(end_of_utterance_ms=settings.vad_end_of_utterance_ms) if settings.vad_enabled else None
+
+    # Chunks received while a pass is in flight are merged into the next pass
+    pending = ChunkCoalescer(max_chunks=settings.session_queue_depth)
+    telemetry = pipeline_metrics.session()
+    closing = asyncio.Event()
+
+    quota = SessionQuota(
+        max_seconds=settings.max_session_seconds,
+        max_buffered_bytes=settings.max_buffered_mb * 1024 * 1024,
+        inference_share=settings.session_inference_share_pct / 100,
+        pool_workers=pool_workers,
+        min_pass_interval=ticket.min_pass_interval,
+    )
+
+    def buffered_bytes():
+        held = pending.nbytes + len(decoder.buffer) * 4  # float32 window
+        if recorder:
+            held += sum(len(store) for store in (recorder.pcm, recorder.compressed) if store is not None)
+        return held
+
+    async def receive_audio():
+        data = first_chunk
         while True:
             # Receive audio data (bytes)
-            data = await websocket.receive_bytes()
+            if data is None:
+                data = await websocket.receive_bytes()
+
+            with telemetry.stage("receive"):
+                # Keep the upload when the recording is saved as received
+                if recorder:
+                    recorder.write_compressed(data)
+
+            with telemetry.stage("backpressure"):
+                # Waits (and stops reading the socket) while too many chunks are pending
+                await pending.put(data)
+            data = None
 
-            # Append to session file
-            with open(session_file_path, "ab") as f:
-                f.write(data)
+            exceeded = quota.check(decoder.buffer.end / SAMPLE_RATE, buffered_bytes())
+            if exceeded:
+                name, message = exceeded
+                admission.exceeded(name)
+                await websocket.send_text(json.dumps({"type": "error", "code": "quota_exceeded", "quota": name, "message": message}))
+                await websocket.close(code=1008)
+                return
 
+    async def transcribe_audio():
+        while True:
+            # Over its inference share (or degraded): the next pass waits and takes whatever arrived meanwhile
+            delay = quota.pass_delay()
+            if delay > 0:
+                admission.throttled_passes += 1
+                try:
+                    await asyncio.wait_for(closing.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            audio = await pending.take()
+            if audio is None:
+                return
+            telemetry.observe("queue", audio.lag)
             try:
-                # Decode the full audio file to PCM float32 using ffmpeg
-                # This handles the WebM container and ensures Whisper gets clean raw audio
-                out, _ = (
-                    ffmpeg.input(session_file_path)
-                    .output('-', format='f32le', acodec='pcm_f32le', ac=1, ar='16000')
-                    .run(cmd='ffmpeg', capture_stdout=True, capture_stderr=True)
-                )
-
-                audio_data = np.frombuffer(out, np.float32)
-
-                # Transcribe
-                text = whisper_service.transcribe(audio_data)
-
-                # Send back full text
-                if text:
-                    await websocket.send_text(text)
-            except ffmpeg.Error as e:
-                # ffmpeg might fail if the file is incomplete or too short, which is expected at the start
-                # print(f"ffmpeg error: {e.stderr.decode()}")
-                pass
+                started = time.monotonic()
+                update = await inference_pool.run(transcribe_chunk, decoder, stream, vad, audio.parts, telemetry)
+                quota.record_pass(started, time.monotonic() - started)
+
+                with telemetry.stage("send"):
+                    if update and protocol == "json":
+                        for message in diff.messages(update):
+                            await websocket.send_text(json.dumps(message))
+                    # Legacy clients: full text (committed text plus tentative tail)
+                    elif update and (update.committed or update.tentative):
+                        await websocket.send_text(stream.text)
+
+                # Tell the client when inference is falling behind its chunk rate
+                lag_ms = int(audio.lag * 1000)
+                if audio.chunks > 1 or lag_ms > settings.lag_report_ms:
+                    await websocket.send_text(json.dumps({
+                        "type": "lag",
+                        "lag_ms": lag_ms,
+                        "coalesced_chunks": audio.chunks,
+                    }))
             except Exception as e:
                 print(f"Error during transcription: {e}")
 
+    decoder_closed = None
+
+    def close_decoder():
+        # Flushes the decoder's tail into the buffer; started once, however the session ends
+        nonlocal decoder_closed
+        if decoder_closed is None:
+            decoder_closed = asyncio.get_running_loop().run_in_executor(None, decoder.close)
+        return decoder_closed
+
+    async def finish_recording(remaining):
+        # The pending audio still belongs in the recording and its transcript
+        await inference_pool.run(decode_remaining, decoder, remaining)
+        await close_decoder()
+        # Transcribe what was decoded since the last pass (including what closing drained),
+        # then commit the tentative tail so the saved transcript is complete
+        try:
+            await inference_pool.run(run_pass, stream, telemetry)
+        except Exception as e:
+            print(f"Error during final transcription pass: {e}")
+        stream.flush()
+
+    transcription_task = asyncio.create_task(transcribe_audio())
+
+    try:
+        await receive_audio()
     except WebSocketDisconnect:
         print("WebSocket disconnected")
     except Exception as e:
         print(f"Error in websocket: {e}")
     finally:
-        # Save file if requested
-        if save_folder and os.path.exists(session_file_path):
-            try:
-                # Ensure directory exists
-                target_path = Path(save_folder)
-                target_path.mkdir(parents=True, exist_ok=True)
-
-                # Generate filename with date
-                # Format: prefix_YYYY-MM-DD_HH-MM-SS.webm
-                timestamp_str = time.strftime("%Y-%m-%d_%H-%M-%S")
-                filename = f"{filename_prefix}_{timestamp_str}.webm"
-                target_file = target_path / filename
-
-                # If user requested mp3, we should convert.
-                # For now, we just copy the webm.
-                # TODO: Implement conversion if format=='mp3'
-
-                shutil.copy2(session_file_path, target_file)
-                print(f"Saved recording to {target_file}")
-            except Exception as e:
-                print(f"Failed to save recording: {e}")
+        # No more passes for pending chunks; let the in-flight pass finish before touching the decoder
+        closing.set()
+        remaining = pending.close()
+        try:
+            await transcription_task
+            if recorder:
+                try:
+                    await asyncio.wait_for(finish_recording(remaining), settings.final_pass_timeout_s)
+                except asyncio.TimeoutError:
+                    print("Final transcription pass timed out, saving the transcript committed so far")
+                except Exception as e:
+                    print(f"Error finishing the recording: {e}")
+            else:
+                await close_decoder()
+        finally:
+            close_decoder()
+            # Even if the handler is cancelled, so active_sessions and worker pins stay accurate
+            if worker_pool is not None:
+                transcriber.close()
+            summary = telemetry.close()
+            if summary and settings.metrics_session_summary:
+                print(f"Session summary: {json.dumps(summary)}")
 
-        # Clean up session file
-        if os.path.exists(session_file_path):
-            os.remove(session_file_path)
+            # Hand the recording to the background writer (also when cancelled); the session returns right away
+            if recorder:
+                recording_writer.submit(RecordingJob(
+                    recorder,
+                    save_folder,
+                    filename_prefix,
+                    format,
+                    transcript=stream.committed_text,
+                    segments=stream.committed_segments,
+                    metadata={
+                        "duration_s": round(buffer.end / SAMPLE_RATE, 3),
+                        "model": model,
+                        "encoding": encoding,
+                    },
+                ))
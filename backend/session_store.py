@@ -0,0 +1,73 @@
+import mmap
+import tempfile
+
+
+class SpillBuffer:
+    """
+    Append-only byte store for a session's audio, kept in memory.
+
+    Data lives in a bytearray (amortized growth, one memcpy per write and no
+    syscalls) until it passes `spill_bytes`; it then moves to an mmap of an
+    unlinked temp file, so hour-long sessions do not pin their whole
+    recording in RAM while writes stay plain memory copies. The mapping
+    grows by doubling.
+    """
+
+    def __init__(self, spill_bytes=32 * 1024 * 1024):
+        """
+        :param spill_bytes: Size above which the data moves to a memory-mapped
+            temp file (None keeps it in memory).
+        """
+        self.spill_bytes = spill_bytes
+        self._data = bytearray()
+        self._file = None
+        self._map = None
+        self._length = 0
+
+    @property
+    def spilled(self):
+        return self._map is not None
+
+    def __len__(self):
+        return self._length
+
+    def write(self, data):
+        """Append any contiguous bytes-like object (bytes, memoryview, numpy array)."""
+        data = memoryview(data).cast("B")
+        if self._map is None:
+            self._data += data
+            self._length = len(self._data)
+            if self.spill_bytes is not None and self._length > self.spill_bytes:
+                self._spill()
+            return
+        needed = self._length + len(data)
+        if needed > len(self._map):
+            self._map.resize(max(needed, len(self._map) * 2))
+        self._map[self._length:needed] = data
+        self._length = needed
+
+    def _spill(self):
+        self._file = tempfile.TemporaryFile(prefix="session-", suffix=".spill")
+        self._file.truncate(max(self._length * 2, mmap.PAGESIZE))
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._map[:self._length] = self._data
+        self._data = bytearray()
+
+    def view(self):
+        """
+        Zero-copy view of the data written so far. Release it before the
+        next write.
+        """
+        if self._map is None:
+            return memoryview(self._data)
+        return memoryview(self._map)[:self._length]
+
+    def close(self):
+        """Free the memory and the spill file."""
+        self._data = bytearray()
+        self._length = 0
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+            self._file = None
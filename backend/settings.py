@@ -0,0 +1,133 @@
+import os
+
+
+def _int_env(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _list_env(name, default):
+    value = os.environ.get(name)
+    return [v.strip() for v in value.split(",") if v.strip()] if value else default
+
+
+def _map_env(name, default):
+    """Comma-separated key:value pairs."""
+    pairs = {}
+    for item in _list_env(name, []):
+        key, separator, value = item.rpartition(":")
+        if not separator or not key.strip() or not value.strip():
+            raise ValueError(f"{name}: expected key:value, got '{item}'")
+        pairs[key.strip()] = value.strip()
+    return pairs or default
+
+
+class Settings:
+    """
+    Server settings, read from environment variables.
+
+    INFERENCE_CPU_THREADS: CTranslate2 intra-op threads per inference call.
+    INFERENCE_WORKERS: Number of concurrent decode/inference jobs.
+    SESSION_QUEUE_DEPTH: Audio chunks a session may buffer while a pass is in
+        flight; they are coalesced into the next pass.
+    LAG_REPORT_MS: Pass latency above which the client is sent a lag message.
+    BATCH_MAX_SIZE: Sessions transcribed together in one batched pass
+        (1 disables cross-session batching).
+    BATCH_MAX_WAIT_MS: How long a pass waits for other sessions to join.
+    DEFAULT_MODEL: Whisper model used when a session does not pick one.
+    ALLOWED_MODELS: Comma-separated models sessions may select.
+    MODEL_MEMORY_BUDGET_MB: Estimated memory resident models may use before
+        the least recently used one is evicted.
+    MODEL_WARMUP: Run a warm-up inference after loading a model (1/0).
+    MODEL_LOAD_TIMEOUT_S: How long a session waits for its model to load.
+    VAD_ENABLED: Skip inference on silence and finalize at pauses (1/0).
+    VAD_END_OF_UTTERANCE_MS: Silence after speech that finalizes the
+        pending transcript.
+    WORD_TIMESTAMPS: Attach word timings and probabilities to streamed
+        transcript segments (1/0).
+    METRICS_ENABLED: Time pipeline stages and serve /metrics (1/0).
+    METRICS_SESSION_SUMMARY: Log a per-stage timing summary when a
+        session ends (1/0).
+    TTS_BACKEND: Speech synthesis engine for /speak and /ws/speak
+        (gtts, espeak or piper).
+    TTS_WORKERS: Sentences synthesized concurrently.
+    RECORDING_WRITERS: Threads transcoding and writing saved recordings.
+    RECORDING_SPILL_MB: Size at which a session's recording moves from memory
+        to a memory-mapped temp file.
+    FINAL_PASS_TIMEOUT_S: How long a recorded session's last decode and pass
+        may take after the client disconnects; the recording is saved with
+        the transcript committed so far if they take longer.
+    TRANSCRIPT_INDEX_ENABLED: Add saved recordings' transcripts to the search
+        index (TRANSCRIPT_INDEX) as they are written (1/0).
+    WORKER_SOCKETS: Comma-separated Unix sockets of running inference
+        workers (inference_worker.py); when set, this server is a gateway
+        and runs no models itself.
+    WORKER_PROCESSES: Inference worker processes this server starts and
+        routes to as a gateway (0 runs inference in-process).
+    WORKER_HEALTH_INTERVAL_MS: How often the gateway pings its workers.
+    MAX_SESSIONS: Transcription sessions running at once (0 = unlimited);
+        more wait in the admission queue.
+    ADMISSION_QUEUE_SIZE: Sessions that may wait for a slot.
+    ADMISSION_TIMEOUT_S: How long a session waits for a slot before it is
+        rejected.
+    DEGRADE_AT_SESSIONS: Running sessions above which new ones are admitted
+        degraded (0 = never).
+    DEGRADED_MODEL: Model degraded sessions use instead of the one they
+        asked for.
+    DEGRADED_PASS_INTERVAL_MS: Minimum time between passes of a degraded
+        session.
+    MAX_SESSION_SECONDS: Audio a session may send (0 = unlimited).
+    MAX_BUFFERED_MB: Audio a session may hold in memory or temp files,
+        including its recording (0 = unlimited).
+    SESSION_INFERENCE_SHARE_PCT: Share of the inference pool one session may
+        use before its passes are spaced out (0 = unlimited).
+    PRIORITY_TOKENS: Comma-separated token:priority pairs (high, normal or
+        low); sessions presenting a token get its admission priority, others
+        at most normal.
+    """
+
+    def __init__(self):
+        cpus = os.cpu_count() or 1
+        self.inference_cpu_threads = _int_env("INFERENCE_CPU_THREADS", min(4, cpus))
+        self.inference_workers = _int_env("INFERENCE_WORKERS", max(1, cpus // self.inference_cpu_threads))
+        self.session_queue_depth = _int_env("SESSION_QUEUE_DEPTH", 8)
+        self.lag_report_ms = _int_env("LAG_REPORT_MS", 1000)
+        self.batch_max_size = _int_env("BATCH_MAX_SIZE", 1)
+        self.batch_max_wait_ms = _int_env("BATCH_MAX_WAIT_MS", 30)
+        self.default_model = os.environ.get("DEFAULT_MODEL", "base")
+        self.allowed_models = _list_env("ALLOWED_MODELS", ["base", "small", "large-v3-turbo"])
+        if self.default_model not in self.allowed_models:
+            self.allowed_models.append(self.default_model)
+        self.model_memory_budget_mb = _int_env("MODEL_MEMORY_BUDGET_MB", 4096)
+        self.model_warmup = bool(_int_env("MODEL_WARMUP", 1))
+        self.model_load_timeout_s = _int_env("MODEL_LOAD_TIMEOUT_S", 120)
+        self.vad_enabled = bool(_int_env("VAD_ENABLED", 1))
+        self.vad_end_of_utterance_ms = _int_env("VAD_END_OF_UTTERANCE_MS", 700)
+        self.word_timestamps = bool(_int_env("WORD_TIMESTAMPS", 1))
+        self.metrics_enabled = bool(_int_env("METRICS_ENABLED", 1))
+        self.metrics_session_summary = bool(_int_env("METRICS_SESSION_SUMMARY", 0))
+        self.tts_backend = os.environ.get("TTS_BACKEND", "gtts")
+        self.tts_workers = _int_env("TTS_WORKERS", 4)
+        self.recording_writers = _int_env("RECORDING_WRITERS", 1)
+        self.recording_spill_mb = _int_env("RECORDING_SPILL_MB", 32)
+        self.final_pass_timeout_s = _int_env("FINAL_PASS_TIMEOUT_S", 30)
+        self.transcript_index_enabled = bool(_int_env("TRANSCRIPT_INDEX_ENABLED", 1))
+        self.worker_sockets = _list_env("WORKER_SOCKETS", [])
+        self.worker_processes = _int_env("WORKER_PROCESSES", 0)
+        self.worker_health_interval_ms = _int_env("WORKER_HEALTH_INTERVAL_MS", 2000)
+        self.max_sessions = _int_env("MAX_SESSIONS", 0)
+        self.admission_queue_size = _int_env("ADMISSION_QUEUE_SIZE", 16)
+        self.admission_timeout_s = _int_env("ADMISSION_TIMEOUT_S", 30)
+        self.degrade_at_sessions = _int_env("DEGRADE_AT_SESSIONS", 0)
+        self.degraded_model = os.environ.get("DEGRADED_MODEL", "base")
+        self.degraded_pass_interval_ms = _int_env("DEGRADED_PASS_INTERVAL_MS", 2000)
+        self.max_session_seconds = _int_env("MAX_SESSION_SECONDS", 0)
+        self.max_buffered_mb = _int_env("MAX_BUFFERED_MB", 0)
+        self.session_inference_share_pct = _int_env("SESSION_INFERENCE_SHARE_PCT", 0)
+        self.priority_tokens = _map_env("PRIORITY_TOKENS", {})
+        for token, priority in self.priority_tokens.items():
+            if priority not in ("high", "normal", "low"):
+                raise ValueError(f"PRIORITY_TOKENS: unknown priority '{priority}'")
+
+
+settings = Settings()
@@ -0,0 +1,102 @@
+import asyncio
+import io
+import re
+import struct
+import wave
+
+# Sentence ends: terminal punctuation, optionally followed by a closing quote or bracket, then whitespace
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|(?<=[.!?…][\"')\]])\s+")
+_CLAUSE_END = re.compile(r"(?<=[,;:])\s+")
+
+
+def split_sentences(text, max_chars=250, min_chars=20):
+    """
+    Split text into sentences for incremental synthesis.
+
+    Sentences longer than `max_chars` are split further at clause breaks,
+    then at word boundaries; fragments shorter than `min_chars` are merged
+    into the next one so each synthesis request carries enough text to be
+    worth its overhead.
+    """
+    pieces = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        for clause in _CLAUSE_END.split(sentence):
+            while len(clause) > max_chars:
+                cut = clause.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                pieces.append(clause[:cut].strip())
+                clause = clause[cut:].strip()
+            if clause:
+                pieces.append(clause)
+
+    merged = []
+    for piece in pieces:
+        if merged and len(merged[-1]) < min_chars:
+            merged[-1] = f"{merged[-1]} {piece}"
+        else:
+            merged.append(piece)
+    return merged
+
+
+async def synthesize_in_order(tts, sentences, pool):
+    """
+    Synthesize sentences concurrently on `pool` and yield them in order as
+    soon as each one (and every one before it) is ready, so the first audio
+    is out after one sentence rather than the whole text.
+
+    :param tts: TTSService.
+    :param pool: InferencePool the synthesis runs on.
+    :return: Async iterator of (index, sentence, audio bytes).
+    """
+    tasks = [asyncio.ensure_future(pool.run(tts.synthesize, sentence)) for sentence in sentences]
+    try:
+        for index, task in enumerate(tasks):
+            yield index, sentences[index], await task
+    finally:
+        # The consumer went away: drop sentences that have not started yet
+        for task in tasks:
+            task.cancel()
+
+
+def wav_frames(data):
+    """
+    Split a WAV file into its parameters and raw PCM frames.
+    :return: (nchannels, sampwidth, framerate), frames
+    """
+    with wave.open(io.BytesIO(data)) as wav:
+        return (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()), wav.readframes(wav.getnframes())
+
+
+def streaming_wav_header(nchannels, sampwidth, framerate):
+    """
+    RIFF header for a WAV stream of unknown length. The size fields are set
+    to the maximum, which players treat as "read until the end".
+    """
+    block_align = nchannels * sampwidth
+    return b"".join([
+        b"RIFF", struct.pack("<I", 0xFFFFFFFF), b"WAVE",
+        b"fmt ", struct.pack("<IHHIIHH", 16, 1, nchannels, framerate, framerate * block_align, block_align, sampwidth * 8),
+        b"data", struct.pack("<I", 0xFFFFFFFF),
+    ])
+
+
+async def encoded_stream(sentences, audio_format):
+    """
+    Join per-sentence audio from synthesize_in_order() into one continuous
+    stream. MP3 frames concatenate as they are; WAV sentences are unwrapped
+    to PCM behind a single streaming header.
+    """
+    async for index, _, audio in sentences:
+        if audio_format != "wav":
+            yield audio
+            continue
+        params, frames = wav_frames(audio)
+        if index == 0:
+            yield streaming_wav_header(*params)
+        yield frames
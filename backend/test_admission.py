@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, Rejected, SessionQuota, resolve_priority
+
+
+def test_waiting_sessions_are_admitted_by_priority():
+    async def scenario():
+        admission = AdmissionController(max_sessions=1, queue_size=4, queue_timeout=5)
+        first = await admission.admit("base")
+        positions = []
+
+        async def queued(position):
+            positions.append(position)
+
+        low = asyncio.create_task(admission.admit("base", "low", on_queued=queued))
+        await asyncio.sleep(0)
+        high = asyncio.create_task(admission.admit("base", "high", on_queued=queued))
+        await asyncio.sleep(0)
+        assert admission.stats()["queued"] == 2 and not high.done()
+
+        admission.release(first)
+        second = await asyncio.wait_for(high, 1)
+        assert not low.done()
+        admission.release(second)
+        third = await asyncio.wait_for(low, 1)
+        admission.release(third)
+        return admission, positions, second
+
+    admission, positions, second = asyncio.run(scenario())
+    # The high-priority session went ahead of the low one already waiting
+    assert positions == [1, 1]
+    assert second.priority == "high" and second.waited > 0
+    assert admission.stats()["active"] == 0 and admission.admitted == 3
+
+
+def test_full_queue_rejects_preempts_and_times_out():
+    async def scenario():
+        admission = AdmissionController(max_sessions=1, queue_size=1, queue_timeout=0.05)
+        running = await admission.admit("base")
+        low = asyncio.create_task(admission.admit("base", "low"))
+        await asyncio.sleep(0)
+
+        # Same or lower priority than the waiter: turned away at once
+        with pytest.raises(Rejected) as busy:
+            await admission.admit("base", "low")
+        # Higher priority: takes the low waiter's place, then times out itself
+        with pytest.raises(Rejected) as timed_out:
+            await admission.admit("base", "normal")
+        with pytest.raises(Rejected) as preempted:
+            await low
+        admission.release(running)
+        return admission, busy.value, timed_out.value, preempted.value
+
+    admission, busy, timed_out, preempted = asyncio.run(scenario())
+    assert (busy.code, timed_out.code, preempted.code) == ("server_busy", "queue_timeout", "preempted")
+    stats = admission.stats()
+    assert stats["rejected"] == {"server_busy": 1, "preempted": 1, "queue_timeout": 1}
+    assert stats["active"] == 0 and stats["queued"] == 0
+
+
+def test_sessions_past_the_soft_limit_are_degraded():
+    async def scenario():
+        admission = AdmissionController(degrade_at=1, degraded_model="base", degraded_pass_interval=2.0)
+        return admission, await admission.admit("large-v3-turbo"), await admission.admit("large-v3-turbo")
+
+    admission, first, second = asyncio.run(scenario())
+    assert (first.degraded, first.model, first.min_pass_interval) == (False, "large-v3-turbo", 0.0)
+    assert (second.degraded, second.model, second.min_pass_interval) == (True, "base", 2.0)
+    assert admission.stats()["degraded"] == 1
+
+    admission.release(second)
+    admission.release(second)  # Releasing twice frees one slot only
+    assert admission.active == 1
+
+
+def test_session_quota_limits_and_inference_share():
+    quota = SessionQuota(max_seconds=60, max_buffered_bytes=1000)
+    assert quota.check(59.0, 1000) is None
+    assert quota.check(61.0, 0)[0] == "session_seconds"
+    assert quota.check(1.0, 1001)[0] == "buffered_bytes"
+
+    # Half of one worker, with one second of burst
+    quota = SessionQuota(inference_share=0.5, pool_workers=1, burst=2.0)
+    quota._refilled = 100.0
+    assert quota.pass_delay(now=100.0) == 0
+    quota.record_pass(100.0, 3.0)
+    # 2 s behind after a 3 s pass: 4 s at half a worker to pay it back
+    assert quota.pass_delay(now=100.0) == pytest.approx(4.0)
+    assert quota.pass_delay(now=103.0) == pytest.approx(1.0)
+    assert quota.pass_delay(now=104.0) == 0
+
+    spaced = SessionQuota(min_pass_interval=2.0)
+    spaced.record_pass(10.0, 0.1)
+    assert spaced.pass_delay(now=11.5) == pytest.approx(0.5)
+    assert spaced.pass_delay(now=12.5) == 0
+
+
+def test_only_configured_tokens_raise_priority():
+    tokens = {"s3cret": "high", "batch-key": "low"}
+    assert resolve_priority("high", tokens=tokens) == "normal"
+    assert resolve_priority("high", "wrong", tokens) == "normal"
+    assert resolve_priority("low") == "low"
+    assert resolve_priority("normal", "s3cret", tokens) == "high"
+    assert resolve_priority("high", "batch-key", tokens) == "low"
+
+
+def test_priority_tokens_are_parsed_and_validated(monkeypatch):
+    from settings import Settings
+
+    monkeypatch.setenv("PRIORITY_TOKENS", "s3cret:high, batch:key:low")
+    assert Settings().priority_tokens == {"s3cret": "high", "batch:key": "low"}
+
+    for value, message in [("s3cret", "got 's3cret'"), ("s3cret:", "got 's3cret:'"), ("s3cret:urgent", "unknown priority 'urgent'")]:
+        monkeypatch.setenv("PRIORITY_TOKENS", value)
+        with pytest.raises(ValueError, match=f"PRIORITY_TOKENS: .*{message}"):
+            Settings()
@@ -0,0 +1,131 @@
+import shutil
+import subprocess
+
+import av
+import numpy as np
+import pytest
+
+from audio_stream import SAMPLE_RATE, PCMBuffer, StreamingDecoder, RawPCMDecoder, OpusPacketDecoder, create_decoder
+
+
+def test_pcm_buffer_keeps_absolute_offsets():
+    buffer = PCMBuffer(initial_capacity=4)
+    buffer.append(np.arange(10, dtype=np.float32))
+    assert buffer.start == 0
+    assert buffer.end == 10
+
+    buffer.trim(6)
+    assert buffer.start == 6
+    assert len(buffer) == 4
+    np.testing.assert_array_equal(buffer.read(), [6, 7, 8, 9])
+
+    buffer.append(np.array([10, 11], dtype=np.float32))
+    np.testing.assert_array_equal(buffer.read(8, 11), [8, 9, 10])
+    # Reads before the trimmed region are clamped
+    np.testing.assert_array_equal(buffer.read(0, 7), [6])
+
+
+def test_pcm_buffer_trim_and_append_cycles_match_reference():
+    buffer = PCMBuffer(initial_capacity=8)
+    reference = np.zeros(0, dtype=np.float32)
+    start = 0
+    rng = np.random.default_rng(0)
+    for step in range(200):
+        samples = rng.random(int(rng.integers(1, 12)), dtype=np.float32)
+        buffer.append(samples)
+        reference = np.concatenate([reference, samples])
+        if step % 3 == 0:
+            upto = buffer.end - int(rng.integers(0, 6))
+            buffer.trim(upto)
+            reference = reference[max(0, upto - start):]
+            start = buffer.start
+        np.testing.assert_array_equal(buffer.read(), reference)
+    # Trimmed space is reused, so capacity tracks the held audio, not the total
+    assert len(buffer._data) <= 256
+
+
+def test_pcm_buffer_wait_for_times_out_without_data():
+    buffer = PCMBuffer()
+    assert buffer.wait_for(0, timeout=0.05) == 0
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_streaming_decoder_decodes_chunks_incrementally(tmp_path):
+    source = tmp_path / "tone.webm"
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", "sine=frequency=440:duration=5",
+            "-ar", "48000", "-c:a", "libopus", str(source),
+        ],
+        check=True,
+    )
+    data = source.read_bytes()
+    chunk_size = len(data) // 5
+
+    decoder = StreamingDecoder()
+    try:
+        ends = []
+        for i in range(5):
+            since = decoder.buffer.end
+            decoder.feed(data[i * chunk_size:(i + 1) * chunk_size if i < 4 else None])
+            ends.append(decoder.wait_for_output(since, timeout=2.0))
+        # Output grows with every chunk instead of arriving only at the end
+        assert ends[0] > 0
+        assert ends == sorted(ends)
+    finally:
+        decoder.close()
+
+    assert abs(decoder.buffer.end - 5 * SAMPLE_RATE) < SAMPLE_RATE * 0.1
+
+
+def test_raw_pcm_decoder_reassembles_split_samples():
+    samples = np.array([0, 16384, -16384, 32767], dtype="<i2")
+    data = samples.tobytes()
+    decoder = RawPCMDecoder(sample_format="pcm_s16le")
+    # Split in the middle of the second sample
+    decoder.feed(data[:3])
+    decoder.feed(data[3:])
+    np.testing.assert_allclose(decoder.buffer.read(), samples / 32768.0)
+
+    decoder = RawPCMDecoder(sample_format="pcm_f32le")
+    decoder.feed(np.array([0.25, -0.5], dtype="<f4").tobytes())
+    np.testing.assert_array_equal(decoder.buffer.read(), [0.25, -0.5])
+
+
+def test_create_decoder_rejects_resampled_pcm():
+    with pytest.raises(ValueError):
+        create_decoder("pcm_s16le", sample_rate=48000)
+    with pytest.raises(ValueError):
+        create_decoder("flac")
+
+
+def encode_opus(audio, rate=48000, frame=960):
+    encoder = av.CodecContext.create("libopus", "w")
+    encoder.sample_rate = rate
+    encoder.layout = "mono"
+    encoder.format = "s16"
+    encoder.open()
+    packets = []
+    for i in range(0, len(audio) - frame + 1, frame):
+        pcm = (audio[i:i + frame] * 32767).astype(np.int16)[None]
+        audio_frame = av.AudioFrame.from_ndarray(pcm, format="s16", layout="mono")
+        audio_frame.sample_rate = rate
+        audio_frame.pts = i
+        packets += [bytes(packet) for packet in encoder.encode(audio_frame)]
+    return packets
+
+
+def test_opus_packet_decoder_decodes_bare_packets():
+    t = np.arange(48000) / 48000
+    packets = encode_opus((0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32))
+
+    decoder = OpusPacketDecoder()
+    for packet in packets:
+        decoder.feed(packet)
+    decoder.close()
+
+    audio = decoder.buffer.read()
+    # One second at 48 kHz comes out as (almost) one second at 16 kHz
+    assert abs(len(audio) - SAMPLE_RATE) < SAMPLE_RATE * 0.05
+    assert 0.15 < np.sqrt(np.mean(audio[SAMPLE_RATE // 10:] ** 2)) < 0.25
@@ -0,0 +1,42 @@
+import asyncio
+
+from backpressure import ChunkCoalescer
+
+
+def test_chunks_arriving_during_a_pass_are_coalesced():
+    async def scenario():
+        pending = ChunkCoalescer(max_chunks=8)
+        await pending.put(b"a")
+        first = await pending.take()
+
+        # Three chunks arrive while the first pass is "in flight"
+        for data in (b"b", b"c", b"d"):
+            await pending.put(data)
+        second = await pending.take()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert (first.data, first.chunks) == (b"a", 1)
+    assert (second.data, second.chunks) == (b"bcd", 3)
+    assert second.lag >= 0
+
+
+def test_reader_waits_when_full_and_close_wakes_everyone():
+    async def scenario():
+        pending = ChunkCoalescer(max_chunks=2)
+        await pending.put(b"a")
+        await pending.put(b"b")
+
+        blocked = asyncio.create_task(pending.put(b"c"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        taken = await pending.take()
+        await asyncio.wait_for(blocked, timeout=1)
+
+        pending.close()
+        return taken, await pending.take()
+
+    taken, after_close = asyncio.run(scenario())
+    assert taken.data == b"ab"
+    assert after_close is None
@@ -0,0 +1,55 @@
+import json
+import os
+import shutil
+from types import SimpleNamespace
+
+import batch
+from batch import completed_files, find_audio_files, run_batch
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "test_stt_sample.wav")
+
+
+class FakeService:
+    def transcribe_segments(self, audio, language="en"):
+        return [
+            SimpleNamespace(start=0.0, end=1.5, text=" And so,"),
+            SimpleNamespace(start=1.5, end=3.0, text=" my fellow Americans"),
+        ]
+
+
+def test_find_audio_files_from_directory_and_manifest(tmp_path):
+    (tmp_path / "nested").mkdir()
+    for name in ["b.webm", "a.wav", "nested/c.mp3", "notes.txt"]:
+        (tmp_path / name).write_bytes(b"")
+    assert find_audio_files(str(tmp_path)) == [
+        str(tmp_path / "a.wav"), str(tmp_path / "b.webm"), str(tmp_path / "nested" / "c.mp3"),
+    ]
+
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# nightly\nnested/c.mp3\n\n/abs/d.wav\n")
+    assert find_audio_files(str(manifest)) == [str(tmp_path / "nested" / "c.mp3"), "/abs/d.wav"]
+
+
+def test_transcribe_file_reports_segments_and_timings(monkeypatch):
+    monkeypatch.setattr(batch, "_service", FakeService())
+    record = batch._transcribe_file(SAMPLE)
+    assert record["text"] == "And so, my fellow Americans"
+    assert record["segments"][1] == {"start": 1.5, "end": 3.0, "text": "my fellow Americans"}
+    assert abs(record["duration"] - 11.0) < 0.1
+    assert abs(record["rtf"] - record["timings"]["total_s"] / record["duration"]) < 1e-3
+
+    assert "error" in batch._transcribe_file(__file__)
+
+
+def test_completed_files_are_skipped_but_failures_retried(tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_text(
+        json.dumps({"file": "a.wav", "text": "hi"}) + "\n"
+        + json.dumps({"file": "b.wav", "error": "boom"}) + "\n"
+        + '{"file": "c.wa'  # Cut off by an interrupted run
+    )
+    assert completed_files(str(output)) == {"a.wav"}
+
+    # Nothing left to do: no worker processes are started
+    summary = run_batch(["a.wav"], str(output), workers=4)
+    assert (summary["total"], summary["skipped"], summary["transcribed"]) == (1, 1, 0)
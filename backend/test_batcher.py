@@ -0,0 +1,97 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+from faster_whisper.transcribe import Segment
+
+import batcher as batcher_module
+from audio_stream import SAMPLE_RATE
+from batcher import MicroBatcher
+
+
+class FakePipeline:
+    """Returns one segment per clip, labelled with the window's audio value."""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, clip_timestamps, **kwargs):
+        self.calls.append(len(clip_timestamps))
+        segments = []
+        for i, clip in enumerate(clip_timestamps):
+            value = int(audio[int(clip["start"] * SAMPLE_RATE)])
+            segments.append(Segment(
+                id=i, seek=0, start=round(clip["start"], 3), end=round(clip["end"], 3),
+                text=f" session{value}", tokens=[], avg_logprob=0.0, compression_ratio=1.0,
+                no_speech_prob=0.0, words=None, temperature=0.0,
+            ))
+        return iter(segments), None
+
+
+def whole_window_is_speech(audio, options):
+    return [{"start": 0, "end": len(audio)}]
+
+
+def test_concurrent_requests_share_one_pass_and_fan_out(monkeypatch):
+    monkeypatch.setattr(batcher_module, "get_speech_timestamps", whole_window_is_speech)
+    batcher = MicroBatcher(SimpleNamespace(model=None), max_batch=4, max_wait=0.5)
+    batcher.pipeline = FakePipeline()
+
+    results = {}
+
+    def submit(value, seconds):
+        audio = np.full(int(seconds * SAMPLE_RATE), value, dtype=np.float32)
+        results[value] = batcher.transcribe_segments(audio)
+
+    threads = [threading.Thread(target=submit, args=(value, value + 1)) for value in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    # A full batch is dispatched without waiting for the deadline
+    assert batcher.pipeline.calls == [4]
+    assert batcher.stats()["batches"] == 1
+    for value in range(4):
+        (segment,) = results[value]
+        assert segment.text == f" session{value}"
+        # Times are relative to the submitting session's window
+        assert segment.start == 0
+        assert abs(segment.end - (value + 1)) < 0.01
+
+
+def test_silent_windows_skip_inference(monkeypatch):
+    monkeypatch.setattr(batcher_module, "get_speech_timestamps", lambda audio, options: [])
+    batcher = MicroBatcher(SimpleNamespace(model=None), max_batch=2, max_wait=0.01)
+    batcher.pipeline = FakePipeline()
+
+    assert batcher.transcribe_segments(np.zeros(SAMPLE_RATE, dtype=np.float32)) == []
+    batcher.close()
+    assert batcher.pipeline.calls == []
+
+
+def test_prompted_requests_bypass_the_batch_and_clips_are_capped(monkeypatch):
+    monkeypatch.setattr(batcher_module, "get_speech_timestamps", whole_window_is_speech)
+    prompts = []
+    service = SimpleNamespace(
+        model=None,
+        transcribe_segments=lambda audio, initial_prompt=None, **kwargs: prompts.append(initial_prompt) or [],
+    )
+    batcher = MicroBatcher(service, max_batch=4, max_wait=0.01, max_batch_size=2)
+    batch_sizes = []
+    pipeline = FakePipeline()
+    batcher.pipeline = SimpleNamespace(
+        transcribe=lambda audio, clip_timestamps, batch_size, **kwargs: (
+            batch_sizes.append(batch_size) or pipeline.transcribe(audio, clip_timestamps)
+        ),
+    )
+
+    # The prompt reaches the model instead of being dropped in a batch
+    assert batcher.transcribe_segments(np.zeros(SAMPLE_RATE, dtype=np.float32), initial_prompt="Earlier text") == []
+    assert prompts == ["Earlier text"] and batcher.stats()["requests"] == 0
+
+    results = batcher._transcribe_batch([np.full(SAMPLE_RATE, value, dtype=np.float32) for value in range(3)], "en")
+    batcher.close()
+    assert batch_sizes == [2]
+    assert [segment.text for (segment,) in results] == [" session0", " session1", " session2"]
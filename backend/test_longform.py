@@ -0,0 +1,93 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+from faster_whisper import decode_audio
+
+from audio_stream import SAMPLE_RATE
+from longform import _Stitcher, iter_audio, split_chunks, transcribe_long
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "test_stt_sample.wav")
+
+
+def numbered_speech(seconds):
+    """'Speech' whose level encodes the second it belongs to, so a fake model can read it back."""
+    return np.repeat(0.01 + 0.001 * np.arange(seconds), SAMPLE_RATE).astype(np.float32)
+
+
+class FakeService:
+    """Hears a word 'w<n>' in every loud second of audio whose level encodes n."""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe_segments(self, audio, language="en", word_timestamps=False):
+        self.calls.append((len(audio), word_timestamps))
+        # Runs of a constant level; a word cut short by the chunk edge is not recognized
+        edges = np.flatnonzero(np.diff(audio)) + 1
+        words = []
+        for start, end in zip(np.concatenate(([0], edges)), np.concatenate((edges, [len(audio)]))):
+            if audio[start] > 0.005 and end - start >= 0.9 * SAMPLE_RATE:
+                n = int(round((audio[start] - 0.01) / 0.001))
+                words.append(SimpleNamespace(start=start / SAMPLE_RATE + 0.1, end=end / SAMPLE_RATE - 0.1, word=f" w{n}"))
+        return [
+            SimpleNamespace(start=w.start, end=w.end, text=w.word, words=[w] if word_timestamps else None)
+            for w in words
+        ]
+
+
+def test_iter_audio_decodes_in_blocks():
+    blocks = list(iter_audio(SAMPLE, block_seconds=2))
+    assert len(blocks) > 3
+    assert all(len(block) < 3 * SAMPLE_RATE for block in blocks)
+    np.testing.assert_allclose(np.concatenate(blocks), decode_audio(SAMPLE, sampling_rate=SAMPLE_RATE), atol=1e-4)
+
+
+def test_chunks_are_cut_in_pauses_or_overlap_in_continuous_speech():
+    pause = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    audio = np.concatenate([numbered_speech(9), pause, numbered_speech(20)])
+    chunks = list(split_chunks(iter_audio(audio, block_seconds=1), chunk_seconds=8, search_seconds=2,
+                               overlap_seconds=1, use_silero=False))
+
+    # The first cut lands in the pause, the next ones in speech with overlap
+    assert chunks[0].overlap_after == 0 and 9 * SAMPLE_RATE <= len(chunks[0].audio) <= 10 * SAMPLE_RATE
+    assert chunks[1].overlap_before == 0 and chunks[1].overlap_after == SAMPLE_RATE
+    assert chunks[2].overlap_before == SAMPLE_RATE
+    # Chunks tile the audio exactly
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous.offset + len(previous.audio) - previous.overlap_after == chunk.offset
+    assert chunks[-1].offset + len(chunks[-1].audio) == len(audio)
+    np.testing.assert_array_equal(chunks[2].audio, audio[chunks[2].offset:chunks[2].offset + len(chunks[2].audio)])
+
+
+def test_stitched_transcript_has_global_times_and_no_repeats():
+    audio = numbered_speech(40)
+    service = FakeService()
+    segments = list(transcribe_long(audio, workers=0, service=service, chunk_seconds=7,
+                                    overlap_seconds=2, use_silero=False))
+
+    assert [s.text for s in segments] == [f"w{n}" for n in range(40)]
+    assert [s.start for s in segments] == [round(n + 0.1, 3) for n in range(40)]
+    # Word timings are only requested for chunks that overlap a neighbour
+    assert len(service.calls) > 4 and all(word_timestamps for _, word_timestamps in service.calls)
+
+
+def test_chunks_cut_in_pauses_need_no_word_timings():
+    pause = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    speech = numbered_speech(20)
+    audio = np.concatenate([part for start in range(0, 20, 5) for part in (speech[start * SAMPLE_RATE:(start + 5) * SAMPLE_RATE], pause)])
+    service = FakeService()
+    segments = list(transcribe_long(audio, workers=0, service=service, chunk_seconds=8, use_silero=False))
+
+    assert [s.text for s in segments] == [f"w{n}" for n in range(20)]
+    assert [s.start for s in segments] == [round(n + 0.1 + n // 5, 3) for n in range(20)]
+    assert not any(word_timestamps for _, word_timestamps in service.calls)
+
+
+def test_words_heard_on_both_sides_of_an_overlap_are_dropped_once():
+    stitcher = _Stitcher()
+    stitcher.add(0, [(0.0, 2.0, "Ask not what", ())])
+    words = ((1.4, 1.6, " what"), (1.7, 2.2, " your"), (2.3, 2.8, " country"))
+    assert stitcher.add(SAMPLE_RATE, [(1.4, 2.8, "what your country", words)]) == [(1.7, 2.8, "your country")]
+    # Without an overlap nothing is compared
+    assert stitcher.add(0, [(3.0, 3.5, "country", ())]) == [(3.0, 3.5, "country")]
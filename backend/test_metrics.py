@@ -0,0 +1,54 @@
+from metrics import PipelineMetrics, Registry
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    counter = registry.counter("requests_total", "Requests", ("route",))
+    counter.inc(labels=("/a",))
+    counter.inc(2, labels=("/a",))
+    registry.gauge("depth", "Queue depth", function=lambda: 3)
+    histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 4.0):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/a"} 3' in lines
+    assert "depth 3" in lines
+    # Buckets are cumulative and end with +Inf
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_sum 5.25" in lines
+    assert "latency_seconds_count 4" in lines
+
+
+def test_session_metrics_feed_histograms_and_summary():
+    pipeline = PipelineMetrics()
+    session = pipeline.session()
+    with session.stage("decode"):
+        pass
+    session.received(2.0, chunks=2)
+    session.inference(0.5, audio_seconds=2.0)
+    session.observe("send", 0.001)
+
+    text = pipeline.registry.render()
+    assert 'audio_assistant_stage_seconds_count{stage="inference"} 1' in text
+    assert 'audio_assistant_audio_seconds_total{kind="received"} 2.0' in text
+    assert "audio_assistant_active_sessions 1" in text
+
+    summary = session.close()
+    assert list(summary["stages"]) == ["decode", "inference", "send"]
+    assert summary["rtf"] == 0.25
+    assert summary["passes"] == 1
+    assert "audio_assistant_active_sessions 0" in pipeline.registry.render()
+
+
+def test_disabled_metrics_record_nothing():
+    pipeline = PipelineMetrics(enabled=False)
+    session = pipeline.session()
+    with session.stage("decode"):
+        pass
+    session.inference(0.5, audio_seconds=2.0)
+    assert session.close() is None
+    assert "_count" not in pipeline.registry.render()
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import model_manager as model_manager_module
+from model_manager import ModelManager, estimate_memory_mb
+
+
+class FakeService:
+    created = []
+
+    def __init__(self, model_size, **kwargs):
+        time.sleep(0.05)  # Loading takes a while
+        self.model_size = model_size
+        self.warmed_up = False
+        self.warmup_seconds = None
+        FakeService.created.append(model_size)
+
+    def warm_up(self):
+        self.warmed_up = True
+        self.warmup_seconds = 0.0
+        return self.warmup_seconds
+
+
+def make_manager(monkeypatch, budget_mb):
+    FakeService.created = []
+    monkeypatch.setattr(model_manager_module, "WhisperService", FakeService)
+    return ModelManager(memory_budget_mb=budget_mb)
+
+
+def test_models_load_lazily_once_and_are_warmed_up(monkeypatch):
+    manager = make_manager(monkeypatch, budget_mb=4096)
+    assert manager.loaded() == []
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.get("base"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert FakeService.created == ["base"]
+    assert all(service is results[0] for service in results)
+    assert results[0].warmed_up
+    assert manager.is_ready("base")
+    assert manager.status()["base"]["state"] == "ready"
+
+
+def test_least_recently_used_model_is_evicted_over_budget(monkeypatch):
+    budget = estimate_memory_mb("base") + estimate_memory_mb("small")
+    manager = make_manager(monkeypatch, budget_mb=budget)
+
+    manager.get("base")
+    manager.get("small")
+    manager.get("base")  # base is now the most recently used
+    manager.get("tiny")
+
+    assert manager.loaded() == ["base", "tiny"]
+    assert manager.stats()["evictions"] == 1
+    assert manager.resident_mb() <= budget
+
+
+def test_room_is_made_before_loading_and_pinned_models_stay(monkeypatch):
+    budget = estimate_memory_mb("base") + estimate_memory_mb("small")
+    manager = make_manager(monkeypatch, budget_mb=budget)
+    manager.pinned = {"base"}
+    resident_while_loading = []
+
+    class MeasuringService(FakeService):
+        def __init__(self, model_size, **kwargs):
+            resident_while_loading.append(manager.resident_mb())
+            super().__init__(model_size, **kwargs)
+
+    monkeypatch.setattr(model_manager_module, "WhisperService", MeasuringService)
+    manager.get("base")
+    manager.get("small")
+    manager.get("tiny")  # small goes before tiny loads, although base is older
+
+    assert manager.loaded() == ["base", "tiny"]
+    assert resident_while_loading[-1] + estimate_memory_mb("tiny") <= budget
+
+    # Nothing left to evict but the pinned model: it stays, over budget
+    manager.get("large-v3")
+    assert manager.loaded() == ["base", "large-v3"]
+    assert manager.stats()["evictions"] == 2
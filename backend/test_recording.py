@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import av
+import numpy as np
+import pytest
+from faster_whisper.audio import decode_audio
+
+from audio_stream import SAMPLE_RATE, PCMBuffer
+from recording import RecordingJob, RecordingWriter, SessionRecorder, transcode_pcm
+
+
+def tone(seconds, frequency=440):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def record_pcm(seconds):
+    recorder = SessionRecorder()
+    buffer = PCMBuffer(on_append=recorder.write_pcm)
+    # Several appends, as the decoder delivers them
+    for part in np.array_split(tone(seconds), 7):
+        buffer.append(part)
+    return recorder
+
+
+def test_pcm_buffer_on_append_sees_every_sample():
+    seen = []
+    buffer = PCMBuffer(initial_capacity=4, on_append=seen.append)
+    buffer.append(np.arange(3, dtype=np.float32))
+    buffer.trim(2)
+    buffer.append(np.arange(3, 8, dtype=np.float32))
+    np.testing.assert_array_equal(np.concatenate(seen), np.arange(8))
+
+
+@pytest.mark.parametrize("format, extension", [("mp3", "mp3"), ("flac", "flac"), ("opus", "opus"), ("webm", "webm")])
+def test_writer_transcodes_pcm(tmp_path, format, extension):
+    recorder = record_pcm(2.0)
+    job = RecordingJob(recorder, str(tmp_path), "rec", format, transcript="hello", segments=[(0.0, 1.25, "hello")])
+    path = RecordingWriter(workers=0).write(job)
+
+    assert path.endswith(f".{extension}")
+    assert not any(name.endswith(".part") for name in os.listdir(tmp_path))
+    decoded = decode_audio(path, sampling_rate=SAMPLE_RATE)
+    # Encoder padding may add a few ms
+    assert abs(len(decoded) / SAMPLE_RATE - 2.0) < 0.1
+
+    with open(path[: -len(extension)] + "json") as f:
+        sidecar = json.load(f)
+    assert sidecar["audio"] == os.path.basename(path)
+    assert sidecar["transcript"] == "hello"
+    assert sidecar["segments"] == [{"start": 0.0, "end": 1.25, "text": "hello"}]
+    recorder.discard()
+
+
+def test_writer_keeps_webm_upload_unchanged(tmp_path):
+    recorder = SessionRecorder(keep_pcm=False, keep_compressed=True)
+    recorder.write_compressed(b"\x1aE\xdf\xa3chunk-1")
+    recorder.write_compressed(b"chunk-2")
+    job = RecordingJob(recorder, str(tmp_path), "rec", "webm", metadata={"model": "base"})
+
+    path = RecordingWriter(workers=0).write(job)
+    assert path.endswith(".webm")
+    with open(path, "rb") as f:
+        assert f.read() == b"\x1aE\xdf\xa3chunk-1chunk-2"
+    with open(path[:-4] + "json") as f:
+        assert json.load(f)["model"] == "base"
+    recorder.discard()
+
+
+def test_writer_remuxes_webm_upload_into_ogg_for_opus(tmp_path):
+    source = record_pcm(2.0)
+    transcode_pcm(source.pcm.view(), str(tmp_path / "upload.webm"), "webm")
+    source.discard()
+    recorder = SessionRecorder(keep_pcm=False, keep_compressed=True)
+    with open(tmp_path / "upload.webm", "rb") as f:
+        recorder.write_compressed(f.read())
+    job = RecordingJob(recorder, str(tmp_path / "saved"), "rec", "opus")
+
+    path = RecordingWriter(workers=0).write(job)
+    assert path.endswith(".opus")
+    with av.open(path) as container:
+        assert container.format.name == "ogg"
+        assert container.streams.audio[0].codec_context.name == "opus"
+    assert abs(len(decode_audio(path, sampling_rate=SAMPLE_RATE)) / SAMPLE_RATE - 2.0) < 0.1
+    recorder.discard()
+
+
+def test_writer_queue_writes_and_cleans_up(tmp_path):
+    writer = RecordingWriter()
+    recorders = [record_pcm(0.5) for _ in range(2)]
+    for recorder in recorders:
+        writer.submit(RecordingJob(recorder, str(tmp_path), "rec", "flac"))
+    # Unknown format: counted as failed, audio still released
+    broken = record_pcm(0.1)
+    writer.submit(RecordingJob(broken, str(tmp_path), "rec", "wma"))
+    writer.close()
+
+    assert writer.stats() == {"queued": 0, "written": 2, "failed": 1}
+    # Same-second sessions get distinct names
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".flac")]) == 2
+    for recorder in recorders + [broken]:
+        assert len(recorder.pcm) == 0
+
+
+class SlowTranscriber:
+    """Takes a while per pass and says how many samples its window had."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+
+    def transcribe_segments(self, audio, language="en", initial_prompt=None, word_timestamps=False):
+        time.sleep(self.delay)
+        return [SimpleNamespace(start=0.0, end=len(audio) / SAMPLE_RATE, text=f" samples {len(audio)}", words=None)]
+
+
+def record_session(tmp_path, monkeypatch, transcriber, sent):
+    """Stream `sent` to a recorded session and return the job handed to the writer."""
+    from fastapi.testclient import TestClient
+    from settings import settings
+
+    import server
+
+    monkeypatch.setattr(settings, "vad_enabled", False)
+    monkeypatch.setattr(server.model_manager, "is_ready", lambda model: True)
+    monkeypatch.setattr(server.model_manager, "transcriber", lambda model: transcriber)
+    jobs = []
+    submitted = threading.Event()
+    monkeypatch.setattr(server.recording_writer, "submit", lambda job: (jobs.append(job), submitted.set()))
+
+    url = f"/ws/transcribe?encoding=pcm_s16le&format=flac&save_folder={tmp_path}"
+    with TestClient(server.app).websocket_connect(url) as ws:
+        # Much faster than a pass, so chunks are still pending when the client leaves
+        for part in np.array_split(sent, 30):
+            ws.send_bytes((part * 32767).astype("<i2").tobytes())
+        ws.close()
+        assert submitted.wait(10)
+
+    [job] = jobs
+    return job
+
+
+def test_session_recording_keeps_audio_still_pending_at_disconnect(tmp_path, monkeypatch):
+    sent = tone(3.0)
+    job = record_session(tmp_path, monkeypatch, SlowTranscriber(), sent)
+
+    assert job.metadata["duration_s"] == 3.0
+    path = RecordingWriter(workers=0).write(job)
+    assert len(decode_audio(path, sampling_rate=SAMPLE_RATE)) == len(sent)
+    # The last pass covered everything that was sent
+    assert job.transcript.endswith(f"samples {len(sent)}")
+    assert job.segments[-1][1] == 3.0
+
+
+def test_session_recording_is_saved_when_the_final_pass_times_out(tmp_path, monkeypatch):
+    from settings import settings
+
+    monkeypatch.setattr(settings, "final_pass_timeout_s", 0.5)
+    # Room for every chunk, so the disconnect is seen during the first pass
+    monkeypatch.setattr(settings, "session_queue_depth", 64)
+    sent = tone(3.0)
+    start = time.monotonic()
+    job = record_session(tmp_path, monkeypatch, SlowTranscriber(delay=2.0), sent)
+
+    # Saved when the timeout ran out instead of after a second 2 s pass, with all the audio
+    assert time.monotonic() - start < 3.5
+    assert job.metadata["duration_s"] == 3.0
+    assert not job.transcript.endswith(f"samples {len(sent)}")
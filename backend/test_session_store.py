@@ -0,0 +1,30 @@
+import numpy as np
+
+from session_store import SpillBuffer
+
+
+def test_spill_buffer_stays_in_memory_below_threshold():
+    store = SpillBuffer(spill_bytes=1024)
+    store.write(b"abc")
+    store.write(memoryview(b"def"))
+    assert not store.spilled
+    assert len(store) == 6
+    assert bytes(store.view()) == b"abcdef"
+
+
+def test_spill_buffer_moves_to_mmap_and_keeps_appending():
+    store = SpillBuffer(spill_bytes=100)
+    samples = np.arange(40, dtype="<i2")
+    store.write(samples)
+    assert not store.spilled
+    for _ in range(60):
+        store.write(samples)
+    assert store.spilled
+    view = store.view()
+    assert len(view) == 61 * samples.nbytes
+    np.testing.assert_array_equal(np.frombuffer(view, dtype="<i2"), np.tile(samples, 61))
+    view.release()
+
+    store.close()
+    assert len(store) == 0
+    assert not store.spilled
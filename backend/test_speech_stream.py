@@ -0,0 +1,108 @@
+import asyncio
+import io
+import json
+import time
+import wave
+
+import pytest
+
+from inference_pool import InferencePool
+from speech_stream import encoded_stream, split_sentences, synthesize_in_order, wav_frames
+
+
+def test_split_sentences():
+    assert split_sentences("Hello there, how are you? I am fine. Thanks!") == [
+        "Hello there, how are you?", "I am fine. Thanks!",
+    ]
+    assert split_sentences('He said "stop." Then he left.', min_chars=0) == ['He said "stop."', "Then he left."]
+    # Short fragments ride along with the next sentence
+    assert split_sentences("Hi. How are you doing today?") == ["Hi. How are you doing today?"]
+
+    long_sentence = ", ".join(["a clause of some words"] * 20) + "."
+    pieces = split_sentences(long_sentence, max_chars=60)
+    assert all(len(piece) <= 60 for piece in pieces)
+    assert " ".join(pieces) == long_sentence
+    assert split_sentences("   ") == []
+
+
+class SlowTTS:
+    audio_format = "wav"
+
+    def synthesize(self, text):
+        # Later sentences finish first, yet must come out in order
+        time.sleep(0.3 if text.startswith("First") else 0.1)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+            wav.writeframes(text[:4].encode())
+        return buffer.getvalue()
+
+
+def test_sentences_are_synthesized_concurrently_and_streamed_in_order():
+    sentences = ["First one is slow.", "Second is fast.", "Third is fast."]
+    pool = InferencePool(workers=3)
+
+    async def collect():
+        start = time.perf_counter()
+        results = [item async for item in synthesize_in_order(SlowTTS(), sentences, pool)]
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(collect())
+    assert [index for index, _, _ in results] == [0, 1, 2]
+    # Back to back would take 0.5 s
+    assert elapsed < 0.45
+    pool.shutdown()
+
+
+def test_wav_sentences_join_into_one_stream():
+    pool = InferencePool(workers=2)
+
+    async def collect():
+        sentences = synthesize_in_order(SlowTTS(), ["Second.", "Third."], pool)
+        return b"".join([chunk async for chunk in encoded_stream(sentences, "wav")])
+
+    data = asyncio.run(collect())
+    assert data.count(b"RIFF") == 1
+    # One streaming header, then each sentence's frames without its own header
+    assert data[44:] == b"SecoThir"
+    pool.shutdown()
+
+
+@pytest.fixture
+def speech_client(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import server
+    monkeypatch.setattr(server, "tts_service", lambda lang="en", voice=None: SlowTTS())
+    return TestClient(server.app)
+
+
+def test_speak_streams_one_wav(speech_client):
+    response = speech_client.post("/speak", json={"text": "First one is slow to say. Second is fast."})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/wav"
+    assert response.content.count(b"RIFF") == 1 and response.content[44:] == b"FirsSeco"
+
+    assert speech_client.post("/speak", json={"text": "   "}).json() == {"error": "No text to speak"}
+    assert speech_client.post("/speak", json={"text": 42}).status_code == 422
+
+
+def test_ws_speak_answers_each_sentence_in_order(speech_client):
+    with speech_client.websocket_connect("/ws/speak") as ws:
+        ws.send_text(json.dumps({"text": "First one is slow to say. Second is fast."}))
+        for index, text in enumerate(["First one is slow to say.", "Second is fast."]):
+            assert ws.receive_json() == {"type": "sentence", "index": index, "text": text, "format": "wav"}
+            assert wav_frames(ws.receive_bytes())[1] == text[:4].encode()
+        done = ws.receive_json()
+        assert (done["type"], done["sentences"]) == ("done", 2)
+
+        # Blank or non-string text is refused and the socket stays usable
+        for request in ["   ", json.dumps({"text": ""}), json.dumps({"text": 42}), json.dumps({"lang": "en"})]:
+            ws.send_text(request)
+            assert ws.receive_json() == {"type": "error", "message": "No text to speak"}
+        ws.send_text("Second is fast.")
+        assert ws.receive_json()["type"] == "sentence"
+        assert ws.receive_bytes()
+        assert ws.receive_json()["type"] == "done"
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from audio_stream import SAMPLE_RATE, PCMBuffer
+from whisper_service import StreamingSession
+
+
+class FakeService:
+    """
+    Stands in for WhisperService: every full second of audio holds a constant
+    value n and is "transcribed" as the word wordN.
+    """
+
+    def __init__(self):
+        self.window_lengths = []
+
+    def transcribe_segments(self, audio, language="en", initial_prompt=None, word_timestamps=False):
+        self.window_lengths.append(len(audio) / SAMPLE_RATE)
+        segments = []
+        for i in range(len(audio) // SAMPLE_RATE):
+            value = int(audio[i * SAMPLE_RATE])
+            if value < 0:
+                continue  # Silence
+            words = [SimpleNamespace(start=i + 0.1, end=i + 0.9, word=f" word{value}", probability=0.9)] if word_timestamps else None
+            segments.append(SimpleNamespace(start=float(i), end=float(i + 1), text=f" word{value}", words=words))
+        return segments
+
+
+def speak(buffer, words):
+    for word in words:
+        buffer.append(np.full(SAMPLE_RATE, word, dtype=np.float32))
+
+
+def test_segments_commit_after_two_agreeing_passes():
+    buffer = PCMBuffer()
+    session = StreamingSession(FakeService(), buffer)
+
+    speak(buffer, [0, 1])
+    first = session.process()
+    assert first.committed == ""
+    assert first.tentative == "word0 word1"
+
+    speak(buffer, [2])
+    second = session.process()
+    # word0 and word1 were seen twice; word2 is new and stays tentative
+    assert second.committed == "word0 word1"
+    assert second.tentative == "word2"
+    assert buffer.start == 2 * SAMPLE_RATE
+
+    speak(buffer, [3])
+    third = session.process()
+    assert third.committed == "word2"
+    assert session.text == "word0 word1 word2 word3"
+
+
+def test_window_stays_bounded_for_long_sessions():
+    buffer = PCMBuffer()
+    service = FakeService()
+    session = StreamingSession(service, buffer, max_window=5.0)
+
+    for word in range(60):
+        speak(buffer, [word])
+        session.process()
+
+    assert max(service.window_lengths) <= 6
+    assert session.committed_text.split()[:3] == ["word0", "word1", "word2"]
+
+
+def test_silence_commits_the_tail_and_flush_commits_the_rest():
+    buffer = PCMBuffer()
+    session = StreamingSession(FakeService(), buffer)
+
+    speak(buffer, [7])
+    session.process()
+    speak(buffer, [-1, -1])
+    update = session.process()
+    assert update.committed == "word7"
+
+    speak(buffer, [8])
+    session.process()
+    assert session.flush().committed == "word8"
+    assert session.text == "word7 word8"
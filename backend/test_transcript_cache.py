@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import numpy as np
+from faster_whisper.transcribe import Segment, Word
+
+from transcript_cache import TranscriptCache, cache_key
+from whisper_service import WhisperService
+
+
+def segment(text, start=0.0, end=1.0, words=None):
+    return Segment(id=1, seek=0, start=start, end=end, text=text, tokens=[1, 2], avg_logprob=-0.1,
+                   compression_ratio=1.2, no_speech_prob=0.01, words=words, temperature=0.0)
+
+
+def test_key_covers_audio_and_parameters():
+    audio = np.zeros(16000, dtype=np.float32)
+    key = cache_key(audio, model="base", language="en", beam_size=5)
+    assert key == cache_key(audio.copy(), beam_size=5, language="en", model="base")
+    assert key != cache_key(audio, model="small", language="en", beam_size=5)
+    assert key != cache_key(audio, model="base", language="en", beam_size=1)
+    audio[100] = 0.5
+    assert key != cache_key(audio, model="base", language="en", beam_size=5)
+
+
+def test_round_trip_and_persisted_stats(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = TranscriptCache(path)
+    assert cache.get("a") is None
+    cache.put("a", [segment(" Hello", words=[Word(start=0.0, end=0.5, word=" Hello", probability=0.9)])])
+
+    # A second process sees the entry and the counters
+    other = TranscriptCache(path)
+    [cached] = other.get("a")
+    assert cached.text == " Hello"
+    assert cached.words[0].word == " Hello"
+    stats = other.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = TranscriptCache(str(tmp_path / "cache.sqlite"), max_bytes=10**9)
+    cache.put("a", [segment(" a")])
+    size = cache.stats()["bytes"]
+    cache.max_bytes = size * 2
+    cache.put("b", [segment(" b")])
+    cache.get("a")  # a is now the most recently used
+    cache.put("c", [segment(" c")])
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        return iter([segment(" And so my fellow Americans")]), SimpleNamespace()
+
+
+def test_whisper_service_skips_inference_on_hit(tmp_path):
+    service = WhisperService.__new__(WhisperService)
+    service.model = FakeModel()
+    service.model_size = "base"
+    service.compute_type = "int8"
+    service.beam_size = 5
+    service.vad_parameters = dict(min_silence_duration_ms=500)
+    service.cache = TranscriptCache(str(tmp_path / "cache.sqlite"))
+
+    audio = np.random.default_rng(0).normal(0, 0.1, 16000).astype(np.float32)
+    assert service.transcribe(audio) == "And so my fellow Americans"
+    assert service.transcribe(audio) == "And so my fellow Americans"
+    assert service.transcribe(audio, language="de") == "And so my fellow Americans"
+    assert service.model.calls == 2
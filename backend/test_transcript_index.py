@@ -0,0 +1,102 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from recording import RecordingJob, RecordingWriter, SessionRecorder
+from transcript_index import TranscriptIndex
+
+
+def write_sidecar(folder, stem, segments, **metadata):
+    path = os.path.join(folder, f"{stem}.json")
+    with open(path, "w") as f:
+        json.dump({
+            "audio": f"{stem}.webm",
+            "segments": [{"start": start, "end": end, "text": text} for start, end, text in segments],
+            **metadata,
+        }, f)
+    return path
+
+
+def test_phrases_are_found_with_file_and_offset(tmp_path):
+    index = TranscriptIndex(str(tmp_path / "index.sqlite"))
+    write_sidecar(str(tmp_path), "monday", [(0.0, 2.5, " Good morning everyone."), (3601.25, 3604.0, " See you at the café.")])
+    write_sidecar(str(tmp_path), "tuesday", [(12.0, 14.0, " Morning, good to see you.")], duration_s=20.0)
+    index.scan(str(tmp_path))
+
+    [hit] = index.search("good morning")
+    assert hit.audio == str(tmp_path / "monday.webm")
+    assert (hit.start_ms, hit.end_ms, hit.text) == (0, 2500, "Good morning everyone.")
+    assert hit.highlighted == "[Good morning] everyone."
+
+    # Accents are ignored and FTS syntax in a phrase is taken literally
+    assert [h.start_ms for h in index.search("cafe")] == [3601250]
+    assert index.search('the "café" AND') == []
+
+    # FTS queries match words anywhere in a segment
+    assert len(index.search("good AND morning", phrase=False)) == 2
+    with pytest.raises(ValueError):
+        index.search("AND (", phrase=False)
+    assert index.stats()["recordings"] == 2 and index.stats()["segments"] == 3
+
+
+def test_scan_is_incremental(tmp_path):
+    path = str(tmp_path / "index.sqlite")
+    index = TranscriptIndex(path)
+    first = write_sidecar(str(tmp_path), "a", [(0.0, 1.0, " alpha")])
+    second = write_sidecar(str(tmp_path), "b", [(0.0, 1.0, " beta")])
+    with open(tmp_path / "notes.json", "w") as f:
+        json.dump(["not a sidecar"], f)
+    assert index.scan(str(tmp_path)) == 2
+    assert index.scan(str(tmp_path)) == 0
+
+    # Changed sidecars replace their segments, removed ones drop out
+    write_sidecar(str(tmp_path), "a", [(5.0, 6.0, " gamma")])
+    os.utime(first, (1, 1))
+    os.remove(second)
+    assert index.scan(str(tmp_path)) == 1
+
+    # Another process sees the same index
+    other = TranscriptIndex(path)
+    assert other.search("alpha") == [] and other.search("beta") == []
+    assert [h.start_ms for h in other.search("gamma")] == [5000]
+    assert other.stats()["segments"] == 1
+
+
+def test_writer_indexes_recordings_as_they_are_saved(tmp_path):
+    index = TranscriptIndex(str(tmp_path / "index.sqlite"))
+    recorder = SessionRecorder(keep_pcm=False, keep_compressed=True)
+    recorder.write_compressed(b"\x1aE\xdf\xa3chunk")
+    job = RecordingJob(recorder, str(tmp_path / "saved"), "rec", "webm", segments=[(1.5, 3.0, "ask not what your country")])
+
+    path = RecordingWriter(workers=0, index=index).write(job)
+    [hit] = index.search("your country")
+    assert (hit.audio, hit.start_ms) == (path, 1500)
+    recorder.discard()
+
+
+def test_server_opens_the_index_at_startup_and_closes_it_on_shutdown(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from settings import settings
+
+    import server
+
+    monkeypatch.setenv("TRANSCRIPT_INDEX", str(tmp_path / "index.sqlite"))
+    monkeypatch.setattr(settings, "transcript_index_enabled", True)
+    monkeypatch.setattr(server, "preload_default_model", lambda: None)
+    monkeypatch.setattr(server, "recording_writer", RecordingWriter(workers=0))
+    # Importing the server leaves the index closed until it starts
+    assert server.transcript_index is None
+
+    with TestClient(server.app) as client:
+        index = server.transcript_index
+        assert server.recording_writer.index is index
+        write_sidecar(str(tmp_path), "monday", [(0.0, 2.5, " Good morning everyone.")])
+        index.scan(str(tmp_path))
+        [hit] = client.get("/search", params={"q": "good morning"}).json()["hits"]
+        assert hit["audio"] == str(tmp_path / "monday.webm")
+
+    assert server.transcript_index is None and server.recording_writer.index is None
+    with pytest.raises(sqlite3.ProgrammingError):
+        index.search("good morning")
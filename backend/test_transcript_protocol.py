@@ -0,0 +1,72 @@
+from audio_stream import SAMPLE_RATE, PCMBuffer
+from test_streaming_session import FakeService, speak
+from transcript_protocol import TranscriptDiff
+from whisper_service import StreamingSession
+
+
+def apply(display, message):
+    """What a client does with a message: patch finals, replace the partial."""
+    finals, _ = display
+    if message["type"] == "final":
+        finals[message["index"]:message["index"] + len(message["segments"])] = message["segments"]
+        return finals, display[1]
+    return finals, message["segments"]
+
+
+def test_diffs_carry_only_new_segments_and_rebuild_the_transcript():
+    buffer = PCMBuffer()
+    session = StreamingSession(FakeService(), buffer, word_timestamps=True)
+    diff = TranscriptDiff()
+    display = ([], [])
+    messages = []
+
+    for word in range(6):
+        speak(buffer, [word])
+        for message in diff.messages(session.process()):
+            messages.append(message)
+            display = apply(display, message)
+    for message in diff.messages(session.flush()):
+        messages.append(message)
+        display = apply(display, message)
+
+    assert [m["seq"] for m in messages] == list(range(1, len(messages) + 1))
+    finals = [m for m in messages if m["type"] == "final"]
+    # Every committed segment is sent exactly once
+    assert sum(len(m["segments"]) for m in finals) == 6
+    assert [s["text"] for s in display[0]] == [f"word{i}" for i in range(6)]
+    assert display[1] == []
+    assert " ".join(s["text"] for s in display[0]) == session.committed_text
+
+
+def test_segments_carry_session_times_and_words():
+    buffer = PCMBuffer()
+    session = StreamingSession(FakeService(), buffer, word_timestamps=True)
+    diff = TranscriptDiff()
+
+    speak(buffer, [0, 1])
+    session.process()
+    speak(buffer, [2])
+    final, partial = diff.messages(session.process())
+
+    # Committed audio was trimmed, but times still count from the session start
+    assert buffer.start == 2 * SAMPLE_RATE
+    assert final["segments"][1] == {
+        "start": 1.0,
+        "end": 2.0,
+        "text": "word1",
+        "words": [{"start": 1.1, "end": 1.9, "word": "word1", "probability": 0.9}],
+    }
+    assert partial["segments"][0]["words"][0]["start"] == 2.1
+
+
+def test_unchanged_partial_is_not_resent():
+    buffer = PCMBuffer()
+    session = StreamingSession(FakeService(), buffer)
+    diff = TranscriptDiff()
+
+    speak(buffer, [0])
+    assert [m["type"] for m in diff.messages(session.process())] == ["partial"]
+    # No new audio: the same hypothesis comes back and is still tentative
+    update = session.process()
+    assert update.tentative == "word0"
+    assert diff.messages(update) == []
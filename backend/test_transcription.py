@@ -1,9 +1,13 @@
 import pytest
 import os
-from gtts import gTTS
+import json
+from tts_service import TTSService
+from phrase_cache import PhraseCache
 from fastapi.testclient import TestClient
 from websockets.sync.client import connect
 import tempfile
+import numpy as np
+from faster_whisper import decode_audio
 
 # We need to connect to the running server, or start one.
 # For this test, we'll assume the server is running on localhost:8000 as per the user state.
@@ -14,11 +18,16 @@ import tempfile
 # Let's try to use the running server first as it's an integration test.
 # If that's not robust enough, we can switch to importing the app.
 
-SERVER_URL = "ws://localhost:8000/ws/transcribe"
+# Raw PCM input lets the server skip ffmpeg and decode in-process
+SERVER_URL = "ws://localhost:8000/ws/transcribe?encoding=pcm_s16le"
+
+# 100 ms of 16 kHz int16 PCM per frame
+FRAME_BYTES = 3200
 
 def generate_test_audio(text, filename):
-    tts = gTTS(text=text, lang='en')
-    tts.save(filename)
+    # Cached after the first run; TTS_BACKEND=espeak makes it work offline
+    tts = TTSService(lang='en', backend=os.environ.get("TTS_BACKEND", "gtts"), cache=PhraseCache())
+    assert tts.generate_audio(text, filename), "Failed to generate test audio"
 
 def test_transcription_flow():
     test_text = "Hello world, this is a test."
@@ -30,33 +39,27 @@ def test_transcription_flow():
         # Generate Audio
         generate_test_audio(test_text, audio_path)
 
-        # Connect to Websocket
-        # Note: The server expects bytes.
-        with open(audio_path, "rb") as f:
-            audio_data = f.read()
+        # Decode to 16 kHz mono int16 PCM; a trailing second of silence lets the
+        # server finalize the utterance
+        audio = np.concatenate([decode_audio(audio_path), np.zeros(16000, dtype=np.float32)])
+        pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes()
 
         # Using websockets library to connect to the running server
         try:
             with connect(SERVER_URL) as websocket:
-                websocket.send(audio_data)
-
-                # The server sends back the text
-                # We might need to wait a bit or receive multiple times if it streams,
-                # but the current implementation seems to send it all at once after processing.
-                # However, the server loop receives bytes, writes to file, and THEN transcribes.
-                # It keeps doing this. It might not trigger transcription until it decides to?
-                # Looking at server.py:
-                # while True:
-                #     data = await websocket.receive_bytes()
-                #     ... write to file ...
-                #     text = whisper_service.transcribe(session_file_path)
-                #     await websocket.send_text(text)
-
-                # So for every chunk of bytes it receives, it tries to transcribe the WHOLE file?
-                # That seems inefficient but that's how it is written.
-                # So if we send one big chunk, we should get one response.
+                for i in range(0, len(pcm), FRAME_BYTES):
+                    websocket.send(pcm[i:i + FRAME_BYTES])
 
-                result = websocket.recv()
+                # The server streams final and partial segments as the audio arrives;
+                # keep reading until the full sentence has been recognized
+                finals, partial, result = [], [], ""
+                while "this is a test" not in result.lower():
+                    message = json.loads(websocket.recv(timeout=30))
+                    if message["type"] == "final":
+                        finals[message["index"]:] = [s["text"] for s in message["segments"]]
+                    elif message["type"] == "partial":
+                        partial = [s["text"] for s in message["segments"]]
+                    result = " ".join(finals + partial)
                 print(f"Received: {result}")
 
                 # Basic normalization for comparison
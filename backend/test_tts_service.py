@@ -0,0 +1,99 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from phrase_cache import PhraseCache
+from tts_service import EspeakBackend, TTSBackend, TTSService
+
+
+class FakeBackend(TTSBackend):
+    name = "fake"
+    audio_format = "mp3"
+
+    def __init__(self):
+        self.calls = 0
+
+    def synthesize(self, text, lang, voice=None):
+        self.calls += 1
+        return f"{lang}:{voice}:{text}".encode() * 100
+
+    def stream(self, text, lang, voice=None):
+        data = self.synthesize(text, lang, voice)
+        yield data[:10]
+        yield data[10:]
+
+
+def test_phrases_are_cached_per_text_lang_and_voice(tmp_path):
+    backend = FakeBackend()
+    cache = PhraseCache(str(tmp_path))
+    tts = TTSService(backend=backend, cache=cache)
+
+    assert tts.synthesize("Hello") == tts.synthesize("Hello")
+    assert backend.calls == 1
+    TTSService(lang="de", backend=backend, cache=cache).synthesize("Hello")
+    TTSService(backend=backend, voice="co.uk", cache=cache).synthesize("Hello")
+    assert backend.calls == 3
+
+    # Streams are cached once complete and replayed from the cache
+    streamed = b"".join(tts.stream("Streamed"))
+    assert b"".join(tts.stream("Streamed", chunk_size=7)) == streamed
+    assert backend.calls == 4
+    assert cache.stats()["hits"] == 2
+
+
+def test_least_recently_used_phrases_are_evicted(tmp_path):
+    backend = FakeBackend()
+    tts = TTSService(backend=backend, cache=PhraseCache(str(tmp_path)))
+    tts.synthesize("one")
+    size = tts.cache.stats()["bytes"]
+    tts.cache.max_bytes = int(size * 2.5)
+
+    tts.synthesize("two")
+    os.utime(tts.cache._path(tts._key("one"), "mp3"), (0, 0))  # "one" is now the oldest
+    tts.synthesize("three")
+
+    assert tts.cache.stats()["entries"] == 2
+    tts.synthesize("two")
+    tts.synthesize("three")
+    assert backend.calls == 3
+    tts.synthesize("one")
+    assert backend.calls == 4
+
+
+def test_overwriting_a_phrase_keeps_the_size_accurate(tmp_path):
+    cache = PhraseCache(str(tmp_path))
+    cache.put("ab12", "mp3", b"x" * 100)
+    cache.put("ab12", "mp3", b"y" * 40)
+    assert cache._bytes == cache.stats()["bytes"] == 40
+
+
+def test_failed_synthesis_is_raised_and_not_cached(tmp_path):
+    # An espeak run that exits non-zero without writing audio, as with an unknown voice
+    backend = EspeakBackend.__new__(EspeakBackend)
+    backend.executable = shutil.which("false")
+    tts = TTSService(backend=backend, voice="no-such-voice", cache=PhraseCache(str(tmp_path)))
+
+    with pytest.raises(subprocess.CalledProcessError):
+        b"".join(tts.stream("Hello"))
+    assert tts.cache.stats()["entries"] == 0
+
+    class SilentBackend(FakeBackend):
+        def synthesize(self, text, lang, voice=None):
+            return b""
+
+    TTSService(backend=SilentBackend(), cache=tts.cache).synthesize("Hello")
+    assert tts.cache.stats()["entries"] == 0
+
+
+def test_generate_audio_writes_file(tmp_path):
+    output = tmp_path / "out.mp3"
+    assert TTSService(backend=FakeBackend()).generate_audio("Hi", str(output))
+    assert output.read_bytes().startswith(b"en:None:Hi")
+
+
+@pytest.mark.skipif(not (shutil.which("espeak-ng") or shutil.which("espeak")), reason="espeak-ng not installed")
+def test_espeak_backend_produces_wav():
+    data = TTSService(backend="espeak").synthesize("Hello world")
+    assert data[:4] == b"RIFF"
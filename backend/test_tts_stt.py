@@ -1,35 +1,53 @@
 import asyncio
+import tempfile
+from pathlib import Path
 import websockets
 import os
+import json
 import pytest
-from gtts import gTTS
+import numpy as np
+from faster_whisper import decode_audio
+from tts_service import TTSService
+from phrase_cache import PhraseCache
+
+# 100 ms of 16 kHz int16 PCM per frame
+FRAME_BYTES = 3200
 
 @pytest.mark.asyncio
-async def test_transcription():
-    uri = "ws://localhost:8000/ws/transcribe"
+async def test_transcription(tmp_path):
+    # Stream raw PCM so the server decodes in-process instead of running ffmpeg
+    uri = "ws://localhost:8000/ws/transcribe?encoding=pcm_s16le"
     text_to_speak = "Hello this is a test of the audio transcription system"
-    audio_file = "test_audio.mp3"
 
     print(f"Generating audio for: '{text_to_speak}'")
-    tts = gTTS(text=text_to_speak, lang='en')
-    tts.save(audio_file)
+    # TTS_BACKEND=espeak needs no network; a private cache keeps runs independent
+    tts = TTSService(lang='en', backend=os.environ.get("TTS_BACKEND", "gtts"), cache=PhraseCache(str(tmp_path / "phrases")))
+    # Backends produce different formats (MP3, WAV), so name the file after it
+    audio_file = str(tmp_path / f"test_audio.{tts.audio_format}")
+    tts.generate_audio(text_to_speak, audio_file)
 
     print(f"Connecting to {uri}...")
     try:
         async with websockets.connect(uri) as websocket:
             print("Connected. Sending audio...")
 
-            # Read audio file and send in one go to avoid server overload on small chunks
-            with open(audio_file, "rb") as f:
-                audio_data = f.read()
-                await websocket.send(audio_data)
+            # Decode locally to 16 kHz mono and stream it in 100 ms frames,
+            # followed by a second of silence so the server finalizes the utterance
+            audio = np.concatenate([decode_audio(audio_file), np.zeros(16000, dtype=np.float32)])
+            pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes()
+            for i in range(0, len(pcm), FRAME_BYTES):
+                await websocket.send(pcm[i:i + FRAME_BYTES])
 
             print("Audio sent. Waiting for transcription...")
 
-            # Wait for a response (with timeout)
+            # Wait for the transcript (with timeout); partial results come first
             try:
+                response = ""
                 # Increased timeout for slower environments
-                response = await asyncio.wait_for(websocket.recv(), timeout=30.0)
+                while not ("test" in response.lower() or "hello" in response.lower()):
+                    message = json.loads(await asyncio.wait_for(websocket.recv(), timeout=30.0))
+                    if message["type"] in ("final", "partial"):
+                        response = " ".join(s["text"] for s in message["segments"])
                 print(f"Received transcription: '{response}'")
 
                 if "test" in response.lower() or "hello" in response.lower():
@@ -47,4 +65,5 @@ async def test_transcription():
             os.remove(audio_file)
 
 if __name__ == "__main__":
-    asyncio.run(test_transcription())
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(test_transcription(Path(directory)))
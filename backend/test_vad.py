@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+from faster_whisper import decode_audio
+
+from audio_stream import SAMPLE_RATE, PCMBuffer
+from vad import StreamingVAD
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "test_stt_sample.wav")
+
+
+def tone(seconds, amplitude=0.1):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_energy_gate_skips_silence_and_ends_utterance():
+    buffer = PCMBuffer()
+    vad = StreamingVAD(end_of_utterance_ms=500, use_silero=False)
+
+    buffer.append(silence(1))
+    update = vad.update(buffer)
+    assert not update.speech and not update.end_of_utterance
+    assert update.silent_until == vad.position
+
+    buffer.append(tone(1))
+    update = vad.update(buffer)
+    assert update.speech and not update.end_of_utterance
+    assert update.silent_until is None
+
+    # A short pause does not end the utterance, a long one does (once)
+    buffer.append(silence(0.2))
+    update = vad.update(buffer)
+    assert not update.end_of_utterance and update.silent_until is None
+    buffer.append(silence(0.5))
+    update = vad.update(buffer)
+    assert update.end_of_utterance and not update.speech
+    assert not vad.update(buffer).end_of_utterance
+
+
+def test_only_new_frames_are_scored():
+    buffer = PCMBuffer()
+    vad = StreamingVAD(use_silero=False)
+    buffer.append(tone(0.5))
+    vad.update(buffer)
+    scored = vad.position
+
+    # Nothing new: no frames, no speech reported again
+    assert not vad.update(buffer).speech
+    assert vad.position == scored
+
+    # Partial frames wait for the next update
+    buffer.append(silence(0.01))
+    vad.update(buffer)
+    assert vad.position == scored
+
+
+def test_silero_detects_speech_not_noise():
+    vad = StreamingVAD()
+    buffer = PCMBuffer()
+    rng = np.random.default_rng(0)
+    buffer.append((0.05 * rng.standard_normal(SAMPLE_RATE)).astype(np.float32))
+    assert not vad.update(buffer).speech
+
+    buffer.append(decode_audio(SAMPLE)[: 3 * SAMPLE_RATE])
+    assert vad.update(buffer).speech
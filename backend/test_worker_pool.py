@@ -0,0 +1,162 @@
+import os
+import subprocess
+import sys
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import worker_pool
+from inference_worker import InferenceWorker
+from worker_pool import RemoteTranscriber, WorkerPool, WorkerUnavailable
+from whisper_service import StreamingSession
+from audio_stream import SAMPLE_RATE, PCMBuffer
+
+
+class FakeTranscriber:
+    """Says how many samples it got, with one word per call."""
+
+    def __init__(self, name, release=None):
+        self.name = name
+        self.calls = []
+        self.release = release
+
+    def transcribe_segments(self, audio, language="en", initial_prompt=None, word_timestamps=False):
+        if self.release is not None:
+            self.release.wait(5)
+        if language == "xx":
+            raise ValueError("unsupported language")
+        self.calls.append((len(audio), language, initial_prompt, word_timestamps))
+        words = [SimpleNamespace(start=0.1, end=0.4, word=" hello", probability=0.9)] if word_timestamps else None
+        return [SimpleNamespace(start=0.0, end=0.5, text=f" hello from {self.name}", words=words)]
+
+
+def start_workers(tmp_path, count):
+    transcribers = [FakeTranscriber(f"w{i}") for i in range(count)]
+    workers = [
+        InferenceWorker(str(tmp_path / f"w{i}.sock"), lambda model, t=transcriber: t).start()
+        for i, transcriber in enumerate(transcribers)
+    ]
+    return transcribers, workers
+
+
+def test_windows_round_trip_through_a_worker(tmp_path):
+    transcribers, workers = start_workers(tmp_path, 1)
+    pool = WorkerPool.connect([w.path for w in workers]).start()
+    try:
+        remote = RemoteTranscriber(pool, "base")
+        audio = np.linspace(-1, 1, SAMPLE_RATE, dtype=np.float32)
+        [segment] = remote.transcribe_segments(audio, initial_prompt="Earlier", word_timestamps=True)
+
+        assert segment.text == " hello from w0"
+        assert segment.words[0].word == " hello" and segment.words[0].probability == 0.9
+        assert transcribers[0].calls == [(SAMPLE_RATE, "en", "Earlier", True)]
+
+        # A failing request is reported, but the worker stays healthy
+        with pytest.raises(RuntimeError, match="unsupported language"):
+            remote.transcribe_segments(audio, language="xx")
+        assert pool.workers[0].healthy
+
+        # A streaming session runs unchanged on top of the remote transcriber
+        buffer = PCMBuffer()
+        buffer.append(audio)
+        session = StreamingSession(remote, buffer, word_timestamps=True)
+        update = session.process()
+        assert update.tentative == "hello from w0"
+        assert update.tentative_segments[0].words == [(0.1, 0.4, "hello", 0.9)]
+    finally:
+        pool.close()
+        for worker in workers:
+            worker.close()
+
+
+def test_sessions_go_to_the_least_loaded_worker_and_stay_there(tmp_path):
+    transcribers, workers = start_workers(tmp_path, 2)
+    pool = WorkerPool.connect([w.path for w in workers]).start()
+    try:
+        sessions = [RemoteTranscriber(pool, "base") for _ in range(3)]
+        for _ in range(3):
+            for session in sessions:
+                session.transcribe_segments(np.zeros(100, dtype=np.float32))
+
+        # Spread 2/1 and never moved: each worker saw whole sessions only
+        assert sorted(len(t.calls) for t in transcribers) == [3, 6]
+        assert sorted(w.sessions for w in pool.workers) == [1, 2]
+
+        for session in sessions:
+            session.close()
+        assert [w.sessions for w in pool.workers] == [0, 0]
+    finally:
+        pool.close()
+        for worker in workers:
+            worker.close()
+
+
+def test_health_is_answered_while_a_worker_is_busy(tmp_path):
+    release = threading.Event()
+    slow = FakeTranscriber("slow", release=release)
+    worker = InferenceWorker(str(tmp_path / "slow.sock"), lambda model: slow).start()
+    pool = WorkerPool.connect([worker.path]).start()
+    try:
+        busy = threading.Thread(target=RemoteTranscriber(pool, "base").transcribe_segments, args=(np.zeros(10),))
+        busy.start()
+        while not worker.active:
+            pass
+        assert pool.workers[0].ping()["active"] == 1
+        release.set()
+        busy.join()
+    finally:
+        pool.close()
+        worker.close()
+
+
+def test_sessions_move_off_a_failed_worker(tmp_path):
+    transcribers, workers = start_workers(tmp_path, 2)
+    pool = WorkerPool.connect([w.path for w in workers]).start()
+    try:
+        session = RemoteTranscriber(pool, "base")
+        session.transcribe_segments(np.zeros(10, dtype=np.float32))
+        first = next(i for i, t in enumerate(transcribers) if t.calls)
+        workers[first].close()
+
+        # The next window fails over to the other worker and the session stays there
+        [segment] = session.transcribe_segments(np.zeros(10, dtype=np.float32))
+        assert segment.text == f" hello from w{1 - first}"
+        assert not pool.workers[first].healthy
+        assert pool.workers[1 - first].sessions == 1
+
+        # Health checks bring the worker back once it listens again
+        workers[first] = InferenceWorker(workers[first].path, lambda model: transcribers[first]).start()
+        pool.check_health()
+        assert pool.workers[first].healthy
+
+        workers[1 - first].close()
+        workers[first].close()
+        pool.check_health()
+        assert not pool.ready
+        with pytest.raises(WorkerUnavailable):
+            session.transcribe_segments(np.zeros(10, dtype=np.float32))
+    finally:
+        pool.close()
+
+
+def test_exited_worker_processes_are_restarted(tmp_path, monkeypatch):
+    started = []
+
+    def fake_start(path, cpu_threads=None):
+        started.append((path, cpu_threads))
+        return subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+
+    monkeypatch.setattr(worker_pool, "_start_worker", fake_start)
+    pool = WorkerPool.spawn(1, socket_dir=str(tmp_path))
+    try:
+        pool.workers[0].process.kill()
+        pool.workers[0].process.wait()
+        pool.check_health()
+        assert pool.restarts == 1 and len(started) == 2
+        # Restarted with the same share of the CPU
+        assert started[0] == started[1] and started[0][1] == max(1, os.cpu_count() or 1)
+        assert pool.workers[0].process.poll() is None
+    finally:
+        pool.close()
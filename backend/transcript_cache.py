@@ -0,0 +1,135 @@
+import dataclasses
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from faster_whisper.transcribe import Segment, Word
+
+
+def default_cache_path():
+    """TRANSCRIPT_CACHE if set, else ~/.cache/audio-assistant/transcripts.sqlite."""
+    return os.environ.get("TRANSCRIPT_CACHE") or os.path.join(
+        os.path.expanduser("~"), ".cache", "audio-assistant", "transcripts.sqlite"
+    )
+
+
+def cache_key(audio, **params):
+    """
+    Content address of a transcription: SHA-256 of the decoded float32 PCM
+    plus every parameter that can change the result.
+    """
+    digest = hashlib.sha256(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _encode_segments(segments):
+    return json.dumps([dataclasses.asdict(segment) for segment in segments])
+
+
+def _decode_segments(value):
+    segments = []
+    for fields in json.loads(value):
+        if fields.get("words") is not None:
+            fields["words"] = [Word(**word) for word in fields["words"]]
+        segments.append(Segment(**fields))
+    return segments
+
+
+class TranscriptCache:
+    """
+    Persistent transcription cache in a SQLite file.
+
+    Entries map a cache_key() to the transcribed segments. The file is kept
+    under `max_bytes` of stored segments by evicting the least recently used
+    entries. Hit and miss counts are stored alongside, so they add up across
+    processes sharing the file (e.g. batch workers).
+    """
+
+    def __init__(self, path=None, max_bytes=512 * 1024 * 1024):
+        """
+        :param path: SQLite file (default_cache_path() if None).
+        :param max_bytes: Size of stored segments above which old entries are evicted.
+        """
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, segments TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._db.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+
+    def _count(self, name, amount=1):
+        self._db.execute("UPDATE counters SET value = value + ? WHERE name = ?", (amount, name))
+
+    def get(self, key):
+        """
+        :return: Cached list of segments, or None on a miss.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT segments FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count("misses")
+                return None
+            self._db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._count("hits")
+        return _decode_segments(row[0])
+
+    def put(self, key, segments):
+        """Store segments under key, evicting old entries past max_bytes."""
+        value = _encode_segments(segments)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            self._evict()
+
+    def _evict(self):
+        # Caller holds self._lock
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        self._count("evictions", len(evicted))
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._db.execute("UPDATE counters SET value = 0")
+        self._db.execute("VACUUM")
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            counters = dict(self._db.execute("SELECT name, value FROM counters"))
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else None,
+            "evictions": counters["evictions"],
+        }
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,157 @@
+import glob
+import json
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+
+# A matching segment: audio file path and offsets in milliseconds from its start
+SearchHit = namedtuple("SearchHit", ["audio", "start_ms", "end_ms", "text", "highlighted"])
+
+
+def default_index_path():
+    """TRANSCRIPT_INDEX if set, else ~/.cache/audio-assistant/recordings.sqlite."""
+    return os.environ.get("TRANSCRIPT_INDEX") or os.path.join(
+        os.path.expanduser("~"), ".cache", "audio-assistant", "recordings.sqlite"
+    )
+
+
+def phrase_query(text):
+    """FTS5 query matching `text` as a phrase, with FTS syntax in it taken literally."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+class TranscriptIndex:
+    """
+    Full-text index over the transcripts of saved recordings, in a SQLite
+    file with FTS5.
+
+    Each recording's sidecar JSON (written by RecordingWriter) contributes
+    its segments; a search returns the matching segments with their audio
+    file and start/end offsets. Segments live in a plain table with an
+    external-content FTS5 index on their text, kept in sync by triggers, so
+    replacing a recording's segments is an indexed delete and lookups stay
+    a single index query however many hours are stored. WAL mode lets the
+    CLI search while the server is adding recordings.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: SQLite file (default_index_path() if None).
+        """
+        self.path = path or default_index_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS recordings (
+                id INTEGER PRIMARY KEY, audio TEXT UNIQUE NOT NULL, sidecar TEXT UNIQUE NOT NULL,
+                mtime REAL NOT NULL, duration_s REAL, model TEXT);
+            CREATE TABLE IF NOT EXISTS segments (
+                id INTEGER PRIMARY KEY, recording INTEGER NOT NULL REFERENCES recordings (id) ON DELETE CASCADE,
+                start_ms INTEGER NOT NULL, end_ms INTEGER NOT NULL, text TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS segments_recording ON segments (recording);
+            CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+                text, content='segments', content_rowid='id', tokenize='unicode61 remove_diacritics 2');
+            CREATE TRIGGER IF NOT EXISTS segments_ai AFTER INSERT ON segments BEGIN
+                INSERT INTO segments_fts (rowid, text) VALUES (new.id, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS segments_ad AFTER DELETE ON segments BEGIN
+                INSERT INTO segments_fts (segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END;
+        """)
+
+    def add(self, sidecar_path):
+        """
+        Index (or re-index) the recording described by a sidecar JSON.
+        :return: Number of segments indexed.
+        """
+        sidecar_path = os.path.abspath(sidecar_path)
+        with open(sidecar_path) as f:
+            data = json.load(f)
+        audio = os.path.join(os.path.dirname(sidecar_path), data["audio"])
+        rows = [
+            (int(round(s["start"] * 1000)), int(round(s["end"] * 1000)), s["text"].strip())
+            for s in data.get("segments", ())
+            if s["text"].strip()
+        ]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute("DELETE FROM recordings WHERE sidecar = ? OR audio = ?", (sidecar_path, audio))
+                recording = self._db.execute(
+                    "INSERT INTO recordings (audio, sidecar, mtime, duration_s, model) VALUES (?, ?, ?, ?, ?)",
+                    (audio, sidecar_path, os.path.getmtime(sidecar_path), data.get("duration_s"), data.get("model")),
+                ).lastrowid
+                self._db.executemany(
+                    "INSERT INTO segments (recording, start_ms, end_ms, text) VALUES (?, ?, ?, ?)",
+                    [(recording, *row) for row in rows],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def scan(self, folder):
+        """
+        Bring the index up to date with the sidecars in `folder`: add new
+        or changed ones and drop recordings whose sidecar is gone.
+        :return: Number of recordings (re)indexed.
+        """
+        folder = os.path.abspath(folder)
+        with self._lock:
+            known = dict(self._db.execute(
+                "SELECT sidecar, mtime FROM recordings WHERE sidecar LIKE ? ESCAPE '\\'",
+                (folder.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + os.sep + "%",),
+            ))
+        indexed = 0
+        for path in sorted(glob.glob(os.path.join(folder, "*.json"))):
+            known_mtime = known.pop(path, None)
+            if known_mtime is not None and known_mtime == os.path.getmtime(path):
+                continue
+            try:
+                self.add(path)
+                indexed += 1
+            except (ValueError, KeyError, TypeError):
+                pass  # Not a recording sidecar
+        # Sidecars in subfolders are not scanned, so only prune this folder's own
+        gone = [(path,) for path in known if os.path.dirname(path) == folder]
+        if gone:
+            with self._lock:
+                self._db.executemany("DELETE FROM recordings WHERE sidecar = ?", gone)
+        return indexed
+
+    def search(self, query, limit=20, phrase=True):
+        """
+        :param query: Text to look for.
+        :param phrase: Match `query` as a phrase; False passes it as an
+            FTS5 query (AND/OR/NEAR, prefix*).
+        :return: SearchHits, best match first.
+        :raises ValueError: If the FTS5 query is malformed.
+        """
+        with self._lock:
+            try:
+                rows = self._db.execute(
+                    "SELECT r.audio, s.start_ms, s.end_ms, s.text, highlight(segments_fts, 0, '[', ']') "
+                    "FROM segments_fts JOIN segments s ON s.id = segments_fts.rowid "
+                    "JOIN recordings r ON r.id = s.recording "
+                    "WHERE segments_fts MATCH ? ORDER BY rank, r.audio, s.start_ms LIMIT ?",
+                    (phrase_query(query) if phrase else query, limit),
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Invalid search query {query!r}: {e}") from e
+        return [SearchHit(*row) for row in rows]
+
+    def stats(self):
+        with self._lock:
+            recordings, seconds = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(duration_s), 0) FROM recordings"
+            ).fetchone()
+            segments = self._db.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return {"path": self.path, "recordings": recordings, "segments": segments, "hours": round(seconds / 3600, 2)}
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,60 @@
+from audio_stream import SAMPLE_RATE
+
+# Transcript protocols a /ws/transcribe session can use
+PROTOCOLS = ("json", "text")
+
+
+def segment_json(segment):
+    """JSON form of a StreamSegment, times in seconds from the session start."""
+    return {
+        "start": round(segment.start / SAMPLE_RATE, 3),
+        "end": round(segment.end / SAMPLE_RATE, 3),
+        "text": segment.text,
+        "words": [
+            {"start": round(start, 3), "end": round(end, 3), "word": word, "probability": round(probability, 3)}
+            for start, end, word, probability in segment.words
+        ],
+    }
+
+
+class TranscriptDiff:
+    """
+    Turns the StreamUpdates of a session into incremental messages, so each
+    message only carries what changed instead of the whole transcript:
+
+    - {"type": "final", "seq": 4, "index": 7, "segments": [...]}: segments
+      committed by this pass; they take positions index, index + 1, ... of
+      the final transcript and never change again.
+    - {"type": "partial", "seq": 5, "segments": [...]}: the tentative tail,
+      replacing the previous partial. Only sent when it changed.
+
+    `seq` grows by one per message, so a client can tell it missed one.
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self.final_count = 0
+        self._partial = ()
+
+    def _message(self, type, **fields):
+        self.seq += 1
+        return {"type": type, "seq": self.seq, **fields}
+
+    def messages(self, update):
+        """
+        :param update: whisper_service.StreamUpdate of one pass.
+        :return: Messages to send, in order (possibly none).
+        """
+        messages = []
+        if update.segments:
+            messages.append(self._message(
+                "final",
+                index=self.final_count,
+                segments=[segment_json(s) for s in update.segments],
+            ))
+            self.final_count += len(update.segments)
+        partial = tuple(update.tentative_segments)
+        if partial != self._partial:
+            self._partial = partial
+            messages.append(self._message("partial", segments=[segment_json(s) for s in partial]))
+        return messages
@@ -1,9 +1,203 @@
 from gtts import gTTS
+import io
+import json
 import os
+import shutil
+import subprocess
+import tempfile
+import wave
+
+from phrase_cache import phrase_key
+
+
+class TTSBackend:
+    """
+    A speech synthesis engine. Subclasses produce complete encoded audio
+    for a phrase and may override stream() to hand out audio as it is made.
+    """
+
+    name = None
+    # Container/codec of the produced audio, also used as the file extension
+    audio_format = None
+
+    def synthesize(self, text, lang, voice=None):
+        """
+        :param text: Text to speak.
+        :param lang: Language code.
+        :param voice: Engine-specific voice, or None for the language default.
+        :return: Encoded audio bytes.
+        """
+        raise NotImplementedError
+
+    def stream(self, text, lang, voice=None):
+        """Yield the encoded audio in chunks."""
+        yield self.synthesize(text, lang, voice)
+
+
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS (network). The voice selects the accent's top-level domain, e.g. 'co.uk'."""
+
+    name = "gtts"
+    audio_format = "mp3"
+
+    def _tts(self, text, lang, voice):
+        return gTTS(text=text, lang=lang, tld=voice or "com")
+
+    def synthesize(self, text, lang, voice=None):
+        buffer = io.BytesIO()
+        self._tts(text, lang, voice).write_to_fp(buffer)
+        return buffer.getvalue()
+
+    def stream(self, text, lang, voice=None):
+        # gTTS fetches one request per ~100 character part; yield each as it arrives
+        yield from self._tts(text, lang, voice).stream()
+
+
+class EspeakBackend(TTSBackend):
+    """espeak-ng (offline). The voice is an espeak voice name such as 'en-us'."""
+
+    name = "espeak"
+    audio_format = "wav"
+
+    def __init__(self, executable="espeak-ng"):
+        self.executable = shutil.which(executable) or shutil.which("espeak")
+        if not self.executable:
+            raise RuntimeError("espeak-ng is not installed")
+
+    def _command(self, text, lang, voice):
+        return [self.executable, "-v", voice or lang, "--stdout", text]
+
+    def synthesize(self, text, lang, voice=None):
+        result = subprocess.run(self._command(text, lang, voice), capture_output=True, check=True)
+        return result.stdout
+
+    def stream(self, text, lang, voice=None):
+        command = self._command(text, lang, voice)
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            while True:
+                chunk = process.stdout.read(8192)
+                if not chunk:
+                    break
+                yield chunk
+            stderr = process.stderr.read()
+        finally:
+            process.stdout.close()
+            process.stderr.close()
+            process.wait()
+        # Same as synthesize(): a failed run (e.g. an unknown voice) is an error, not empty audio
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, command, stderr=stderr)
+
+
+class PiperBackend(TTSBackend):
+    """
+    Piper neural TTS (offline). The voice is the path of a Piper .onnx model;
+    its .onnx.json config next to it provides the sample rate.
+    """
+
+    name = "piper"
+    audio_format = "wav"
+
+    def __init__(self, executable="piper", default_voice=None):
+        """
+        :param default_voice: Model used when no voice is given (PIPER_VOICE if None).
+        """
+        self.executable = shutil.which(executable)
+        if not self.executable:
+            raise RuntimeError("piper is not installed")
+        self.default_voice = default_voice or os.environ.get("PIPER_VOICE")
+
+    def synthesize(self, text, lang, voice=None):
+        model = voice or self.default_voice
+        if not model:
+            raise ValueError("Piper needs a voice model (pass voice or set PIPER_VOICE)")
+        with open(f"{model}.json") as f:
+            sample_rate = json.load(f)["audio"]["sample_rate"]
+        result = subprocess.run(
+            [self.executable, "--model", model, "--output-raw"],
+            input=text.encode(),
+            capture_output=True,
+            check=True,
+        )
+        # Raw 16-bit mono PCM; wrap it so the result is a playable file
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(result.stdout)
+        return buffer.getvalue()
+
+
+BACKENDS = {
+    "gtts": GTTSBackend,
+    "espeak": EspeakBackend,
+    "piper": PiperBackend,
+}
+
+
+def create_backend(name):
+    """Instantiate one of BACKENDS by name."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown TTS backend '{name}'. Available: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
 
 class TTSService:
-    def __init__(self, lang="en"):
+    def __init__(self, lang="en", backend="gtts", voice=None, cache=None):
+        """
+        :param lang: Language code.
+        :param backend: Backend name (see BACKENDS) or a TTSBackend instance.
+        :param voice: Backend-specific voice, or None for the language default.
+        :param cache: Optional phrase_cache.PhraseCache; phrases already
+            synthesized with the same backend, language and voice are reused.
+        """
         self.lang = lang
+        self.backend = create_backend(backend) if isinstance(backend, str) else backend
+        self.voice = voice
+        self.cache = cache
+
+    @property
+    def audio_format(self):
+        return self.backend.audio_format
+
+    def _key(self, text):
+        return phrase_key(self.backend.name, text, self.lang, self.voice)
+
+    def synthesize(self, text: str) -> bytes:
+        """
+        Synthesize text, using the phrase cache when available.
+        :return: Encoded audio bytes in `audio_format`.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(self._key(text), self.audio_format)
+            if cached is not None:
+                return cached
+        data = self.backend.synthesize(text, self.lang, self.voice)
+        # Empty output means the engine failed; never keep it as the phrase's audio
+        if self.cache is not None and data:
+            self.cache.put(self._key(text), self.audio_format, data)
+        return data
+
+    def stream(self, text: str, chunk_size=16384):
+        """
+        Yield encoded audio for text as it is produced. Cached phrases are
+        served from the cache; new ones are cached once fully synthesized.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(self._key(text), self.audio_format)
+            if cached is not None:
+                for i in range(0, len(cached), chunk_size):
+                    yield cached[i:i + chunk_size]
+                return
+        chunks = []
+        for chunk in self.backend.stream(text, self.lang, self.voice):
+            chunks.append(chunk)
+            yield chunk
+        data = b"".join(chunks)
+        if self.cache is not None and data:
+            self.cache.put(self._key(text), self.audio_format, data)
 
     def generate_audio(self, text: str, output_file: str):
         """
@@ -13,8 +207,13 @@ class TTSService:
         """
         try:
             print(f"Generating audio for: '{text}'")
-            tts = gTTS(text=text, lang=self.lang)
-            tts.save(output_file)
+            data = self.synthesize(text)
+            # Write next to the target and rename, so readers never see a partial file
+            directory = os.path.dirname(os.path.abspath(output_file))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, output_file)
             print(f"Audio saved to {output_file}")
             return True
         except Exception as e:
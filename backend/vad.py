@@ -0,0 +1,83 @@
+from collections import namedtuple
+
+import numpy as np
+from faster_whisper.vad import get_vad_model
+
+from audio_stream import SAMPLE_RATE
+
+# Silero VAD scores 512-sample windows at 16 kHz
+FRAME_SAMPLES = 512
+
+# Result of one VAD update:
+#   speech: new speech arrived since the previous update
+#   end_of_utterance: speech was followed by enough silence to finalize
+#   silent_until: absolute offset before which no unfinished speech remains
+#                 (None while an utterance is in progress)
+VadUpdate = namedtuple("VadUpdate", ["speech", "end_of_utterance", "silent_until"])
+
+
+class StreamingVAD:
+    """
+    Cheap voice activity gate in front of Whisper for a live session.
+
+    Each update only looks at frames that arrived since the previous one.
+    Frames below an RMS energy floor are treated as silence without running
+    a model; Silero VAD only scores frames loud enough to possibly be speech.
+    The session can skip inference entirely while nothing new was said and
+    finalize as soon as an utterance ends.
+    """
+
+    def __init__(self, energy_threshold=0.003, speech_threshold=0.5, end_of_utterance_ms=700, use_silero=True):
+        """
+        :param energy_threshold: RMS below which a frame is silence outright.
+        :param speech_threshold: Silero probability above which a frame is speech.
+        :param end_of_utterance_ms: Silence after speech that ends an utterance.
+        :param use_silero: Confirm loud frames with Silero (energy only if False).
+        """
+        self.energy_threshold = energy_threshold
+        self.speech_threshold = speech_threshold
+        self.end_of_utterance_samples = int(end_of_utterance_ms * SAMPLE_RATE / 1000)
+        self.model = get_vad_model() if use_silero else None
+
+        self.position = 0  # Absolute offset of the next unprocessed frame
+        self.in_utterance = False
+        self.last_speech_end = 0
+        self._context = np.zeros(FRAME_SAMPLES, dtype=np.float32)
+
+    def _speech_frames(self, frames):
+        energy = np.sqrt(np.mean(frames ** 2, axis=1))
+        loud = energy >= self.energy_threshold
+        if self.model is None or not loud.any():
+            return loud
+        # Score with the preceding frame as context; its own score is dropped
+        audio = np.concatenate([self._context, frames.reshape(-1)])
+        probs = np.asarray(self.model(audio)).reshape(-1)[1:]
+        return loud & (probs >= self.speech_threshold)
+
+    def update(self, buffer):
+        """
+        Classify frames that arrived in the buffer since the last update.
+        :param buffer: audio_stream.PCMBuffer holding the session audio.
+        :return: VadUpdate
+        """
+        start = max(self.position, buffer.start)
+        count = (buffer.end - start) // FRAME_SAMPLES
+        speech = False
+        if count:
+            frames = buffer.read(start, start + count * FRAME_SAMPLES).reshape(count, FRAME_SAMPLES)
+            is_speech = self._speech_frames(frames)
+            self._context = frames[-1].copy()
+            self.position = start + count * FRAME_SAMPLES
+            if is_speech.any():
+                speech = True
+                self.in_utterance = True
+                last = int(np.flatnonzero(is_speech)[-1])
+                self.last_speech_end = start + (last + 1) * FRAME_SAMPLES
+
+        end_of_utterance = False
+        if self.in_utterance and self.position - self.last_speech_end >= self.end_of_utterance_samples:
+            end_of_utterance = True
+            self.in_utterance = False
+
+        silent_until = None if self.in_utterance else self.position
+        return VadUpdate(speech, end_of_utterance, silent_until)
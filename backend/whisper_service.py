@@ -1,26 +1,112 @@
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, decode_audio
+from collections import namedtuple
 import os
+import re
+import time
+
+import numpy as np
+
+from audio_stream import SAMPLE_RATE
+from transcript_cache import cache_key
+
+# Result of one streaming pass: text committed by this pass and the unstable tail,
+# plus the StreamSegments behind each
+StreamUpdate = namedtuple("StreamUpdate", ["committed", "tentative", "segments", "tentative_segments"], defaults=((), ()))
+
+# A segment of a streaming session. start/end are absolute buffer offsets in
+# samples; words are (start, end, word, probability) with times in seconds
+# from the start of the session (empty without word timestamps).
+StreamSegment = namedtuple("StreamSegment", ["start", "end", "text", "words"])
 
 class WhisperService:
-    def __init__(self, model_size="large-v3-turbo", device="cpu", compute_type="int8"):
+    def __init__(self, model_size="large-v3-turbo", device="cpu", compute_type="int8", cpu_threads=0, num_workers=1, cache=None):
+        """
+        :param cpu_threads: CTranslate2 threads per inference call (0 = library default).
+        :param num_workers: Inference calls that may run in parallel from different threads.
+        :param cache: Optional transcript_cache.TranscriptCache; repeated audio
+            with the same parameters is then answered without inference.
+        """
         print(f"Loading Whisper model: {model_size} on {device} with {compute_type}")
-        self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
+        self.model = WhisperModel(
+            model_size,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            num_workers=num_workers,
+        )
         print("Model loaded successfully")
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.warmup_seconds = None
+        self.cache = cache
+        self.beam_size = 5
+        self.vad_parameters = dict(min_silence_duration_ms=500)
 
-    def transcribe(self, audio, language="en"):
+    def warm_up(self):
         """
-        Transcribe audio.
+        Run one short inference so the first real request does not pay for
+        lazy initialization inside CTranslate2.
+        :return: Seconds the warm-up took.
+        """
+        start = time.perf_counter()
+        # Low-level noise with the VAD off, so the encoder and decoder really run
+        noise = np.random.default_rng(0).normal(0, 0.01, SAMPLE_RATE).astype(np.float32)
+        segments, _ = self.model.transcribe(noise, language="en", beam_size=1, vad_filter=False)
+        list(segments)
+        self.warmup_seconds = time.perf_counter() - start
+        return self.warmup_seconds
+
+    def transcribe_segments(self, audio, language="en", initial_prompt=None, word_timestamps=False):
+        """
+        Transcribe audio and return the list of faster-whisper segments.
         :param audio: Path to audio file or numpy array of audio samples.
         :param language: Language code.
+        :param initial_prompt: Optional text to condition the first window on.
+        :param word_timestamps: Also align each word (segment.words), at some
+            extra decoding cost.
         """
-        try:
-            segments, info = self.model.transcribe(
+        key = None
+        if self.cache is not None:
+            # The key covers the decoded samples, not the file, so re-encoded copies still hit
+            if not isinstance(audio, np.ndarray):
+                audio = decode_audio(audio, sampling_rate=SAMPLE_RATE)
+            key = cache_key(
                 audio,
+                model=self.model_size,
+                compute_type=self.compute_type,
                 language=language,
-                beam_size=5,
+                beam_size=self.beam_size,
                 vad_filter=True,
-                vad_parameters=dict(min_silence_duration_ms=500)
+                vad_parameters=self.vad_parameters,
+                initial_prompt=initial_prompt,
+                word_timestamps=word_timestamps,
             )
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        segments, info = self.model.transcribe(
+            audio,
+            language=language,
+            beam_size=self.beam_size,
+            vad_filter=True,
+            vad_parameters=self.vad_parameters,
+            initial_prompt=initial_prompt,
+            word_timestamps=word_timestamps,
+        )
+        segments = list(segments)
+        if key is not None:
+            self.cache.put(key, segments)
+        return segments
+
+    def transcribe(self, audio, language="en"):
+        """
+        Transcribe audio.
+        :param audio: Path to audio file or numpy array of audio samples.
+        :param language: Language code.
+        """
+        try:
+            segments = self.transcribe_segments(audio, language=language)
 
             text = ""
             for segment in segments:
@@ -30,3 +116,143 @@ class WhisperService:
         except Exception as e:
             print(f"Error during transcription: {e}")
             return ""
+
+    def stream_session(self, buffer, language="en", max_window=20.0, word_timestamps=False):
+        """
+        Start a streaming transcription over a growing PCM buffer.
+        :param buffer: audio_stream.PCMBuffer receiving the session audio.
+        :param language: Language code.
+        :param max_window: Maximum seconds of uncommitted audio per pass.
+        :param word_timestamps: Attach word timings to the streamed segments.
+        """
+        return StreamingSession(self, buffer, language=language, max_window=max_window, word_timestamps=word_timestamps)
+
+
+def _normalize(text):
+    return re.sub(r"[^\w\s]", "", text).lower().split()
+
+
+class StreamingSession:
+    """
+    Sliding-window transcription of a live session (LocalAgreement policy).
+
+    Every pass transcribes only the uncommitted audio still held in the buffer.
+    Segments that two consecutive passes agree on are committed and their
+    audio is trimmed from the buffer, so inference cost per pass is capped by
+    the window size rather than the session length.
+    """
+
+    def __init__(self, service, buffer, language="en", max_window=20.0, tail_guard=1.0, word_timestamps=False):
+        """
+        :param service: WhisperService used for inference.
+        :param buffer: audio_stream.PCMBuffer holding the session audio.
+        :param language: Language code.
+        :param max_window: Seconds of audio after which the oldest segments
+            are committed even without agreement.
+        :param tail_guard: Segments ending closer than this many seconds to
+            the end of the buffer may still be growing and are not committed.
+        :param word_timestamps: Request word timings, returned on the
+            StreamSegments of each update.
+        """
+        self.service = service
+        self.buffer = buffer
+        self.language = language
+        self.max_window_samples = int(max_window * SAMPLE_RATE)
+        self.tail_guard_samples = int(tail_guard * SAMPLE_RATE)
+        self.word_timestamps = word_timestamps
+        self.committed_text = ""
+        self.tentative_text = ""
+        # Committed (start, end, text) segments in seconds from the start of the session
+        self.committed_segments = []
+        # Uncommitted StreamSegments from the previous pass
+        self._previous = []
+
+    @property
+    def text(self):
+        """Committed text followed by the current tentative tail."""
+        return f"{self.committed_text} {self.tentative_text}".strip()
+
+    def process(self):
+        """
+        Run one pass over the current window.
+        :return: StreamUpdate with newly committed text and the tentative tail.
+        """
+        window_start = self.buffer.start
+        window_end = self.buffer.end
+        audio = self.buffer.read(window_start, window_end)
+        if len(audio) == 0:
+            return StreamUpdate("", self.tentative_text, (), tuple(self._previous))
+
+        prompt = self.committed_text[-200:] or None
+        segments = self.service.transcribe_segments(
+            audio,
+            language=self.language,
+            initial_prompt=prompt,
+            word_timestamps=self.word_timestamps,
+        )
+        offset = window_start / SAMPLE_RATE
+        hypothesis = [
+            StreamSegment(
+                window_start + int(s.start * SAMPLE_RATE),
+                window_start + int(s.end * SAMPLE_RATE),
+                s.text.strip(),
+                [(offset + w.start, offset + w.end, w.word.strip(), w.probability) for w in s.words or ()],
+            )
+            for s in segments
+            if s.text.strip()
+        ]
+
+        # Longest prefix both passes agree on
+        agreed = 0
+        for previous, current in zip(self._previous, hypothesis):
+            if _normalize(previous.text) != _normalize(current.text):
+                break
+            agreed += 1
+        # The last segment may still be growing while the speaker talks
+        if agreed and agreed == len(hypothesis) and window_end - hypothesis[-1].end < self.tail_guard_samples:
+            agreed -= 1
+
+        if len(audio) > self.max_window_samples:
+            # Window is full: commit everything but the newest segment
+            agreed = max(agreed, len(hypothesis) - 1)
+            if not hypothesis:
+                # Nothing but silence; keep the most recent half window
+                self.buffer.trim(window_end - self.max_window_samples // 2)
+
+        committed = hypothesis[:agreed]
+        self._previous = hypothesis[agreed:]
+        self.tentative_text = " ".join(s.text for s in self._previous)
+
+        new_text = " ".join(s.text for s in committed)
+        self._record(committed)
+        if committed:
+            self.buffer.trim(committed[-1].end)
+            self.committed_text = f"{self.committed_text} {new_text}".strip()
+        return StreamUpdate(new_text, self.tentative_text, tuple(committed), tuple(self._previous))
+
+    def _record(self, segments):
+        self.committed_segments += [(s.start / SAMPLE_RATE, s.end / SAMPLE_RATE, s.text) for s in segments]
+
+    def discard_silence(self, upto, keep=0.5):
+        """
+        Drop audio known to hold no speech, keeping `keep` seconds before
+        `upto` as lead-in. Does nothing while tentative text is pending.
+        """
+        if not self._previous:
+            self.buffer.trim(upto - int(keep * SAMPLE_RATE))
+
+    def flush(self):
+        """
+        Commit the tentative tail, e.g. when the session ends.
+        :return: StreamUpdate with the text committed by the flush.
+        """
+        new_text = self.tentative_text
+        committed = tuple(self._previous)
+        self._record(committed)
+        if committed:
+            self.buffer.trim(committed[-1].end)
+        self._previous = []
+        self.tentative_text = ""
+        if new_text:
+            self.committed_text = f"{self.committed_text} {new_text}".strip()
+        return StreamUpdate(new_text, "", committed)
@@ -0,0 +1,304 @@
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+from inference_worker import recv_message, segments_from_json, send_message
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inference_worker.py")
+
+
+class WorkerUnavailable(Exception):
+    """No healthy worker could take the request."""
+
+
+class WorkerClient:
+    """
+    Gateway side of one inference worker: a set of reusable connections to
+    its socket plus the load and health the router looks at.
+    """
+
+    def __init__(self, path, timeout=60.0, process=None, cpu_threads=None):
+        """
+        :param path: The worker's Unix socket.
+        :param timeout: Seconds a request may take before the worker is
+            considered stuck.
+        :param process: subprocess.Popen of a worker this gateway started,
+            so it can be restarted if it dies.
+        :param cpu_threads: CPU cores a started worker was given, reused
+            when it is restarted.
+        """
+        self.path = path
+        self.timeout = timeout
+        self.process = process
+        self.cpu_threads = cpu_threads
+        self.healthy = False
+        self.active = 0  # Requests in flight
+        self.sessions = 0  # Sessions pinned here
+        self.served = 0
+        self.failures = 0
+        self._idle = []  # Connected sockets not in use
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def request(self, header, payload=b"", timeout=None):
+        """
+        Send a request on an idle connection and wait for the reply.
+        :param timeout: Seconds to wait (default: the client's timeout).
+        :raises WorkerUnavailable: If the worker cannot be reached or hangs.
+        """
+        with self._lock:
+            sock = self._idle.pop() if self._idle else None
+            self.active += 1
+        try:
+            if sock is None:
+                sock = self._connect()
+            sock.settimeout(timeout or self.timeout)
+            send_message(sock, dict(header, id=next(self._ids)), payload)
+            reply, _ = recv_message(sock)
+        except (OSError, ConnectionError, ValueError) as e:
+            if sock is not None:
+                sock.close()
+            with self._lock:
+                self.failures += 1
+            raise WorkerUnavailable(f"Worker {self.path}: {e}") from e
+        finally:
+            with self._lock:
+                self.active -= 1
+        with self._lock:
+            self._idle.append(sock)
+        return reply
+
+    def transcribe(self, audio, model, language="en", initial_prompt=None, word_timestamps=False):
+        reply = self.request(
+            {
+                "op": "transcribe",
+                "model": model,
+                "language": language,
+                "initial_prompt": initial_prompt,
+                "word_timestamps": word_timestamps,
+            },
+            np.ascontiguousarray(audio, dtype=np.float32).tobytes(),
+        )
+        if "error" in reply:
+            # The worker is fine, the request failed: not a health problem
+            raise RuntimeError(reply["error"])
+        with self._lock:
+            self.served += 1
+        return segments_from_json(reply["segments"])
+
+    def ping(self, timeout=2.0):
+        """Health check; answered even while the worker is busy transcribing."""
+        return self.request({"op": "health"}, timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for sock in idle:
+            sock.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "path": self.path,
+                "healthy": self.healthy,
+                "active": self.active,
+                "sessions": self.sessions,
+                "served": self.served,
+                "failures": self.failures,
+                "pid": self.process.pid if self.process else None,
+            }
+
+
+class WorkerPool:
+    """
+    Routes transcription requests from gateway sessions to inference
+    workers.
+
+    A session is pinned to the least-loaded healthy worker (fewest pinned
+    sessions, then fewest requests in flight) on its first request and
+    stays there, so its passes run in order on one worker with its model
+    already resident. If that worker fails, the session moves to another
+    one; no state is lost since each request carries its whole window.
+    A background thread pings every worker each `health_interval` seconds,
+    marks it healthy or not, and restarts workers this pool started.
+    """
+
+    def __init__(self, workers, health_interval=2.0):
+        self.workers = list(workers)
+        self.health_interval = health_interval
+        self.restarts = 0
+        self._affinity = {}  # session id -> WorkerClient
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread = None
+
+    @classmethod
+    def connect(cls, paths, timeout=60.0, health_interval=2.0):
+        """Pool over workers that are already running on `paths`."""
+        return cls([WorkerClient(path, timeout=timeout) for path in paths], health_interval=health_interval)
+
+    @classmethod
+    def spawn(cls, count, socket_dir=None, timeout=60.0, health_interval=2.0):
+        """
+        Start `count` local worker processes (inference_worker.py) and a
+        pool over them. Workers inherit this process's settings, with the
+        CPU cores split evenly between them, and become healthy once their
+        default model is loaded.
+        """
+        socket_dir = socket_dir or tempfile.mkdtemp(prefix="audio-assistant-workers-")
+        # Each worker sizes its threads to its share, so together they do not oversubscribe the CPU
+        cpu_threads = max(1, (os.cpu_count() or 1) // count)
+        workers = []
+        for index in range(count):
+            worker = WorkerClient(os.path.join(socket_dir, f"worker-{index}.sock"), timeout=timeout, cpu_threads=cpu_threads)
+            worker.process = _start_worker(worker.path, worker.cpu_threads)
+            workers.append(worker)
+        return cls(workers, health_interval=health_interval)
+
+    def start(self):
+        """Check health now and keep checking in the background."""
+        self.check_health()
+        self._health_thread = threading.Thread(target=self._health_loop, name="worker-health", daemon=True)
+        self._health_thread.start()
+        return self
+
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+
+    def check_health(self):
+        for worker in self.workers:
+            if worker.process is not None and worker.process.poll() is not None:
+                print(f"Inference worker {worker.path} exited with {worker.process.returncode}, restarting")
+                self._set_healthy(worker, False)
+                worker.close()
+                worker.process = _start_worker(worker.path, worker.cpu_threads)
+                self.restarts += 1
+                continue
+            try:
+                worker.ping()
+                self._set_healthy(worker, True)
+            except WorkerUnavailable:
+                self._set_healthy(worker, False)
+
+    def _set_healthy(self, worker, healthy):
+        if worker.healthy and not healthy:
+            print(f"Inference worker {worker.path} is unhealthy")
+            # Its sessions pick another worker on their next request
+            self._unpin(worker)
+        worker.healthy = healthy
+
+    def _unpin(self, worker):
+        with self._lock:
+            for session, pinned in list(self._affinity.items()):
+                if pinned is worker:
+                    del self._affinity[session]
+                    worker.sessions -= 1
+
+    @property
+    def ready(self):
+        return any(worker.healthy for worker in self.workers)
+
+    def route(self, session):
+        """
+        :return: The worker serving `session`, pinning it if needed.
+        :raises WorkerUnavailable: If no worker is healthy.
+        """
+        with self._lock:
+            worker = self._affinity.get(session)
+            if worker is not None and worker.healthy:
+                return worker
+            healthy = [w for w in self.workers if w.healthy]
+            if not healthy:
+                raise WorkerUnavailable("No healthy inference workers")
+            if worker is not None:
+                worker.sessions -= 1
+            worker = min(healthy, key=lambda w: (w.sessions, w.active))
+            worker.sessions += 1
+            self._affinity[session] = worker
+            return worker
+
+    def release(self, session):
+        """The session ended: unpin it."""
+        with self._lock:
+            worker = self._affinity.pop(session, None)
+            if worker is not None:
+                worker.sessions -= 1
+
+    def transcribe(self, session, audio, model, **options):
+        """
+        Transcribe a window for `session` on its worker, moving the session
+        to another worker once if its worker turns out to be down.
+        """
+        for attempt in range(2):
+            worker = self.route(session)
+            try:
+                return worker.transcribe(audio, model, **options)
+            except WorkerUnavailable as e:
+                print(f"{e}; rerouting session {session}")
+                self._set_healthy(worker, False)
+                if attempt:
+                    raise
+
+    def stats(self):
+        return {"restarts": self.restarts, "workers": [worker.stats() for worker in self.workers]}
+
+    def close(self):
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join()
+        for worker in self.workers:
+            worker.close()
+            if worker.process is not None:
+                worker.process.terminate()
+                worker.process.wait()
+
+
+def _start_worker(path, cpu_threads=None):
+    command = [sys.executable, WORKER_SCRIPT, "--socket", path]
+    if cpu_threads:
+        command += ["--cpu-threads", str(cpu_threads)]
+    return subprocess.Popen(command, cwd=os.path.dirname(WORKER_SCRIPT))
+
+
+class RemoteTranscriber:
+    """
+    What a StreamingSession calls in split mode: sends each window to the
+    session's worker instead of running a local model.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, pool, model):
+        self.pool = pool
+        self.model = model
+        self.session = next(self._ids)
+
+    def transcribe_segments(self, audio, language="en", initial_prompt=None, word_timestamps=False):
+        return self.pool.transcribe(
+            self.session,
+            audio,
+            self.model,
+            language=language,
+            initial_prompt=initial_prompt,
+            word_timestamps=word_timestamps,
+        )
+
+    def close(self):
+        self.pool.release(self.session)
@@ -0,0 +1,36 @@
+// AudioWorklet processor that turns microphone input into 16 kHz mono int16
+// PCM frames for the transcription WebSocket (`?encoding=pcm_s16le`).
+// Frames of `frameMs` milliseconds are posted to the main thread as ArrayBuffers.
+class PcmSenderProcessor extends AudioWorkletProcessor {
+  constructor(options) {
+    super();
+    const { targetSampleRate = 16000, frameMs = 100 } = options.processorOptions || {};
+    this.step = sampleRate / targetSampleRate;
+    this.position = 0;
+    this.frame = new Int16Array(Math.round(targetSampleRate * frameMs / 1000));
+    this.length = 0;
+  }
+
+  process(inputs) {
+    const channel = inputs[0] && inputs[0][0];
+    if (!channel) return true;
+
+    // Linear-interpolation resampling from the context rate down to the target rate
+    while (this.position < channel.length - 1) {
+      const index = Math.floor(this.position);
+      const fraction = this.position - index;
+      const sample = channel[index] + (channel[index + 1] - channel[index]) * fraction;
+      this.frame[this.length++] = Math.max(-1, Math.min(1, sample)) * 0x7fff;
+      if (this.length === this.frame.length) {
+        this.port.postMessage(this.frame.buffer, [this.frame.buffer]);
+        this.frame = new Int16Array(this.frame.length);
+        this.length = 0;
+      }
+      this.position += this.step;
+    }
+    this.position -= channel.length;
+    return true;
+  }
+}
+
+registerProcessor('pcm-sender', PcmSenderProcessor);
@@ -13,7 +13,8 @@ function App() {
     filenamePrefix: 'recording',
     maxDuration: 60,
     transcriptionEnabled: true,
-    transcriptionMode: 'recording'
+    transcriptionMode: 'recording',
+    streamEncoding: 'webm'
   });
 
   const {
@@ -21,7 +22,9 @@ function App() {
     isRecording,
     isRecordingPlaying,
     transcription,
+    partialTranscription,
     isTranscribing,
+    transcriptionLag,
     toggleMic,
     toggleRecording,
     togglePlayback,
@@ -35,7 +38,7 @@ function App() {
     if (transcriptionBoxRef.current) {
       transcriptionBoxRef.current.scrollTop = transcriptionBoxRef.current.scrollHeight;
     }
-  }, [transcription]);
+  }, [transcription, partialTranscription]);
 
   return (
     <>
@@ -67,7 +70,7 @@ function App() {
       }}>
         {isTranscribing && (
           <div className="text-sm text-cyan-400 mb-2 font-mono animate-pulse">
-            Transcribing...
+            Transcribing...{transcriptionLag > 0 && ` (${(transcriptionLag / 1000).toFixed(1)}s behind)`}
           </div>
         )}
         <div
@@ -89,7 +92,13 @@ function App() {
             boxShadow: '0 4px 6px rgba(0, 0, 0, 0.3)'
           }}
         >
-          {transcription || <span style={{ color: '#6b7280', fontStyle: 'italic' }}>Transcription will appear here...</span>}
+          {transcription}
+          {partialTranscription && (
+            <span style={{ color: '#9ca3af' }}>{transcription && ' '}{partialTranscription}</span>
+          )}
+          {!transcription && !partialTranscription && (
+            <span style={{ color: '#6b7280', fontStyle: 'italic' }}>Transcription will appear here...</span>
+          )}
         </div>
       </div>
 
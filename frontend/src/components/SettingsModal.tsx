@@ -2,12 +2,14 @@ import React from 'react';
 import { X } from 'lucide-react';
 
 export interface Settings {
-  audioOutput: 'opus' | 'mp3';
+  audioOutput: 'opus' | 'mp3' | 'flac';
   saveFolder: string;
   filenamePrefix: string;
   maxDuration: number; // minutes
   transcriptionEnabled: boolean;
   transcriptionMode: 'recording' | 'continuous';
+  // How microphone audio is streamed for transcription (default: webm)
+  streamEncoding?: 'webm' | 'pcm';
 }
 
 interface SettingsModalProps {
@@ -83,7 +85,8 @@ const SettingsModal: React.FC<SettingsModalProps> = ({ isOpen, onClose, settings
               }}
             >
               <option value="opus">Opus (WebM) - Default</option>
-              <option value="mp3">MP3 (Requires Backend)</option>
+              <option value="mp3">MP3</option>
+              <option value="flac">FLAC</option>
             </select>
           </label>
         </div>
@@ -192,6 +195,31 @@ const SettingsModal: React.FC<SettingsModalProps> = ({ isOpen, onClose, settings
           </div>
         )}
 
+        {/* Streaming Format */}
+        {settings.transcriptionEnabled && (
+          <div style={{ marginBottom: '1.5rem' }}>
+            <label style={{ display: 'block', marginBottom: '0.5rem', color: '#ccc' }}>
+              Streaming Format
+              <select
+                value={settings.streamEncoding ?? 'webm'}
+                onChange={(e) => handleChange('streamEncoding', e.target.value)}
+                style={{
+                  width: '100%',
+                  padding: '0.5rem',
+                  borderRadius: '4px',
+                  border: '1px solid #333',
+                  backgroundColor: '#000',
+                  color: '#fff',
+                  marginTop: '0.5rem'
+                }}
+              >
+                <option value="webm">WebM (MediaRecorder) - Default</option>
+                <option value="pcm">Raw PCM (AudioWorklet, lower latency)</option>
+              </select>
+            </label>
+          </div>
+        )}
+
       </div>
     </div>
   );
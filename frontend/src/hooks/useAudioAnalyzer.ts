@@ -7,12 +7,24 @@ export interface AudioData {
   timeDomain: Uint8Array;
 }
 
+// A transcript segment from a "partial" or "final" message; times in seconds from the session start
+interface TranscriptSegment {
+  start: number;
+  end: number;
+  text: string;
+  words: { start: number; end: number; word: string; probability: number }[];
+}
+
 export const useAudioAnalyzer = (settings: Settings) => {
   const [isMicOn, setIsMicOn] = useState(false);
   const [isRecording, setIsRecording] = useState(false);
   const [isRecordingPlaying, setIsRecordingPlaying] = useState(false);
+  // Final text only ever grows; the partial tail is replaced as recognition firms up
   const [transcription, setTranscription] = useState("");
+  const [partialTranscription, setPartialTranscription] = useState("");
   const [isTranscribing, setIsTranscribing] = useState(false);
+  // Milliseconds the server's transcription is behind the audio we sent (0 = keeping up)
+  const [transcriptionLag, setTranscriptionLag] = useState(0);
 
   const audioContextRef = useRef<AudioContext | null>(null);
 
@@ -20,8 +32,13 @@ export const useAudioAnalyzer = (settings: Settings) => {
   const analyserRef = useRef<AnalyserNode | null>(null);
   const sourceRef = useRef<MediaStreamAudioSourceNode | null>(null);
   const mediaRecorderRef = useRef<MediaRecorder | null>(null);
+  // Sends raw PCM frames instead of MediaRecorder blobs when streamEncoding is 'pcm'
+  const pcmSenderRef = useRef<AudioWorkletNode | null>(null);
   const chunksRef = useRef<Blob[]>([]);
   const socketRef = useRef<WebSocket | null>(null);
+  // Final segment texts by index, and the seq of the last transcript message
+  const finalSegmentsRef = useRef<string[]>([]);
+  const lastSeqRef = useRef(0);
   const recordingStartTimeRef = useRef<number | null>(null);
 
   // Output refs
@@ -51,9 +68,15 @@ export const useAudioAnalyzer = (settings: Settings) => {
     if (settings.saveFolder) params.append('save_folder', settings.saveFolder);
     if (settings.filenamePrefix) params.append('filename_prefix', settings.filenamePrefix);
     if (settings.audioOutput) params.append('format', settings.audioOutput);
+    // Raw PCM is decoded in-process by the server, skipping ffmpeg
+    if (settings.streamEncoding === 'pcm') params.append('encoding', 'pcm_s16le');
 
     const wsUrl = `ws://localhost:8000/ws/transcribe?${params.toString()}`;
     socketRef.current = new WebSocket(wsUrl);
+    finalSegmentsRef.current = [];
+    lastSeqRef.current = 0;
+    setTranscription("");
+    setPartialTranscription("");
 
     socketRef.current.onopen = () => {
       console.log('WebSocket Connected');
@@ -62,7 +85,42 @@ export const useAudioAnalyzer = (settings: Settings) => {
 
     socketRef.current.onmessage = (event) => {
       const text = event.data;
-      setTranscription(text);
+
+      let message;
+      try {
+        message = JSON.parse(text);
+      } catch {
+        // Plain text frame (protocol=text): the whole transcript
+        setTranscription(text);
+        return;
+      }
+
+      if (message.type === 'final' || message.type === 'partial') {
+        if (message.seq !== lastSeqRef.current + 1) {
+          console.warn(`Transcript message ${lastSeqRef.current + 1} missed (got ${message.seq})`);
+        }
+        lastSeqRef.current = message.seq;
+        setTranscriptionLag(0);
+
+        const texts = (message.segments as TranscriptSegment[]).map((segment) => segment.text);
+        if (message.type === 'partial') {
+          setPartialTranscription(texts.join(' '));
+        } else if (message.index === finalSegmentsRef.current.length) {
+          // Usual case: new segments are appended, earlier text is left alone
+          finalSegmentsRef.current.push(...texts);
+          const added = texts.join(' ');
+          setTranscription((prev) => (prev ? `${prev} ${added}` : added));
+        } else {
+          finalSegmentsRef.current.splice(message.index, texts.length, ...texts);
+          setTranscription(finalSegmentsRef.current.join(' '));
+        }
+      } else if (message.type === 'lag') {
+        setTranscriptionLag(message.lag_ms);
+      } else if (message.type === 'error') {
+        console.error('Transcription error:', message.message);
+      } else if (message.type === 'status') {
+        console.log('Transcription status:', message.state);
+      }
     };
 
     socketRef.current.onerror = (error) => {
@@ -74,7 +132,7 @@ export const useAudioAnalyzer = (settings: Settings) => {
       console.log('WebSocket Disconnected');
       setIsTranscribing(false);
     };
-  }, [settings.transcriptionEnabled, settings.saveFolder, settings.filenamePrefix, settings.audioOutput]);
+  }, [settings.transcriptionEnabled, settings.saveFolder, settings.filenamePrefix, settings.audioOutput, settings.streamEncoding]);
 
   const [recordedAudioUrl, setRecordedAudioUrl] = useState<string | null>(null);
   const audioElementRef = useRef<HTMLAudioElement | null>(null);
@@ -96,6 +154,22 @@ export const useAudioAnalyzer = (settings: Settings) => {
       source.connect(analyser);
       sourceRef.current = source;
 
+      // PCM streaming: an AudioWorklet resamples to 16 kHz int16 and posts 100 ms frames
+      if (settings.streamEncoding === 'pcm') {
+        await ctx.audioWorklet.addModule('/pcm-sender-worklet.js');
+        const pcmSender = new AudioWorkletNode(ctx, 'pcm-sender', {
+          numberOfOutputs: 0,
+          processorOptions: { targetSampleRate: 16000, frameMs: 100 }
+        });
+        pcmSender.port.onmessage = (e) => {
+          if (socketRef.current?.readyState === WebSocket.OPEN) {
+            socketRef.current.send(e.data);
+          }
+        };
+        source.connect(pcmSender);
+        pcmSenderRef.current = pcmSender;
+      }
+
       // Setup MediaRecorder
       const mediaRecorder = new MediaRecorder(stream);
       mediaRecorder.ondataavailable = (e) => {
@@ -105,8 +179,8 @@ export const useAudioAnalyzer = (settings: Settings) => {
              chunksRef.current.push(e.data);
           }
 
-          // Send to WebSocket if open (Continuous or Recording)
-          if (socketRef.current?.readyState === WebSocket.OPEN) {
+          // Send to WebSocket if open (Continuous or Recording); PCM mode streams from the worklet
+          if (settings.streamEncoding !== 'pcm' && socketRef.current?.readyState === WebSocket.OPEN) {
             socketRef.current.send(e.data);
           }
         }
@@ -135,7 +209,7 @@ export const useAudioAnalyzer = (settings: Settings) => {
       console.error('Error accessing microphone:', error);
       setIsMicOn(false);
     }
-  }, [settings.transcriptionEnabled, settings.transcriptionMode, connectWebSocket, isRecording]);
+  }, [settings.transcriptionEnabled, settings.transcriptionMode, settings.streamEncoding, connectWebSocket, isRecording]);
 
   // Handle isRecording change for MediaRecorder
   // We need a way to start/stop MediaRecorder if mode is NOT continuous
@@ -171,6 +245,11 @@ export const useAudioAnalyzer = (settings: Settings) => {
       sourceRef.current.disconnect();
       sourceRef.current = null;
     }
+    if (pcmSenderRef.current) {
+      pcmSenderRef.current.port.onmessage = null;
+      pcmSenderRef.current.disconnect();
+      pcmSenderRef.current = null;
+    }
     if (mediaRecorderRef.current && mediaRecorderRef.current.state !== 'inactive') {
       mediaRecorderRef.current.stop();
     }
@@ -374,7 +453,9 @@ export const useAudioAnalyzer = (settings: Settings) => {
     isRecording,
     isRecordingPlaying,
     transcription,
+    partialTranscription,
     isTranscribing,
+    transcriptionLag,
     toggleMic,
     toggleRecording,
     togglePlayback,
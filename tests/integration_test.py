@@ -1,33 +1,41 @@
 import os
+import shutil
+import sys
+import tempfile
 import pytest
 from playwright.sync_api import sync_playwright, expect
-from gtts import gTTS
 from pydub import AudioSegment
 from fuzzywuzzy import fuzz
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from tts_service import TTSService
+from phrase_cache import PhraseCache
+
 # Constants
 TEST_TEXT = "The quick brown fox jumps over the lazy dog"
-INPUT_MP3 = "tests/input.mp3"
+# Generated audio and its phrase cache, removed on teardown
+WORK_DIR = tempfile.mkdtemp(prefix="integration-test-")
 INPUT_WAV = "tests/input.wav"
 TRANSCRIPTION_FILE = "tests/transcription.txt"
 FRONTEND_URL = "http://localhost:5173"
 
 def setup_audio():
-    """Generates MP3 and converts to WAV for browser injection."""
+    """Generates speech and converts it to WAV for browser injection."""
     print(f"Generating audio for: '{TEST_TEXT}'")
-    tts = gTTS(text=TEST_TEXT, lang='en')
-    tts.save(INPUT_MP3)
+    # Set TTS_BACKEND=espeak to run offline; the cache is private to this run
+    tts = TTSService(lang='en', backend=os.environ.get("TTS_BACKEND", "gtts"), cache=PhraseCache(os.path.join(WORK_DIR, "phrases")))
+    input_audio = os.path.join(WORK_DIR, f"input.{tts.audio_format}")
+    assert tts.generate_audio(TEST_TEXT, input_audio), "Failed to generate test audio"
 
     # Convert to WAV using pydub (requires ffmpeg)
-    sound = AudioSegment.from_mp3(INPUT_MP3)
+    sound = AudioSegment.from_file(input_audio, format=tts.audio_format)
     sound.export(INPUT_WAV, format="wav")
     print(f"Audio prepared at {INPUT_WAV}")
 
 def teardown_audio():
     """Cleans up generated files."""
-    if os.path.exists(INPUT_MP3):
-        os.remove(INPUT_MP3)
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
     if os.path.exists(INPUT_WAV):
         os.remove(INPUT_WAV)
     if os.path.exists(TRANSCRIPTION_FILE):